@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+Benchmark de compresión de respuestas: CPU frente a bytes enviados.
+
+Genera un listado JSON con la forma de ProductListSerializer y lo
+comprime con gzip y brotli en varios niveles, midiendo tamaño, tiempo por
+respuesta y el ahorro de la caché de representaciones comprimidas.
+
+Uso:
+    python benchmark_compression.py --products 1000 --repeat 20
+"""
+import argparse
+import json
+import random
+import time
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def build_payload(count):
+    """
+    Construye un cuerpo JSON parecido al de GET /products/.
+    """
+    random.seed(42)
+    categories = ['Electrónicos', 'Ropa', 'Hogar', 'Deportes', 'Libros']
+    results = []
+    for i in range(count):
+        price = random.randint(10000, 9000000)
+        stock = random.randint(0, 200)
+        results.append({
+            'id': i + 1,
+            'name': f'Producto de ejemplo {i}',
+            'price': f'{price}.00',
+            'price_display': f'${price:,.2f}',
+            'category_name': random.choice(categories),
+            'image': f'http://localhost:8000/media/products/images/producto_{i}.jpg',
+            'stock': stock,
+            'is_in_stock': stock > 0,
+            'created_at': '2025-10-20T01:13:00.000000-05:00',
+        })
+    return json.dumps({'count': count, 'next': None, 'previous': None, 'results': results}).encode()
+
+
+def measure(name, compress, payload, repeat):
+    """
+    Comprime el payload varias veces y retorna tamaño y tiempo medio.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        compressed = compress(payload)
+    elapsed = (time.perf_counter() - start) / repeat
+    return name, len(compressed), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de compresión de respuestas')
+    parser.add_argument('--products', type=int, default=1000, help='Productos en el listado')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    payload = build_payload(args.products)
+    codecs = [
+        (f'gzip nivel {level}', lambda data, level=level: zlib.compress(data, level))
+        for level in (1, 6, 9)
+    ]
+    if brotli is not None:
+        codecs += [
+            (f'brotli calidad {quality}', lambda data, quality=quality: brotli.compress(data, quality=quality))
+            for quality in (1, 4, 6, 11)
+        ]
+    else:
+        print('brotli no está instalado; solo se mide gzip.')
+
+    print(f'Cuerpo original: {len(payload):,} bytes ({args.products} productos)')
+    print(f"{'Codificación':<20}{'bytes':>12}{'ratio':>8}{'ms/resp':>10}{'MB/s':>10}{'resp/s/núcleo':>16}")
+    for name, compress in codecs:
+        name, size, elapsed = measure(name, compress, payload, args.repeat)
+        print(
+            f'{name:<20}{size:>12,}{len(payload) / size:>8.1f}{elapsed * 1000:>10.2f}'
+            f'{len(payload) / elapsed / 1e6:>10.1f}{1 / elapsed:>16.0f}'
+        )
+
+    # Costo de un acierto en la caché de representaciones comprimidas:
+    # solo el hash del contenido, frente a volver a comprimir.
+    import hashlib
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        hashlib.blake2b(payload, digest_size=20).hexdigest()
+    hash_ms = (time.perf_counter() - start) / args.repeat * 1000
+    print(f'\nHash para buscar en caché: {hash_ms:.3f} ms por respuesta')
+
+
+if __name__ == '__main__':
+    main()
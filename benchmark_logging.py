@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+"""
+Benchmark del costo de logging por petición.
+
+Compara el FileHandler síncrono con el QueueRotatingFileHandler del proyecto
+simulando peticiones concurrentes que emiten varios registros cada una.
+
+Uso:
+    python benchmark_logging.py --requests 20000 --threads 8 --records 3
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalogo_backend.logging_utils import (  # noqa: E402
+    JSONFormatter,
+    QueueRotatingFileHandler,
+    RequestIDFilter,
+    request_id_var,
+)
+
+
+def build_logger(name, handler):
+    """
+    Crea un logger aislado con el handler indicado.
+    """
+    handler.setFormatter(JSONFormatter())
+    handler.addFilter(RequestIDFilter())
+    logger = logging.getLogger(f'benchmark.{name}')
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+def simulate(logger, total_requests, threads, records):
+    """
+    Ejecuta las peticiones simuladas y retorna la latencia por petición en µs.
+    """
+    per_thread = total_requests // threads
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(worker_id):
+        local = []
+        for i in range(per_thread):
+            token = request_id_var.set(f'{worker_id}-{i}')
+            start = time.perf_counter()
+            for n in range(records):
+                logger.info('Registro de prueba', extra={'product_id': i, 'step': n})
+            local.append(time.perf_counter() - start)
+            request_id_var.reset(token)
+        with lock:
+            latencies.extend(local)
+
+    pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    wall_start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    wall = time.perf_counter() - wall_start
+
+    latencies.sort()
+    return {
+        'mean_us': sum(latencies) / len(latencies) * 1e6,
+        'p99_us': latencies[int(len(latencies) * 0.99) - 1] * 1e6,
+        'rps': len(latencies) / wall,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de handlers de logging')
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--records', type=int, default=3, help='Registros por petición')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sync_handler = logging.FileHandler(os.path.join(tmp, 'sync.log'))
+        queue_handler = QueueRotatingFileHandler(
+            os.path.join(tmp, 'queue.log'),
+            queue_size=args.requests * args.records,
+        )
+
+        results = {}
+        for name, handler in (('FileHandler', sync_handler), ('QueueRotatingFileHandler', queue_handler)):
+            logger = build_logger(name, handler)
+            results[name] = simulate(logger, args.requests, args.threads, args.records)
+            handler.close()
+
+        print(f"{args.requests} peticiones, {args.threads} hilos, {args.records} registros por petición")
+        print(f"{'Handler':<28}{'media (µs)':>12}{'p99 (µs)':>12}{'peticiones/s':>16}")
+        for name, result in results.items():
+            print(f"{name:<28}{result['mean_us']:>12.1f}{result['p99_us']:>12.1f}{result['rps']:>16.0f}")
+        if queue_handler.dropped:
+            print(f"Registros descartados por cola llena: {queue_handler.dropped}")
+
+
+if __name__ == '__main__':
+    main()
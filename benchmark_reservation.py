@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+"""
+Benchmark de reservas de stock con contención sobre pocos productos.
+
+Varios hilos reservan carritos aleatorios sobre un conjunto pequeño de
+productos "calientes" y se comparan dos estrategias:
+
+- por línea: una lectura y un save() por producto, como cuando el cliente
+  llama a PATCH /products/{id}/stock/ por cada línea del carrito
+- atómica: reserve_stock(), usado por POST /products/reserve/
+
+Al final se verifica que el stock descontado coincida con lo vendido; la
+estrategia por línea puede perder actualizaciones y dejar carritos a medias.
+Usa la base de datos configurada en settings (PostgreSQL para resultados
+representativos) y borra los productos que crea.
+
+Uso:
+    python benchmark_reservation.py --threads 16 --carts 200 --hot 5
+"""
+import argparse
+import os
+import random
+import statistics
+import threading
+import time
+
+import django
+
+# Configurar Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'catalogo_backend.settings')
+django.setup()
+
+from django.db import DatabaseError, connection  # noqa: E402
+
+from categories.models import Category  # noqa: E402
+from products.models import Product  # noqa: E402
+from products.stock import StockReservationError, reserve_stock  # noqa: E402
+
+
+def reserve_per_line(lines):
+    """
+    Descuenta línea por línea sin transacción ni bloqueo.
+    """
+    for product_id, quantity in lines.items():
+        product = Product.objects.get(id=product_id)
+        if not product.reduce_stock(quantity):
+            return False
+    return True
+
+
+def reserve_atomic(lines):
+    try:
+        reserve_stock(lines)
+        return True
+    except StockReservationError:
+        return False
+
+
+def run(strategy, product_ids, threads, carts, items):
+    """
+    Ejecuta los carritos en paralelo y retorna las métricas.
+    """
+    latencies = []
+    outcomes = {'ok': 0, 'insufficient': 0, 'error': 0}
+    sold = {product_id: 0 for product_id in product_ids}
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        for _ in range(carts):
+            lines = {
+                product_id: rng.randint(1, 3)
+                for product_id in rng.sample(product_ids, items)
+            }
+            start = time.perf_counter()
+            try:
+                result = 'ok' if strategy(lines) else 'insufficient'
+            except DatabaseError:
+                result = 'error'
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                outcomes[result] += 1
+                if result == 'ok':
+                    for product_id, quantity in lines.items():
+                        sold[product_id] += quantity
+        connection.close()
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    total = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'total': total,
+        'throughput': len(latencies) / total,
+        'p50': statistics.median(latencies) * 1000,
+        'p99': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        'outcomes': outcomes,
+        'sold': sold,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de reservas de stock')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--carts', type=int, default=200, help='Carritos por hilo')
+    parser.add_argument('--hot', type=int, default=5, help='Productos con contención')
+    parser.add_argument('--items', type=int, default=3, help='Líneas por carrito')
+    parser.add_argument('--stock', type=int, default=100000)
+    args = parser.parse_args()
+
+    category = Category.objects.create(name=f'Benchmark reservas {time.time_ns()}')
+    try:
+        print(f'{args.threads} hilos x {args.carts} carritos de {args.items} líneas '
+              f'sobre {args.hot} productos ({connection.vendor})')
+        print(f"{'Estrategia':<12}{'carritos/s':>12}{'p50 ms':>10}{'p99 ms':>10}"
+              f"{'ok':>8}{'sin stock':>11}{'errores':>9}{'descuadre':>11}")
+        for name, strategy in (('por línea', reserve_per_line), ('atómica', reserve_atomic)):
+            products = [
+                Product.objects.create(
+                    name=f'Hot {i}', description='benchmark', price=1000,
+                    category=category, stock=args.stock
+                )
+                for i in range(args.hot)
+            ]
+            product_ids = [product.id for product in products]
+            result = run(strategy, product_ids, args.threads, args.carts, args.items)
+
+            # Unidades vendidas que no se descontaron (actualizaciones perdidas)
+            final = dict(Product.objects.filter(id__in=product_ids).values_list('id', 'stock'))
+            mismatch = sum(
+                abs(args.stock - result['sold'][product_id] - final[product_id])
+                for product_id in product_ids
+            )
+            outcomes = result['outcomes']
+            print(f"{name:<12}{result['throughput']:>12.0f}{result['p50']:>10.2f}{result['p99']:>10.2f}"
+                  f"{outcomes['ok']:>8}{outcomes['insufficient']:>11}{outcomes['error']:>9}{mismatch:>11}")
+    finally:
+        Product.objects.filter(category=category).delete()
+        category.delete()
+
+
+if __name__ == '__main__':
+    main()
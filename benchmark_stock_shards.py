@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""
+Benchmark de descuentos de stock concurrentes sobre un solo producto.
+
+Varios hilos descuentan una unidad a la vez del mismo producto y se comparan:
+
+- una fila con Product.reduce_stock() (lectura y save(), sin bloqueo)
+- una fila con UPDATE condicional (todas las escrituras esperan el mismo
+  bloqueo de fila)
+- stock fraccionado en N filas StockShard con Product.reduce_stock()
+
+Al final se verifica que el stock restante coincida con las unidades
+vendidas. Usa la base de datos configurada en settings
+(PostgreSQL para resultados representativos) y borra lo que crea.
+
+Uso:
+    python benchmark_stock_shards.py --threads 32 --operations 200 --shards 8
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+
+import django
+
+# Configurar Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'catalogo_backend.settings')
+django.setup()
+
+from django.db import DatabaseError, connection  # noqa: E402
+from django.db.models import F  # noqa: E402
+
+from categories.models import Category  # noqa: E402
+from products.models import Product  # noqa: E402
+from products.shards import enable_sharding  # noqa: E402
+
+
+def reduce_conditional(product):
+    """
+    Descuenta con un UPDATE condicional sobre la fila del producto.
+    """
+    return bool(
+        Product.objects.filter(pk=product.pk, stock__gte=1).update(stock=F('stock') - 1)
+    )
+
+
+def reduce_method(product):
+    """
+    Descuenta con Product.reduce_stock(), releyendo antes la fila.
+    """
+    if not product.stock_shards:
+        product.refresh_from_db(fields=['stock'])
+    return product.reduce_stock(1)
+
+
+def run(strategy, product_id, threads, operations):
+    """
+    Ejecuta los descuentos en paralelo y retorna las métricas.
+    """
+    latencies = []
+    outcomes = {'ok': 0, 'insufficient': 0, 'error': 0}
+    lock = threading.Lock()
+
+    def worker():
+        product = Product.objects.get(id=product_id)
+        for _ in range(operations):
+            start = time.perf_counter()
+            try:
+                result = 'ok' if strategy(product) else 'insufficient'
+            except DatabaseError:
+                result = 'error'
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                outcomes[result] += 1
+        connection.close()
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    total = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'throughput': len(latencies) / total,
+        'p50': statistics.median(latencies) * 1000,
+        'p99': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        'outcomes': outcomes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de stock fraccionado')
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--operations', type=int, default=200, help='Descuentos por hilo')
+    parser.add_argument('--shards', type=int, default=8)
+    parser.add_argument('--stock', type=int, default=1000000)
+    args = parser.parse_args()
+
+    category = Category.objects.create(name=f'Benchmark fracciones {time.time_ns()}')
+    try:
+        print(f'{args.threads} hilos x {args.operations} descuentos sobre un producto '
+              f'({connection.vendor})')
+        print(f"{'Diseño':<26}{'ops/s':>10}{'p50 ms':>10}{'p99 ms':>10}"
+              f"{'ok':>8}{'errores':>9}{'descuadre':>11}")
+        designs = (
+            ('una fila, reduce_stock', reduce_method, 0),
+            ('una fila, UPDATE cond.', reduce_conditional, 0),
+            (f'{args.shards} fracciones', reduce_method, args.shards),
+        )
+        for name, strategy, shards in designs:
+            product = Product.objects.create(
+                name='Hot', description='benchmark', price=1000,
+                category=category, stock=args.stock
+            )
+            if shards:
+                enable_sharding(product.id, shards)
+            result = run(strategy, product.id, args.threads, args.operations)
+
+            product = Product.objects.get(id=product.id)
+            outcomes = result['outcomes']
+            mismatch = abs(args.stock - outcomes['ok'] - product.get_total_stock())
+            print(f"{name:<26}{result['throughput']:>10.0f}{result['p50']:>10.2f}{result['p99']:>10.2f}"
+                  f"{outcomes['ok']:>8}{outcomes['error']:>9}{mismatch:>11}")
+    finally:
+        Product.objects.filter(category=category).delete()
+        category.delete()
+
+
+if __name__ == '__main__':
+    main()
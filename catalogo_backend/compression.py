@@ -0,0 +1,155 @@
+"""
+Compresión gzip y brotli de las respuestas de la API.
+
+La codificación se elige según la cabecera ``Accept-Encoding`` del
+cliente. Brotli es opcional: si el paquete ``brotli`` no está instalado
+solo se usa gzip.
+
+Las representaciones comprimidas de respuestas grandes se guardan en la
+caché indexadas por el hash del contenido y la codificación, así que una
+respuesta repetida se comprime una sola vez.
+"""
+import hashlib
+import re
+import zlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .metrics import record_cache_lookup
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+
+# Tipos de contenido que vale la pena comprimir
+COMPRESSIBLE_TYPES = re.compile(
+    r'^(text/|application/(json|javascript|xml|.*\+json|.*\+xml)|'
+    r'application/vnd\.openxmlformats|image/svg\+xml)'
+)
+
+_ENCODING_RE = re.compile(r'\s*([a-z*]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?', re.IGNORECASE)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def available_encodings():
+    """
+    Codificaciones soportadas en orden de preferencia del servidor.
+    """
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def choose_encoding(accept_encoding):
+    """
+    Elige la codificación a partir de la cabecera Accept-Encoding.
+
+    Returns:
+        str o None: 'br', 'gzip' o None si el cliente no acepta ninguna
+    """
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(','):
+        match = _ENCODING_RE.match(part)
+        if not match:
+            continue
+        try:
+            quality = float(match.group(2)) if match.group(2) else 1.0
+        except ValueError:
+            continue
+        accepted[match.group(1).lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in available_encodings():
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class Compressor:
+    """
+    Compresor incremental con la misma interfaz para gzip y brotli.
+    """
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(
+                quality=_setting('COMPRESSION_BROTLI_QUALITY', 4)
+            )
+        else:
+            # wbits 16 + MAX_WBITS produce el formato gzip con cabecera
+            self._compressor = zlib.compressobj(
+                _setting('COMPRESSION_GZIP_LEVEL', 6),
+                zlib.DEFLATED,
+                16 + zlib.MAX_WBITS,
+            )
+
+    def compress(self, data):
+        if self.encoding == 'br':
+            return self._compressor.process(data)
+        return self._compressor.compress(data)
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+def compress_bytes(data, encoding):
+    """
+    Comprime un cuerpo completo.
+    """
+    compressor = Compressor(encoding)
+    return compressor.compress(data) + compressor.finish()
+
+
+def cached_compress(data, encoding):
+    """
+    Comprime un cuerpo completo reutilizando la versión guardada en caché.
+
+    Solo se cachean cuerpos de al menos ``COMPRESSION_CACHE_MIN_LENGTH``
+    bytes; para los pequeños comprimir es más barato que ir a la caché.
+    """
+    if len(data) < _setting('COMPRESSION_CACHE_MIN_LENGTH', 16384):
+        return compress_bytes(data, encoding)
+
+    cache = caches[_setting('COMPRESSION_CACHE_ALIAS', 'default')]
+    digest = hashlib.blake2b(data, digest_size=20).hexdigest()
+    key = f'compressed:{encoding}:{digest}'
+    compressed = cache.get(key)
+    record_cache_lookup('compression', compressed is not None)
+    if compressed is None:
+        compressed = compress_bytes(data, encoding)
+        cache.set(key, compressed, _setting('COMPRESSION_CACHE_TIMEOUT', 300))
+    return compressed
+
+
+def compress_stream(chunks, encoding):
+    """
+    Comprime un iterador de bloques sin cargarlo completo en memoria.
+    """
+    compressor = Compressor(encoding)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def acompress_stream(chunks, encoding):
+    """
+    Versión asíncrona de compress_stream.
+    """
+    compressor = Compressor(encoding)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
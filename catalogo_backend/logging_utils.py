@@ -0,0 +1,219 @@
+"""
+Utilidades de logging estructurado y no bloqueante.
+
+Los registros se encolan en el hilo de la petición y un ``QueueListener``
+en segundo plano los serializa como JSON y los escribe en un archivo con
+rotación, de modo que el worker nunca espera al disco.
+
+El hilo del listener no sobrevive a un ``fork``. Antes de crear procesos
+hijos, ``share_with_children()`` abre en cada handler una cola entre
+procesos: los hijos envían por ella sus registros y el padre los escribe
+en el mismo archivo, así que un solo proceso lo escribe y lo rota. Un hijo
+creado sin compartir la cola arranca su propio listener.
+"""
+import atexit
+import json
+import logging
+import multiprocessing
+import multiprocessing.util
+import os
+import queue
+import weakref
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+
+# ID de la petición en curso, asignado por RequestIDMiddleware
+request_id_var = ContextVar('request_id', default='-')
+
+# Atributos propios de LogRecord que no se copian como campos extra
+_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'request_id'}
+
+
+class RequestIDFilter(logging.Filter):
+    """
+    Agrega el ID de la petición en curso a cada registro.
+
+    Debe ejecutarse en el hilo que genera el registro, antes de encolarlo,
+    porque el contexto de la petición no existe en el hilo del listener.
+    """
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formatea cada registro como un objeto JSON en una sola línea.
+    """
+
+    def format(self, record):
+        data = {
+            'timestamp': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', '-'),
+            'module': record.module,
+            'line': record.lineno,
+            'process': record.process,
+        }
+        # Campos pasados con extra={...}
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exception'] = record.exc_text
+        if record.stack_info:
+            data['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class _BlockingStopListener(QueueListener):
+    """
+    QueueListener que espera espacio en la cola para el centinela de parada,
+    de modo que ``stop()`` siempre vacía los registros pendientes.
+    """
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class QueueRotatingFileHandler(QueueHandler):
+    """
+    Handler que encola los registros y los escribe desde un hilo aparte
+    en un ``RotatingFileHandler``.
+
+    Se configura desde ``settings.LOGGING`` como cualquier otro handler;
+    el formatter asignado se aplica al archivo, no a la cola, para que la
+    serialización JSON también ocurra fuera del hilo de la petición.
+
+    Si la cola se llena, los registros se descartan en lugar de bloquear
+    la petición y se cuentan en ``dropped``.
+
+    Ver ``share_with_children()`` para procesos creados con ``fork``.
+    """
+
+    def __init__(self, filename, max_bytes=10 * 1024 * 1024, backup_count=5,
+                 queue_size=10000, encoding='utf-8'):
+        os.makedirs(os.path.dirname(os.fspath(filename)), exist_ok=True)
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.queue_size = queue_size
+        self.dropped = 0
+        self.file_handler = RotatingFileHandler(
+            filename,
+            maxBytes=max_bytes,
+            backupCount=backup_count,
+            encoding=encoding,
+            delay=True,
+        )
+        self.listener = _BlockingStopListener(self.queue, self.file_handler)
+        self.listener.start()
+        self._listening = True
+        self.shared_queue = None
+        self.shared_listener = None
+        _handlers.add(self)
+        atexit.register(self.close)
+        # Los hijos de multiprocessing terminan sin ejecutar atexit
+        multiprocessing.util.register_after_fork(self, QueueRotatingFileHandler._close_on_exit)
+
+    def setFormatter(self, fmt):
+        """
+        Asigna el formatter al handler de archivo.
+        """
+        self.file_handler.setFormatter(fmt)
+
+    def prepare(self, record):
+        """
+        Prepara el registro para la cola sin formatearlo.
+
+        Solo resuelve el mensaje y la excepción, que pueden contener
+        objetos no seguros entre hilos.
+        """
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def share(self):
+        """
+        Abre la cola por la que los procesos hijos creados después con
+        ``fork`` envían sus registros a este proceso.
+        """
+        if self.shared_queue is None:
+            self.shared_queue = multiprocessing.Queue(maxsize=self.queue_size)
+            self.shared_listener = _BlockingStopListener(self.shared_queue, self.file_handler)
+            self.shared_listener.start()
+
+    def _after_fork_in_child(self):
+        """
+        Reemplaza en el proceso hijo el listener, que no se hereda.
+
+        La cola del padre tampoco se reutiliza: puede tener sus registros
+        pendientes o haber quedado bloqueada por el hilo del listener.
+        """
+        if self.shared_queue is not None:
+            # El padre escribe y rota el archivo; el hijo solo le envía los registros
+            self.queue = self.shared_queue
+            self.shared_queue = None
+            self.shared_listener = None
+            self._listening = False
+        else:
+            self.queue = queue.Queue(maxsize=self.queue_size)
+            self.listener = _BlockingStopListener(self.queue, self.file_handler)
+            self.listener.start()
+            self._listening = True
+
+    def _close_on_exit(self):
+        multiprocessing.util.Finalize(self, self.close, exitpriority=10)
+
+    def close(self):
+        """
+        Detiene los listeners vaciando las colas antes de cerrar el archivo.
+        """
+        _handlers.discard(self)
+        if self._listening:
+            self._listening = False
+            self.listener.stop()
+        if self.shared_listener is not None:
+            self.shared_listener.stop()
+            self.shared_listener = None
+        self.file_handler.close()
+        super().close()
+
+
+# Handlers abiertos en este proceso
+_handlers = weakref.WeakSet()
+
+
+def share_with_children():
+    """
+    Hace que los procesos hijos creados después con ``fork`` escriban sus
+    registros a través de este proceso.
+
+    Sin esto, cada hijo escribe el mismo archivo con su propio listener y
+    las rotaciones de un proceso pisan las de los demás.
+    """
+    for handler in list(_handlers):
+        handler.share()
+
+
+def _after_fork_in_child():
+    for handler in list(_handlers):
+        handler._after_fork_in_child()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
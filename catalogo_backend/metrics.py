@@ -0,0 +1,134 @@
+"""
+Métricas de ejecución del proyecto en formato Prometheus.
+
+Define los contadores e histogramas compartidos por el middleware y las
+vistas. Cuando la variable de entorno ``PROMETHEUS_MULTIPROC_DIR`` está
+definida, ``prometheus_client`` escribe los valores de cada proceso en ese
+directorio y el endpoint ``/metrics`` los agrega sin depender de la red.
+"""
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+
+
+# Latencia de las peticiones HTTP por nombre de URL y código de estado
+REQUEST_LATENCY = Histogram(
+    'catalogo_http_request_duration_seconds',
+    'Latencia de las peticiones HTTP',
+    ['view', 'method', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+# Consultas ejecutadas contra la base de datos
+DB_QUERIES = Counter(
+    'catalogo_db_queries_total',
+    'Consultas SQL ejecutadas',
+    ['alias', 'operation'],
+)
+
+# Accesos a caché, para calcular la proporción de aciertos
+CACHE_LOOKUPS = Counter(
+    'catalogo_cache_lookups_total',
+    'Búsquedas en caché por resultado',
+    ['cache', 'result'],
+)
+
+# Operaciones de stock
+STOCK_OPERATIONS = Counter(
+    'catalogo_stock_operations_total',
+    'Operaciones de actualización de stock',
+    ['operation', 'result'],
+)
+
+# Tareas de la cola en base de datos: espera desde run_at y duración de la ejecución
+TASK_LATENCY = Histogram(
+    'catalogo_task_queue_latency_seconds',
+    'Espera de las tareas desde que pueden ejecutarse hasta que un worker las toma',
+    ['task'],
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0),
+)
+
+TASK_DURATION = Histogram(
+    'catalogo_task_duration_seconds',
+    'Duración de la ejecución de las tareas por resultado',
+    ['task', 'result'],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0),
+)
+
+
+def is_multiprocess():
+    """
+    Indica si las métricas se agregan entre procesos mediante un directorio.
+    """
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+
+def record_cache_lookup(cache_name, hit):
+    """
+    Registra un acierto o fallo de caché.
+
+    Args:
+        cache_name: Nombre lógico de la caché consultada
+        hit: True si el valor estaba en caché
+    """
+    CACHE_LOOKUPS.labels(cache=cache_name, result='hit' if hit else 'miss').inc()
+
+
+def record_stock_operation(operation, result):
+    """
+    Registra una operación de stock.
+
+    Args:
+        operation: Tipo de operación (add, reduce, set)
+        result: Resultado de la operación (ok, insufficient, ...)
+    """
+    STOCK_OPERATIONS.labels(operation=operation, result=result).inc()
+
+
+def record_task(name, latency, duration, result):
+    """
+    Registra la ejecución de una tarea de la cola.
+
+    Args:
+        name: Nombre de la tarea
+        latency: Segundos de espera desde run_at hasta el inicio
+        duration: Segundos de ejecución
+        result: done, retry o failed
+    """
+    TASK_LATENCY.labels(task=name).observe(max(latency, 0))
+    TASK_DURATION.labels(task=name, result=result).observe(duration)
+
+
+def query_counter(alias):
+    """
+    Retorna un wrapper para ``connection.execute_wrapper`` que cuenta
+    las consultas ejecutadas sobre la conexión indicada.
+    """
+    def wrapper(execute, sql, params, many, context):
+        operation = sql.lstrip().split(' ', 1)[0].upper() if sql else 'UNKNOWN'
+        DB_QUERIES.labels(alias=alias, operation=operation).inc()
+        return execute(sql, params, many, context)
+    return wrapper
+
+
+def render_latest():
+    """
+    Genera la exposición de métricas en formato de texto de Prometheus.
+
+    Returns:
+        tuple: (contenido en bytes, content type)
+    """
+    if is_multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,131 @@
+"""
+Middleware propio del proyecto de catálogo.
+"""
+import re
+import time
+import uuid
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+from . import compression, metrics
+from .logging_utils import request_id_var
+
+
+# IDs de petición aceptados desde el cliente o un proxy
+_REQUEST_ID_RE = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+class RequestIDMiddleware:
+    """
+    Asigna un ID a cada petición para correlacionar sus registros de log.
+
+    Reutiliza la cabecera ``X-Request-ID`` si el proxy la envía y es válida;
+    en caso contrario genera una nueva. El ID se devuelve en la respuesta.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_id = request.headers.get('X-Request-ID', '')
+        if not _REQUEST_ID_RE.match(request_id):
+            request_id = uuid.uuid4().hex
+        request.request_id = request_id
+
+        token = request_id_var.set(request_id)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_id_var.reset(token)
+        response['X-Request-ID'] = request_id
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Registra la latencia de cada petición y las consultas SQL que ejecuta.
+
+    La latencia se etiqueta con el nombre de la URL resuelta (por ejemplo
+    ``products:product-detail``) para que las rutas con parámetros no
+    generen una serie distinta por cada ID.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(metrics.query_counter(alias))
+                )
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match and match.view_name else '<unresolved>'
+        metrics.REQUEST_LATENCY.labels(
+            view=view_name,
+            method=request.method,
+            status=str(response.status_code),
+        ).observe(elapsed)
+        return response
+
+
+class CompressionMiddleware:
+    """
+    Comprime las respuestas con brotli o gzip según Accept-Encoding.
+
+    Las respuestas completas se comprimen con ``cached_compress`` para
+    reutilizar la versión comprimida de cuerpos repetidos; las respuestas
+    streaming (exportaciones) se comprimen por bloques. Los streams de
+    eventos no se comprimen para no retrasar la entrega de cada evento.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_length = getattr(settings, 'COMPRESSION_MIN_LENGTH', 500)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        # Las descargas por rangos deben conservar los bytes del archivo original
+        if response.has_header('Content-Encoding') or response.has_header('Accept-Ranges'):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip()
+        if content_type == 'text/event-stream' or not compression.COMPRESSIBLE_TYPES.match(content_type):
+            return response
+        if not response.streaming and len(response.content) < self.min_length:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = compression.choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compression.acompress_stream(
+                    response.streaming_content, encoding
+                )
+            else:
+                response.streaming_content = compression.compress_stream(
+                    response.streaming_content, encoding
+                )
+            del response.headers['Content-Length']
+        else:
+            compressed = compression.cached_compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
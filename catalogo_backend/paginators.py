@@ -0,0 +1,48 @@
+"""
+Paginadores compartidos por el admin y la API.
+"""
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginador que evita ``COUNT(*)`` sobre tablas grandes.
+
+    Cuando el queryset no tiene filtros y la base de datos es PostgreSQL,
+    usa la estimación de filas de ``pg_class.reltuples`` que mantiene
+    ANALYZE. Con filtros, en otros motores o en tablas pequeñas (donde la
+    estimación es poco fiable) hace el conteo exacto.
+    """
+
+    # Por debajo de este número de filas el conteo exacto es barato
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        estimate = self._estimated_count()
+        if estimate is not None and estimate >= self.exact_count_threshold:
+            return estimate
+        return super().count
+
+    def _estimated_count(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is None or query.where or query.distinct:
+            return None
+
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        # reltuples vale -1 si la tabla nunca se ha analizado
+        if not row or row[0] < 0:
+            return None
+        return int(row[0])
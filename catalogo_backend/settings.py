@@ -52,6 +52,9 @@ INSTALLED_APPS = [
 # Middleware de Django
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # IMPORTANTE: Debe ir al principio
+    'catalogo_backend.middleware.RequestIDMiddleware',
+    'catalogo_backend.middleware.MetricsMiddleware',
+    'catalogo_backend.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -156,15 +159,109 @@ SPECTACULAR_SETTINGS = {
     'SERVE_INCLUDE_SCHEMA': False,
 }
 
+# Configuración de caché
+# Por defecto en memoria del proceso; en producción usa por ejemplo
+# CACHE_URL=filecache:///var/tmp/catalogo_cache o una caché compartida.
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# Compresión de respuestas (gzip y brotli)
+COMPRESSION_MIN_LENGTH = env.int('COMPRESSION_MIN_LENGTH', default=500)
+COMPRESSION_GZIP_LEVEL = env.int('COMPRESSION_GZIP_LEVEL', default=6)
+COMPRESSION_BROTLI_QUALITY = env.int('COMPRESSION_BROTLI_QUALITY', default=4)
+# Los cuerpos a partir de este tamaño se guardan comprimidos en la caché
+COMPRESSION_CACHE_MIN_LENGTH = env.int('COMPRESSION_CACHE_MIN_LENGTH', default=16384)
+COMPRESSION_CACHE_TIMEOUT = env.int('COMPRESSION_CACHE_TIMEOUT', default=300)
+
+# Disponibilidad de stock (/products/availability/)
+# Segundos que se guarda en caché el stock disponible de cada producto y
+# duración de las reservas temporales (StockHold).
+AVAILABILITY_CACHE_TIMEOUT = env.int('AVAILABILITY_CACHE_TIMEOUT', default=5)
+AVAILABILITY_HOLD_TIMEOUT = env.int('AVAILABILITY_HOLD_TIMEOUT', default=300)
+
+# Stock fraccionado: número de fracciones por producto al activarlo desde
+# el admin. Más fracciones reparten más la contención de escritura.
+STOCK_SHARDS = env.int('STOCK_SHARDS', default=8)
+
+# Libro de movimientos de stock: segundos entre una escritura y el pliegue
+# encolado que la lleva a Product.stock; las escrituras de ese intervalo
+# comparten el mismo pliegue.
+STOCK_LEDGER_FOLD_DELAY = env.int('STOCK_LEDGER_FOLD_DELAY', default=5)
+
+# Instantáneas estáticas del catálogo (manage.py build_catalog_snapshot)
+# Carpeta de salida servida por nginx, páginas de /products/ a generar y URL
+# pública usada en los enlaces next/previous de las páginas.
+CATALOG_SNAPSHOT_DIR = env('CATALOG_SNAPSHOT_DIR', default=str(STATIC_ROOT / 'catalog'))
+CATALOG_SNAPSHOT_PAGES = env.int('CATALOG_SNAPSHOT_PAGES', default=5)
+CATALOG_SNAPSHOT_BASE_URL = env('CATALOG_SNAPSHOT_BASE_URL', default='http://localhost:8000')
+
+# Instantánea en columnas de los productos activos (manage.py build_catalog_columns)
+# Carpeta de las generaciones y antigüedad máxima en segundos; una
+# instantánea más antigua se ignora y /products/ vuelve a filtrar con SQL.
+CATALOG_COLUMNS_DIR = env('CATALOG_COLUMNS_DIR', default=str(BASE_DIR / 'var' / 'catalog_columns'))
+CATALOG_COLUMNS_MAX_AGE = env.int('CATALOG_COLUMNS_MAX_AGE', default=300)
+
+# Analítica de /products/analytics/
+# Segundos máximos en caché; los cambios de productos la invalidan antes.
+ANALYTICS_CACHE_TIMEOUT = env.int('ANALYTICS_CACHE_TIMEOUT', default=60)
+
+# Estadísticas de /products/stats/
+# Antigüedad en segundos a partir de la cual una petición encola su recálculo
+# en run_worker, y tiempo máximo en caché del último resultado.
+PRODUCT_STATS_REFRESH = env.int('PRODUCT_STATS_REFRESH', default=30)
+PRODUCT_STATS_CACHE_TIMEOUT = env.int('PRODUCT_STATS_CACHE_TIMEOUT', default=3600)
+
+# Cola de tareas en base de datos (manage.py run_worker)
+# Segundos que un worker tiene una tarea antes de que vuelva a la cola, salvo
+# que la tarea indique otro plazo.
+TASK_DEFAULT_LEASE = env.int('TASK_DEFAULT_LEASE', default=300)
+
+# Sincronización incremental (/products/changes/)
+# Segundos recientes que se dejan para la siguiente sincronización, para no
+# saltar filas de transacciones que confirman tarde.
+DELTA_SYNC_SAFETY_WINDOW = env.int('DELTA_SYNC_SAFETY_WINDOW', default=5)
+
+# Eventos de productos para /products/stream/
+# Con varios workers ASGI, cada proceso abre un socket Unix en este directorio
+# para recibir los cambios publicados por los demás.
+PRODUCT_EVENTS_SOCKET_DIR = env('PRODUCT_EVENTS_SOCKET_DIR', default='')
+
+# Configuración de métricas Prometheus
+# Con varios workers, define PROMETHEUS_MULTIPROC_DIR para que cada proceso
+# escriba sus métricas en un directorio compartido y /metrics las agregue.
+PROMETHEUS_MULTIPROC_DIR = env('PROMETHEUS_MULTIPROC_DIR', default='')
+if PROMETHEUS_MULTIPROC_DIR:
+    os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', PROMETHEUS_MULTIPROC_DIR)
+
 # Configuración de logging
+# Los registros se encolan y un hilo en segundo plano los escribe como JSON
+# en un archivo con rotación, sin bloquear el worker.
+LOG_LEVEL = env('LOG_LEVEL', default='INFO')
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'filters': {
+        'request_id': {
+            '()': 'catalogo_backend.logging_utils.RequestIDFilter',
+        },
+    },
+    'formatters': {
+        'json': {
+            '()': 'catalogo_backend.logging_utils.JSONFormatter',
+        },
+    },
     'handlers': {
         'file': {
-            'level': 'INFO',
-            'class': 'logging.FileHandler',
+            'level': LOG_LEVEL,
+            'class': 'catalogo_backend.logging_utils.QueueRotatingFileHandler',
             'filename': BASE_DIR / 'logs' / 'django.log',
+            'max_bytes': env.int('LOG_MAX_BYTES', default=10 * 1024 * 1024),
+            'backup_count': env.int('LOG_BACKUP_COUNT', default=5),
+            'queue_size': env.int('LOG_QUEUE_SIZE', default=10000),
+            'formatter': 'json',
+            'filters': ['request_id'],
         },
     },
     'loggers': {
@@ -173,6 +270,21 @@ LOGGING = {
             'level': 'INFO',
             'propagate': True,
         },
+        'catalogo_backend': {
+            'handlers': ['file'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+        'products': {
+            'handlers': ['file'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+        'categories': {
+            'handlers': ['file'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
     },
 }
 
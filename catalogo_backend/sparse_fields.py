@@ -0,0 +1,117 @@
+"""
+Soporte para respuestas con campos parciales (``?fields=`` y ``?exclude=``).
+
+El cliente elige los campos que necesita, el serializador descarta el
+resto y el queryset se reduce con ``only()`` a las columnas que esos
+campos leen, agregando ``select_related`` o ``prefetch_related`` solo para
+las relaciones pedidas.
+"""
+from django.core.exceptions import FieldDoesNotExist
+
+
+def _parse(value):
+    return {name.strip() for name in value.split(',') if name.strip()} if value else None
+
+
+def requested_fields(request):
+    """
+    Retorna (fields, exclude) pedidos en la petición, o None si no se indicaron.
+    """
+    if request is None:
+        return None, None
+    params = getattr(request, 'query_params', request.GET)
+    return _parse(params.get('fields')), _parse(params.get('exclude'))
+
+
+def select_field_names(available, fields=None, exclude=None):
+    """
+    Calcula los nombres de campo a conservar.
+
+    Los nombres desconocidos se ignoran; si ``fields`` no contiene ningún
+    campo válido se conservan todos.
+    """
+    names = list(available)
+    if fields:
+        selected = [name for name in names if name in fields]
+        names = selected or names
+    if exclude:
+        names = [name for name in names if name not in exclude]
+    return names
+
+
+class SparseFieldsetMixin:
+    """
+    Mixin de serializador que conserva solo los campos pedidos.
+
+    Los campos se toman de los argumentos ``fields`` / ``exclude`` o, si no
+    se pasan, de los parámetros de la petición en el contexto.
+
+    Atributos:
+        field_dependencies: Columnas del modelo que lee cada campo calculado
+            (por ejemplo ``{'price_display': ['price']}``)
+    """
+
+    field_dependencies = {}
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        exclude = kwargs.pop('exclude', None)
+        super().__init__(*args, **kwargs)
+        if fields is None and exclude is None:
+            fields, exclude = requested_fields(self.context.get('request'))
+        if fields or exclude:
+            keep = set(select_field_names(self.fields.keys(), fields, exclude))
+            for name in list(self.fields):
+                if name not in keep:
+                    self.fields.pop(name)
+
+
+def prune_queryset(queryset, serializer, extra_fields=()):
+    """
+    Reduce el queryset a las columnas y relaciones que usa el serializador.
+
+    Args:
+        queryset: Queryset a reducir
+        serializer: Instancia del serializador ya recortado
+        extra_fields: Columnas que la vista necesita aunque no se serialicen
+
+    Returns:
+        QuerySet: Queryset con only(), select_related y prefetch_related
+    """
+    if hasattr(serializer, 'child'):
+        serializer = serializer.child
+
+    opts = queryset.model._meta
+    only = {opts.pk.name, *extra_fields}
+    select = set()
+    prefetch = set()
+    dependencies = getattr(serializer, 'field_dependencies', {})
+
+    for name, field in serializer.fields.items():
+        if name in dependencies:
+            only.update(dependencies[name])
+            continue
+        source = getattr(field, 'source', name)
+        if source == '*' or not source:
+            continue
+        parts = source.split('.')
+        try:
+            model_field = opts.get_field(parts[0])
+        except FieldDoesNotExist:
+            # Atributo o método del modelo sin columna propia
+            continue
+        if model_field.one_to_many or model_field.many_to_many:
+            prefetch.add(parts[0])
+        elif model_field.is_relation and len(parts) > 1:
+            select.add(parts[0])
+            only.add(parts[0])
+            only.add('__'.join(parts))
+        else:
+            only.add(model_field.name)
+
+    queryset = queryset.select_related(None).prefetch_related(None)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset.only(*only)
@@ -0,0 +1,86 @@
+"""
+Pruebas del handler de logging con cola y procesos hijos.
+"""
+import json
+import logging
+import multiprocessing
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from catalogo_backend.logging_utils import JSONFormatter, QueueRotatingFileHandler
+
+
+def _log_in_child(name, count):
+    logger = logging.getLogger(name)
+    for number in range(count):
+        logger.error('Error en el hijo %s', number)
+
+
+class QueueRotatingFileHandlerForkTests(SimpleTestCase):
+    """
+    Los registros de los procesos hijos llegan al archivo.
+    """
+
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.logger = logging.getLogger(f'tests.fork.{self._testMethodName}')
+        self.logger.propagate = False
+
+    def make_handler(self, **options):
+        handler = QueueRotatingFileHandler(self.directory / 'app.log', **options)
+        handler.setFormatter(JSONFormatter())
+        self.logger.addHandler(handler)
+        self.addCleanup(self.logger.removeHandler, handler)
+        return handler
+
+    def run_children(self, processes=2, count=3):
+        context = multiprocessing.get_context('fork')
+        children = [
+            context.Process(target=_log_in_child, args=(self.logger.name, count))
+            for _ in range(processes)
+        ]
+        for child in children:
+            child.start()
+        for child in children:
+            child.join()
+            self.assertEqual(child.exitcode, 0)
+
+    def lines(self):
+        return [
+            json.loads(line)
+            for path in sorted(self.directory.iterdir())
+            for line in path.read_text(encoding='utf-8').splitlines()
+        ]
+
+    def test_children_write_through_the_parent(self):
+        handler = self.make_handler()
+        handler.share()
+
+        self.run_children()
+        handler.close()
+
+        lines = self.lines()
+        self.assertEqual(len(lines), 6)
+        self.assertEqual(len({line['process'] for line in lines}), 2)
+
+    def test_shared_file_rotates_in_a_single_process(self):
+        handler = self.make_handler(max_bytes=1000, backup_count=20)
+        handler.share()
+
+        self.run_children(processes=3, count=20)
+        handler.close()
+
+        self.assertGreater(len(list(self.directory.iterdir())), 1)
+        self.assertEqual(len(self.lines()), 60)
+
+    def test_children_without_shared_queue_start_their_own_listener(self):
+        handler = self.make_handler()
+
+        self.run_children()
+        handler.close()
+
+        self.assertEqual(len(self.lines()), 6)
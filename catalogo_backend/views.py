@@ -0,0 +1,18 @@
+"""
+Vistas a nivel de proyecto que no pertenecen a ninguna aplicación.
+"""
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+
+from . import metrics
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Expone las métricas de ejecución en formato de texto de Prometheus.
+
+    GET /metrics
+    """
+    content, content_type = metrics.render_latest()
+    return HttpResponse(content, content_type=content_type)
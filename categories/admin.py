@@ -53,12 +53,64 @@ class CategoryAdmin(admin.ModelAdmin):
         ('Estado', {
             'fields': ('is_active',)
         }),
+        ('Inventario', {
+            'fields': ('reorder_threshold',)
+        }),
         ('Fechas', {
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
         }),
     )
 
+    # Acciones personalizadas
+    actions = [
+        'deactivate_categories',
+        'restore_categories',
+    ]
+
+    def save_model(self, request, obj, form, change):
+        """
+        Los cambios de is_active se aplican en cascada a los productos.
+        """
+        if not (change and 'is_active' in form.changed_data):
+            super().save_model(request, obj, form, change)
+            return
+        is_active = obj.is_active
+        obj.is_active = not is_active
+        super().save_model(request, obj, form, change)
+        if is_active:
+            obj.restore()
+        else:
+            obj.soft_delete()
+
+    def deactivate_categories(self, request, queryset):
+        """
+        Desactiva las categorías seleccionadas y sus productos.
+        """
+        products = 0
+        categories = list(queryset.filter(is_active=True))
+        for category in categories:
+            products += category.soft_delete().products_count
+        self.message_user(
+            request,
+            f'{len(categories)} categorías y {products} productos desactivados.'
+        )
+    deactivate_categories.short_description = 'Desactivar categorías y sus productos'
+
+    def restore_categories(self, request, queryset):
+        """
+        Restaura las categorías seleccionadas y los productos que desactivó su eliminación.
+        """
+        products = 0
+        categories = list(queryset.filter(is_active=False))
+        for category in categories:
+            products += category.restore() or 0
+        self.message_user(
+            request,
+            f'{len(categories)} categorías y {products} productos restaurados.'
+        )
+    restore_categories.short_description = 'Restaurar categorías y sus productos'
+
     def get_products_count(self, obj):
         """
         Muestra el número de productos en la categoría.
@@ -0,0 +1,104 @@
+"""
+Desactivación y restauración en cascada de categorías.
+
+Cada nivel se actualiza con una sola sentencia UPDATE: primero la
+categoría y después todos sus productos activos. Los productos apagados
+quedan marcados con el registro CategoryDeactivation de la operación, así
+que la restauración reactiva exactamente esos productos y respeta los que
+ya estaban inactivos.
+
+El caché de disponibilidad y los eventos de cambio se emiten una sola vez
+por operación, con todos los productos afectados.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from products.availability import invalidate_stock, total_stock
+from products.events import product_event, publish_many_on_commit
+from products.models import Product
+from .models import Category, CategoryDeactivation
+
+
+def _affected_products(deactivation_id):
+    """
+    Retorna (id, category_id, stock total, precio) de los productos de la operación.
+    """
+    return list(
+        Product.objects.filter(deactivated_by_id=deactivation_id)
+        .annotate(total=total_stock())
+        .values_list('id', 'category_id', 'total', 'price')
+    )
+
+
+def _publish_products(rows, is_active, now):
+    """
+    Invalida el caché y publica los eventos de todos los productos a la vez.
+    """
+    invalidate_stock([row[0] for row in rows])
+    publish_many_on_commit(
+        product_event(product_id, category_id, total, price, is_active, now)
+        for product_id, category_id, total, price in rows
+    )
+
+
+def deactivate_category(category):
+    """
+    Desactiva la categoría y sus productos activos.
+
+    Args:
+        category: Categoría a desactivar
+
+    Returns:
+        CategoryDeactivation: Registro de la operación, o None si la
+            categoría ya estaba inactiva
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        if not Category.objects.filter(pk=category.pk, is_active=True).update(
+            is_active=False, updated_at=now
+        ):
+            category.is_active = False
+            return None
+        deactivation = CategoryDeactivation.objects.create(category=category, created_at=now)
+        count = Product.objects.filter(category=category, is_active=True).update(
+            is_active=False, deactivated_by=deactivation, updated_at=now
+        )
+        if count:
+            deactivation.products_count = count
+            deactivation.save(update_fields=['products_count'])
+            _publish_products(_affected_products(deactivation.id), False, now)
+    category.is_active = False
+    category.updated_at = now
+    return deactivation
+
+
+def restore_category(category):
+    """
+    Reactiva la categoría y los productos que apagó su última desactivación.
+
+    Returns:
+        int: Productos reactivados, o None si la categoría ya estaba activa
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        if not Category.objects.filter(pk=category.pk, is_active=False).update(
+            is_active=True, updated_at=now
+        ):
+            category.is_active = True
+            return None
+        deactivation = (
+            CategoryDeactivation.objects.filter(category=category, restored_at__isnull=True)
+            .order_by('-created_at', '-id')
+            .first()
+        )
+        rows = []
+        if deactivation is not None:
+            rows = _affected_products(deactivation.id)
+            Product.objects.filter(deactivated_by=deactivation).update(
+                is_active=True, deactivated_by=None, updated_at=now
+            )
+            CategoryDeactivation.objects.filter(pk=deactivation.pk).update(restored_at=now)
+            _publish_products(rows, True, now)
+    category.is_active = True
+    category.updated_at = now
+    return len(rows)
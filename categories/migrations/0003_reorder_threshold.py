@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 03:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0002_updated_at_sync_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='reorder_threshold',
+            field=models.PositiveIntegerField(blank=True, help_text='Umbral de stock bajo de los productos que no definen uno propio', null=True, verbose_name='Umbral de reposición'),
+        ),
+    ]
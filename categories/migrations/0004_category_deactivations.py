@@ -0,0 +1,30 @@
+# Generated by Django 5.0.1 on 2026-10-19 03:26
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0003_reorder_threshold'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryDeactivation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('products_count', models.PositiveIntegerField(default=0, verbose_name='Productos desactivados')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de desactivación')),
+                ('restored_at', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de restauración')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deactivations', to='categories.category', verbose_name='Categoría')),
+            ],
+            options={
+                'verbose_name': 'Desactivación de categoría',
+                'verbose_name_plural': 'Desactivaciones de categorías',
+                'db_table': 'categories_deactivations',
+            },
+        ),
+    ]
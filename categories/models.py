@@ -16,6 +16,7 @@ class Category(models.Model):
         created_at: Fecha de creación del registro
         updated_at: Fecha de última actualización
         is_active: Indica si la categoría está activa
+        reorder_threshold: Umbral de stock bajo para los productos sin umbral propio
     """
     
     name = models.CharField(
@@ -47,6 +48,13 @@ class Category(models.Model):
         verbose_name='Activa',
         help_text='Indica si la categoría está disponible'
     )
+    
+    reorder_threshold = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        verbose_name='Umbral de reposición',
+        help_text='Umbral de stock bajo de los productos que no definen uno propio'
+    )
 
     class Meta:
         """
@@ -56,6 +64,9 @@ class Category(models.Model):
         verbose_name_plural = 'Categorías'
         ordering = ['name']
         db_table = 'categories'
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='categories_updated_idx'),
+        ]
 
     def __str__(self):
         """
@@ -63,6 +74,19 @@ class Category(models.Model):
         """
         return self.name
 
+    def save(self, *args, **kwargs):
+        """
+        Propaga el umbral de reposición a los productos que no tienen uno propio.
+        """
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if not adding and (update_fields is None or 'reorder_threshold' in update_fields):
+            level = self.reorder_threshold or 0
+            self.products.filter(reorder_threshold__isnull=True).exclude(
+                reorder_level=level
+            ).update(reorder_level=level)
+
     def get_products_count(self):
         """
         Retorna el número de productos en esta categoría.
@@ -71,9 +95,60 @@ class Category(models.Model):
 
     def soft_delete(self):
         """
-        Eliminación lógica de la categoría.
+        Eliminación lógica de la categoría y de sus productos activos.
         """
-        self.is_active = False
-        self.save(update_fields=['is_active', 'updated_at'])
+        from .cascade import deactivate_category
+        return deactivate_category(self)
+
+    def restore(self):
+        """
+        Reactiva la categoría y los productos que desactivó su eliminación.
+        """
+        from .cascade import restore_category
+        return restore_category(self)
+
+
+class CategoryDeactivation(models.Model):
+    """
+    Registro de una desactivación en cascada de una categoría.
+
+    Los productos desactivados por la cascada apuntan a este registro, así
+    que al restaurar la categoría solo se reactivan esos productos y no los
+    que ya estaban inactivos antes.
+
+    Atributos:
+        category: Categoría desactivada
+        products_count: Productos desactivados por la cascada
+        created_at: Momento de la desactivación
+        restored_at: Momento de la restauración, None si sigue inactiva
+    """
+    
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='deactivations',
+        verbose_name='Categoría'
+    )
+    products_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Productos desactivados'
+    )
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Fecha de desactivación'
+    )
+    restored_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Fecha de restauración'
+    )
+
+    class Meta:
+        verbose_name = 'Desactivación de categoría'
+        verbose_name_plural = 'Desactivaciones de categorías'
+        db_table = 'categories_deactivations'
+
+    def __str__(self):
+        return f"{self.category_id} ({self.created_at:%Y-%m-%d %H:%M})"
 
 
@@ -3,14 +3,20 @@ Serializadores para la API de categorías.
 Convierte los modelos Django a JSON y viceversa.
 """
 from rest_framework import serializers
+from catalogo_backend.sparse_fields import SparseFieldsetMixin
 from .models import Category
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializador para el modelo Category.
+    Acepta ?fields= y ?exclude= para retornar solo algunos campos.
     """
     
+    field_dependencies = {
+        'products_count': [],
+    }
+    
     # Campo calculado para mostrar el número de productos
     products_count = serializers.SerializerMethodField()
     
@@ -76,6 +82,19 @@ class CategoryUpdateSerializer(serializers.ModelSerializer):
         model = Category
         fields = ['name', 'description', 'is_active']
 
+    def update(self, instance, validated_data):
+        """
+        Los cambios de is_active se aplican en cascada a los productos.
+        """
+        is_active = validated_data.pop('is_active', instance.is_active)
+        instance = super().update(instance, validated_data)
+        if is_active != instance.is_active:
+            if is_active:
+                instance.restore()
+            else:
+                instance.soft_delete()
+        return instance
+
     def validate_name(self, value):
         """
         Valida que el nombre sea único al actualizar.
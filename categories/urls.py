@@ -13,9 +13,15 @@ urlpatterns = [
     # Detalle, actualización y eliminación de categorías
     path('categories/<int:pk>/', views.CategoryDetailView.as_view(), name='category-detail'),
     
+    # Restauración de una categoría eliminada y de sus productos
+    path('categories/<int:category_id>/restore/', views.restore_category, name='category-restore'),
+    
     # Productos de una categoría específica
     path('categories/<int:category_id>/products/', views.category_products, name='category-products'),
     
+    # Precio más bajo de la categoría en los últimos N días
+    path('categories/<int:category_id>/lowest-price/', views.category_lowest_price, name='category-lowest-price'),
+    
     # Estadísticas de categorías
     path('categories/stats/', views.category_stats, name='category-stats'),
 ]
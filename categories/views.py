@@ -6,6 +6,7 @@ from rest_framework import generics, status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from django.db.models import Q
+from catalogo_backend.sparse_fields import prune_queryset
 from .models import Category
 from .serializers import (
     CategorySerializer, 
@@ -47,6 +48,10 @@ class CategoryListCreateView(generics.ListCreateAPIView):
                 Q(description__icontains=search)
             )
         
+        # Cargar solo las columnas de los campos pedidos con ?fields=
+        if self.request.method == 'GET':
+            queryset = prune_queryset(queryset, self.get_serializer())
+        
         return queryset.order_by('name')
 
 
@@ -70,6 +75,15 @@ class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
             return CategoryUpdateSerializer
         return CategorySerializer
 
+    def get_queryset(self):
+        """
+        En lectura, carga solo las columnas de los campos pedidos con ?fields=.
+        """
+        queryset = super().get_queryset()
+        if self.request.method == 'GET':
+            queryset = prune_queryset(queryset, self.get_serializer())
+        return queryset
+
     def perform_destroy(self, instance):
         """
         Realiza eliminación lógica en lugar de física.
@@ -77,12 +91,39 @@ class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
         instance.soft_delete()
 
 
+@api_view(['POST'])
+def restore_category(request, category_id):
+    """
+    Endpoint para restaurar una categoría eliminada.
+    
+    POST /api/categories/{id}/restore/
+    
+    Reactiva la categoría y solo los productos que desactivó su eliminación.
+    """
+    try:
+        category = Category.objects.get(id=category_id, is_active=False)
+    except Category.DoesNotExist:
+        return Response(
+            {'error': 'Categoría eliminada no encontrada'}, 
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    restored = category.restore()
+    return Response({
+        'message': 'Categoría restaurada correctamente',
+        'category': CategorySerializer(category).data,
+        'restored_products': restored or 0
+    })
+
+
 @api_view(['GET'])
 def category_products(request, category_id):
     """
     Endpoint para obtener todos los productos de una categoría específica.
     
     GET /api/categories/{id}/products/
+    
+    ?fields= y ?exclude= se aplican a los productos.
     """
     try:
         category = Category.objects.get(id=category_id, is_active=True)
@@ -92,12 +133,19 @@ def category_products(request, category_id):
             status=status.HTTP_404_NOT_FOUND
         )
     
-    # Obtener productos de la categoría
-    products = category.products.filter(is_active=True)
-    
     # Serializar productos (necesitarás importar el serializer de productos)
+    from products.availability import total_stock
+    from products.models import Product
     from products.serializers import ProductSerializer
-    serializer = ProductSerializer(products, many=True)
+    
+    # Obtener productos de la categoría, con el stock total ya sumado
+    products = Product.objects.filter(
+        category_id=category.id, is_active=True
+    ).annotate(total_stock=total_stock())
+    
+    context = {'request': request}
+    products = prune_queryset(products, ProductSerializer(context=context))
+    serializer = ProductSerializer(products, many=True, context=context)
     
     return Response({
         'category': CategorySerializer(category).data,
@@ -106,6 +154,48 @@ def category_products(request, category_id):
     })
 
 
+# Máximo de días para el precio mínimo de una categoría
+LOWEST_PRICE_MAX_DAYS = 365
+
+
+@api_view(['GET'])
+def category_lowest_price(request, category_id):
+    """
+    Endpoint con el precio más bajo de los productos de una categoría en los
+    últimos N días.
+    
+    GET /api/categories/{id}/lowest-price/?days=30
+    
+    Se resuelve con el resumen diario de precios, sin recorrer el historial.
+    """
+    if not Category.objects.filter(id=category_id, is_active=True).exists():
+        return Response(
+            {'error': 'Categoría no encontrada'}, 
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    try:
+        days = int(request.query_params.get('days', 30))
+    except ValueError:
+        days = 0
+    if not 1 <= days <= LOWEST_PRICE_MAX_DAYS:
+        return Response(
+            {'error': f'El parámetro days debe ser un entero entre 1 y {LOWEST_PRICE_MAX_DAYS}.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    from products.prices import lowest_price
+    
+    lowest = lowest_price(category_id, days)
+    return Response({
+        'category': category_id,
+        'days': days,
+        'lowest_price': str(lowest['price']) if lowest else None,
+        'product': lowest['product_id'] if lowest else None,
+        'day': lowest['day'] if lowest else None
+    })
+
+
 @api_view(['GET'])
 def category_stats(request):
     """
@@ -2,8 +2,24 @@
 Configuración del panel de administración para productos.
 """
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
 from django.utils.html import format_html
+from catalogo_backend.paginators import EstimatedCountPaginator
+from .availability import total_stock
+from .forms import StockLineFormSet, StockUploadForm
 from .models import Product, ProductImage
+from .shards import disable_sharding, enable_sharding
+from .stock import (
+    StockAdjustment,
+    StockAdjustmentError,
+    apply_stock_adjustments,
+    parse_stock_csv,
+)
 
 
 class ProductImageInline(admin.TabularInline):
@@ -15,6 +31,30 @@ class ProductImageInline(admin.TabularInline):
     fields = ['image', 'alt_text', 'is_primary']
 
 
+class ProductChangeList(ChangeList):
+    """
+    Changelist que solo carga las columnas mostradas en la lista.
+    """
+
+    # Columnas necesarias para list_display, list_editable y __str__
+    only_fields = [
+        'id',
+        'name',
+        'price',
+        'stock',
+        'stock_shards',
+        'is_active',
+        'created_at',
+        'category',
+        'category__name',
+    ]
+
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        # El stock total se suma en la misma consulta, no producto por producto
+        return queryset.only(*self.only_fields).annotate(total_stock=total_stock())
+
+
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     """
@@ -26,7 +66,7 @@ class ProductAdmin(admin.ModelAdmin):
         'name',
         'category',
         'price_display',
-        'stock',
+        'stock_display',
         'is_in_stock_display',
         'is_active',
         'created_at'
@@ -41,15 +81,25 @@ class ProductAdmin(admin.ModelAdmin):
     ]
     
     # Campos por los que se puede buscar
+    # Prefijo en el nombre y SKU exacto, ambos resueltos con los índices
+    # sobre UPPER(name) y UPPER(sku); description no se indexa.
     search_fields = [
-        'name',
-        'description',
-        'sku'
+        '^name',
+        '=sku'
     ]
     
+    # Selector con búsqueda en lugar de un <select> con todas las categorías
+    autocomplete_fields = ['category']
+    
+    # Paginación sin COUNT(*) exacto sobre toda la tabla
+    list_select_related = ['category']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
     # Campos de solo lectura
     readonly_fields = [
         'sku',
+        'stock_shards',
         'created_at',
         'updated_at'
     ]
@@ -69,7 +119,7 @@ class ProductAdmin(admin.ModelAdmin):
             'fields': ('price', 'category')
         }),
         ('Inventario', {
-            'fields': ('stock', 'is_active')
+            'fields': ('stock', 'stock_shards', 'reorder_threshold', 'is_active')
         }),
         ('Imagen principal', {
             'fields': ('image',)
@@ -84,7 +134,25 @@ class ProductAdmin(admin.ModelAdmin):
     inlines = [ProductImageInline]
     
     # Acciones personalizadas
-    actions = ['activate_products', 'deactivate_products', 'update_stock']
+    actions = [
+        'activate_products',
+        'deactivate_products',
+        'update_stock',
+        'enable_stock_sharding',
+        'disable_stock_sharding',
+    ]
+    
+    def get_queryset(self, request):
+        """
+        Incluye la categoría, que usan __str__ y las búsquedas de autocompletado.
+        """
+        return super().get_queryset(request).select_related('category')
+    
+    def get_changelist(self, request, **kwargs):
+        """
+        Usa el changelist que limita las columnas cargadas.
+        """
+        return ProductChangeList
     
     def price_display(self, obj):
         """
@@ -94,6 +162,32 @@ class ProductAdmin(admin.ModelAdmin):
     price_display.short_description = 'Precio'
     price_display.admin_order_field = 'price'
     
+    def stock_display(self, obj):
+        """
+        Muestra el stock total, incluidas las fracciones.
+        """
+        return obj.get_total_stock()
+    stock_display.short_description = 'Stock'
+    stock_display.admin_order_field = 'stock'
+    
+    def save_model(self, request, obj, form, change):
+        """
+        En un producto existente, el stock editado se fija con set_stock()
+        (save() no escribe la columna ``stock``).
+        """
+        super().save_model(request, obj, form, change)
+        if change and 'stock' in form.changed_data:
+            obj.set_stock(form.cleaned_data['stock'])
+    
+    def get_form(self, request, obj=None, **kwargs):
+        """
+        Muestra el stock total en el formulario, con las fracciones y los
+        movimientos pendientes del libro.
+        """
+        if obj is not None:
+            obj.stock = obj.get_total_stock()
+        return super().get_form(request, obj, **kwargs)
+    
     def is_in_stock_display(self, obj):
         """
         Muestra si el producto está en stock con un indicador visual.
@@ -108,11 +202,34 @@ class ProductAdmin(admin.ModelAdmin):
             )
     is_in_stock_display.short_description = 'Stock'
     
+    def _set_active(self, queryset, is_active):
+        """
+        Cambia el estado de los productos seleccionados que no lo tienen ya.
+        
+        Cada producto se guarda con Product.save() para que publique su evento
+        e invalide el stock en caché, igual que al editarlo; un UPDATE en
+        bloque no lo hace. Los productos se vuelven a leer completos porque
+        el listado solo carga las columnas visibles.
+        
+        Returns:
+            int: Productos modificados
+        """
+        products = Product.objects.filter(
+            pk__in=queryset.values('pk')
+        ).exclude(is_active=is_active).order_by('id')
+        updated = 0
+        with transaction.atomic():
+            for product in products.iterator(chunk_size=500):
+                product.is_active = is_active
+                product.save(update_fields=['is_active', 'updated_at'])
+                updated += 1
+        return updated
+    
     def activate_products(self, request, queryset):
         """
         Activa los productos seleccionados.
         """
-        updated = queryset.update(is_active=True)
+        updated = self._set_active(queryset, True)
         self.message_user(
             request,
             f'{updated} productos fueron activados correctamente.'
@@ -123,24 +240,141 @@ class ProductAdmin(admin.ModelAdmin):
         """
         Desactiva los productos seleccionados.
         """
-        updated = queryset.update(is_active=False)
+        updated = self._set_active(queryset, False)
         self.message_user(
             request,
             f'{updated} productos fueron desactivados correctamente.'
         )
     deactivate_products.short_description = 'Desactivar productos seleccionados'
     
-    def update_stock(self, request, queryset):
+    def enable_stock_sharding(self, request, queryset):
+        """
+        Reparte el stock de los productos seleccionados en varias fracciones.
+        """
+        product_ids = list(queryset.filter(stock_shards=0).values_list('id', flat=True))
+        for product_id in product_ids:
+            enable_sharding(product_id)
+        self.message_user(
+            request,
+            f'{len(product_ids)} productos ahora usan stock fraccionado.'
+        )
+    enable_stock_sharding.short_description = 'Activar stock fraccionado (productos con mucha demanda)'
+    
+    def disable_stock_sharding(self, request, queryset):
         """
-        Actualiza el stock de los productos seleccionados.
+        Devuelve el stock de los productos seleccionados a una sola fila.
         """
-        # Esta es una acción de ejemplo, en un caso real podrías
-        # redirigir a una página de formulario para actualizar el stock
+        product_ids = list(queryset.filter(stock_shards__gt=0).values_list('id', flat=True))
+        for product_id in product_ids:
+            disable_sharding(product_id)
         self.message_user(
             request,
-            'Función de actualización de stock en desarrollo.'
+            f'{len(product_ids)} productos volvieron a stock en una sola fila.'
         )
+    disable_stock_sharding.short_description = 'Desactivar stock fraccionado'
+    
+    # Máximo de productos editables en línea; para más, usar el CSV
+    inline_stock_limit = 200
+    
+    def get_urls(self):
+        """
+        Agrega la página de ajuste masivo de stock.
+        """
+        custom_urls = [
+            path(
+                'adjust-stock/',
+                self.admin_site.admin_view(self.adjust_stock_view),
+                name='products_product_adjust_stock',
+            ),
+        ]
+        return custom_urls + super().get_urls()
+    
+    def update_stock(self, request, queryset):
+        """
+        Muestra el formulario de ajuste de stock para los productos seleccionados.
+        """
+        products = list(
+            queryset.select_related(None)
+            .only('id', 'name', 'sku', 'stock')
+            .order_by('id')[:self.inline_stock_limit + 1]
+        )
+        if len(products) > self.inline_stock_limit:
+            self.message_user(
+                request,
+                f'Se pueden editar en línea hasta {self.inline_stock_limit} productos. '
+                'Para más, carga un archivo CSV.'
+            )
+            return redirect('admin:products_product_adjust_stock')
+        
+        formset = StockLineFormSet(
+            prefix='lines',
+            initial=[{'product_id': product.id} for product in products]
+        )
+        return self._render_adjust_stock(request, StockUploadForm(), formset, products, [])
     update_stock.short_description = 'Actualizar stock de productos seleccionados'
+    
+    def adjust_stock_view(self, request):
+        """
+        Aplica ajustes de stock desde un CSV o desde los valores en línea.
+        
+        Todo el lote se valida antes de escribir; si alguna línea falla no
+        se modifica ningún producto.
+        """
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+        
+        upload_form = StockUploadForm(request.POST or None, request.FILES or None)
+        formset = StockLineFormSet(request.POST or None, prefix='lines')
+        errors = []
+        
+        if request.method == 'POST' and upload_form.is_valid() and formset.is_valid():
+            csv_file = upload_form.cleaned_data['csv_file']
+            try:
+                if csv_file:
+                    updated = apply_stock_adjustments(parse_stock_csv(csv_file), lookup='sku')
+                else:
+                    adjustments = [
+                        StockAdjustment(line['product_id'], line['quantity'], line['operation'])
+                        for line in formset.cleaned_data
+                        if line.get('quantity') is not None
+                    ]
+                    updated = apply_stock_adjustments(adjustments, lookup='id')
+            except StockAdjustmentError as e:
+                errors = e.errors
+            else:
+                self.message_user(request, f'Stock actualizado para {updated} productos.')
+                return redirect('admin:products_product_changelist')
+        
+        product_ids = [str(form['product_id'].value()) for form in formset]
+        products_by_id = Product.objects.only('id', 'name', 'sku', 'stock').annotate(
+            total_stock=total_stock()
+        ).in_bulk(
+            [int(product_id) for product_id in product_ids if product_id.isdigit()]
+        )
+        products = [
+            products_by_id.get(int(product_id)) if product_id.isdigit() else None
+            for product_id in product_ids
+        ]
+        return self._render_adjust_stock(request, upload_form, formset, products, errors)
+    
+    def _render_adjust_stock(self, request, upload_form, formset, products, errors):
+        """
+        Renderiza la página de ajuste de stock.
+        """
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Actualizar stock',
+            'opts': self.model._meta,
+            'upload_form': upload_form,
+            'formset': formset,
+            'rows': list(zip(formset.forms, products)),
+            'errors': errors,
+        }
+        return TemplateResponse(
+            request,
+            'admin/products/product/adjust_stock.html',
+            context
+        )
 
 
 @admin.register(ProductImage)
@@ -163,12 +397,18 @@ class ProductImageAdmin(admin.ModelAdmin):
     ]
     
     search_fields = [
-        'product__name',
+        '^product__name',
         'alt_text'
     ]
     
     readonly_fields = ['created_at']
     
+    # El producto se muestra como "nombre - categoría"
+    list_select_related = ['product__category']
+    autocomplete_fields = ['product']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
     def image_preview(self, obj):
         """
         Muestra una vista previa de la imagen.
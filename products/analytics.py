@@ -0,0 +1,297 @@
+"""
+Analítica de distribución de precios y stock y valor del inventario.
+
+Con la instantánea en columnas disponible (ver columnar.py) todo se
+calcula con NumPy sobre las columnas abiertas con mmap. Las permutaciones
+de orden ya vienen calculadas en cada generación, así que los percentiles
+son lecturas por posición, los histogramas búsquedas binarias sobre la
+columna ordenada y los valores por categoría una sola pasada sobre las
+filas ordenadas por categoría y precio. Sin NumPy o sin instantánea se
+usa agregación en la base de datos con un número fijo de consultas: las
+medianas por categoría y los percentiles salen de funciones de ventana
+(ROW_NUMBER) que leen solo las filas de cada posición, sin una consulta por
+categoría ni por percentil.
+
+La instantánea solo se usa si ningún producto cambió después de su marca
+de agua; si no, el cálculo pasa a SQL hasta la próxima generación, para no
+responder con precios o stock anteriores a los cambios publicados.
+
+El resultado se guarda en caché con una clave que identifica los datos de
+origen: la generación de la instantánea o, con SQL, el último
+``updated_at`` de los productos. Cualquier cambio publicado produce una
+clave nueva; ``ANALYTICS_CACHE_TIMEOUT`` acota además el tiempo de vida,
+porque los ajustes en las fracciones de stock solo modifican ``updated_at``
+cuando los publica sync_sharded_products().
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, DecimalField, ExpressionWrapper, F, Max, Min, Sum, Window
+from django.db.models.functions import Floor, RowNumber
+from django.utils import timezone
+
+from catalogo_backend.metrics import record_cache_lookup
+from categories.models import Category
+from . import columnar
+from .availability import total_stock
+from .models import Product
+
+
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+
+CACHE_PREFIX = 'products:analytics'
+
+# Tipo de los valores de inventario (precio por stock) en las agregaciones
+VALUE_FIELD = DecimalField(max_digits=20, decimal_places=2)
+
+
+def _round(value):
+    return round(float(value), 2) if value is not None else None
+
+
+def _distribution(values, order, bins, scale=1):
+    """
+    Mínimo, máximo, promedio, percentiles e histograma de una columna.
+
+    Args:
+        values: Columna NumPy
+        order: Permutación que ordena la columna
+        bins: Número de intervalos del histograma
+        scale: Divisor para pasar de la unidad de la columna a la de la respuesta
+    """
+    np = columnar.np
+    if not len(values):
+        return _empty_distribution()
+    ordered = values[order]
+
+    # Percentiles con interpolación lineal, como np.percentile, sin ordenar
+    positions = (len(ordered) - 1) * np.asarray(PERCENTILES) / 100
+    low = np.floor(positions).astype(np.int64)
+    high = np.minimum(low + 1, len(ordered) - 1)
+    percentiles = ordered[low] + (ordered[high] - ordered[low]) * (positions - low)
+
+    # Histograma: cada borde se ubica con búsqueda binaria sobre la columna ordenada
+    edges = np.linspace(ordered[0], ordered[-1], bins + 1)
+    bounds = np.searchsorted(ordered, edges, side='left')
+    bounds[-1] = len(ordered)
+    return {
+        'min': _round(ordered[0] / scale),
+        'max': _round(ordered[-1] / scale),
+        'mean': _round(values.mean() / scale),
+        'percentiles': {
+            f'p{p}': _round(value / scale) for p, value in zip(PERCENTILES, percentiles)
+        },
+        'histogram': {
+            'edges': [_round(edge / scale) for edge in edges],
+            'counts': np.diff(bounds).tolist(),
+        },
+    }
+
+
+def _empty_distribution():
+    return {
+        'min': None, 'max': None, 'mean': None, 'percentiles': {},
+        'histogram': {'edges': [], 'counts': []},
+    }
+
+
+def _from_columns(columns, bins):
+    """
+    Calcula la analítica sobre la instantánea en columnas.
+    """
+    np = columnar.np
+    price = columns.price
+    value = price * columns.stock
+
+    # order_category deja cada categoría en un tramo contiguo, ordenado por
+    # precio y en orden de id de categoría: basta leer los extremos y el centro
+    order = columns.order_category
+    per_category = np.bincount(columns.category)
+    category_ids = np.flatnonzero(per_category)
+    counts = per_category[category_ids]
+    starts = np.cumsum(counts) - counts
+    values = np.bincount(columns.category, weights=value)[category_ids]
+    medians = (price[order[starts + (counts - 1) // 2]] + price[order[starts + counts // 2]]) / 2
+    categories = [
+        {
+            'category_id': int(category_id),
+            'count': int(count),
+            'min_price': _round(price[order[start]] / 100),
+            'max_price': _round(price[order[start + count - 1]] / 100),
+            'median_price': _round(median / 100),
+            'inventory_value': _round(total / 100),
+        }
+        for category_id, count, start, median, total
+        in zip(category_ids, counts, starts, medians, values)
+    ]
+
+    return {
+        'total_products': len(price),
+        'inventory_value': _round(Decimal(int(value.sum())) / 100),
+        'price': _distribution(price, columns.order_price, bins, scale=100),
+        'stock': _distribution(columns.stock, columns.order_stock, bins),
+        'categories': categories,
+    }
+
+
+def _percentiles_sql(queryset, field, count):
+    """
+    Percentiles con interpolación lineal (como np.percentile) leyendo en una
+    sola consulta las dos filas vecinas de cada posición.
+    """
+    positions = {p: (count - 1) * p / 100 for p in PERCENTILES}
+    neighbours = {
+        row for position in positions.values()
+        for row in (int(position), min(int(position) + 1, count - 1))
+    }
+    values = dict(
+        queryset.annotate(row=Window(RowNumber(), order_by=[F(field).asc(), F('id').asc()]))
+        .filter(row__in=[row + 1 for row in neighbours])
+        .values_list('row', field)
+    )
+    result = {}
+    for p, position in positions.items():
+        low = int(position)
+        value = values[low + 1]
+        high = values[low + 2] if position > low else value
+        result[f'p{p}'] = _round(value + (high - value) * Decimal(str(position - low)))
+    return result
+
+
+def _medians_sql(queryset):
+    """
+    Mediana del precio de cada categoría en una sola consulta: la ventana
+    numera las filas de cada categoría por precio y solo se leen las
+    centrales.
+
+    Returns:
+        dict: {id de categoría: mediana}
+    """
+    middle = (
+        queryset.annotate(
+            row=Window(
+                RowNumber(),
+                partition_by=[F('category_id')],
+                order_by=[F('price').asc(), F('id').asc()],
+            ),
+            size=Window(Count('id'), partition_by=[F('category_id')]),
+        )
+        # Con división entera: la fila central, o las dos centrales si son pares
+        .filter(row__gte=(F('size') + 1) / 2, row__lte=F('size') / 2 + 1)
+        .values_list('category_id', 'price')
+    )
+    prices = {}
+    for category_id, price in middle:
+        prices.setdefault(category_id, []).append(price)
+    return {category_id: sum(values) / len(values) for category_id, values in prices.items()}
+
+
+def _histogram_sql(queryset, field, bins, low, high):
+    """
+    Histograma con intervalos iguales entre ``low`` y ``high``, agrupado en la base de datos.
+    """
+    width = (Decimal(high) - Decimal(low)) / bins or Decimal(1)
+    counts = [0] * bins
+    buckets = (
+        queryset.annotate(
+            bucket=Floor(ExpressionWrapper((F(field) - low) / width, output_field=VALUE_FIELD))
+        )
+        .values('bucket').annotate(count=Count('id')).values_list('bucket', 'count')
+    )
+    for bucket, count in buckets:
+        # El valor máximo cae en el último intervalo, como en np.histogram
+        counts[min(int(bucket), bins - 1)] += count
+    return {
+        'edges': [_round(Decimal(low) + width * i) for i in range(bins + 1)],
+        'counts': counts,
+    }
+
+
+def _distribution_sql(queryset, field, bins, count):
+    if not count:
+        return _empty_distribution()
+    summary = queryset.aggregate(low=Min(field), high=Max(field), mean=Avg(field))
+    return {
+        'min': _round(summary['low']),
+        'max': _round(summary['high']),
+        'mean': _round(summary['mean']),
+        'percentiles': _percentiles_sql(queryset, field, count),
+        'histogram': _histogram_sql(queryset, field, bins, summary['low'], summary['high']),
+    }
+
+
+def _from_database(bins):
+    """
+    Calcula la analítica con agregaciones en la base de datos.
+    """
+    products = Product.objects.filter(is_active=True).annotate(total=total_stock())
+    summary = products.aggregate(
+        count=Count('id'), value=Sum(F('price') * F('total'), output_field=VALUE_FIELD)
+    )
+    count = summary['count']
+
+    medians = _medians_sql(products)
+    categories = []
+    by_category = (
+        products.values('category_id')
+        .annotate(
+            count=Count('id'),
+            min_price=Min('price'),
+            max_price=Max('price'),
+            inventory_value=Sum(F('price') * F('total'), output_field=VALUE_FIELD),
+        )
+        .order_by('category_id')
+    )
+    for row in by_category:
+        categories.append({
+            'category_id': row['category_id'],
+            'count': row['count'],
+            'min_price': _round(row['min_price']),
+            'max_price': _round(row['max_price']),
+            'median_price': _round(medians[row['category_id']]),
+            'inventory_value': _round(row['inventory_value']),
+        })
+
+    return {
+        'total_products': count,
+        'inventory_value': _round(summary['value'] or 0),
+        'price': _distribution_sql(products, 'price', bins, count),
+        'stock': _distribution_sql(products, 'total', bins, count),
+        'categories': categories,
+    }
+
+
+def product_analytics(bins=20):
+    """
+    Retorna la analítica del catálogo activo, desde caché si los datos no cambiaron.
+
+    Args:
+        bins: Número de intervalos de los histogramas
+
+    Returns:
+        dict: Totales, distribuciones de precio y stock y valores por categoría
+    """
+    last_change = Product.objects.aggregate(last=Max('updated_at'))['last']
+    columns = columnar.load_columns()
+    if columns is not None and last_change is not None and last_change > columns.watermark:
+        # Hay cambios posteriores a la instantánea: solo SQL los incluye
+        columns = None
+    if columns is not None:
+        source, version = 'columns', columns.version
+    else:
+        source, version = 'database', last_change.isoformat() if last_change else 'empty'
+
+    key = f'{CACHE_PREFIX}:{source}:{version}:{bins}'
+    result = cache.get(key)
+    record_cache_lookup('analytics', result is not None)
+    if result is not None:
+        return result
+
+    result = _from_columns(columns, bins) if columns is not None else _from_database(bins)
+    names = dict(Category.objects.values_list('id', 'name'))
+    for row in result['categories']:
+        row['category_name'] = names.get(row['category_id'])
+    result.update(source=source, generated_at=timezone.now())
+    cache.set(key, result, getattr(settings, 'ANALYTICS_CACHE_TIMEOUT', 60))
+    return result
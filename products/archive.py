@@ -0,0 +1,99 @@
+"""
+Archivo de productos inactivos.
+
+archive_products() mueve los productos inactivos desde antes de una fecha,
+junto con sus imágenes adicionales, a las tablas ``products_archive`` y
+``products_images_archive``. Cada lote se copia y se borra de las tablas
+principales en su propia transacción, así que los bloqueos duran poco y
+una interrupción no deja productos a medio mover.
+
+El libro de stock y el historial de precios (``StockMovement``,
+``PriceChange`` y ``DailyPrice``) no se borran: sus claves foráneas no
+tienen restricción en la base de datos ni borrado en cascada, y como el
+producto archivado conserva su id siguen apuntando a él. Antes de copiar
+se pliegan los movimientos pendientes y las fracciones, así que el stock
+archivado coincide con el último saldo del libro. Al borrar el producto
+solo se eliminan en cascada las filas de trabajo (reservas, fracciones y
+alertas).
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .ledger import fold_product_movements
+from .models import ArchivedProduct, ArchivedProductImage, Product, ProductImage
+from .shards import fold_shards
+
+
+ARCHIVED_FIELDS = (
+    'id', 'name', 'description', 'price', 'category_id', 'image', 'stock',
+    'sku', 'created_at', 'updated_at',
+)
+
+ARCHIVED_IMAGE_FIELDS = ('id', 'product_id', 'image', 'alt_text', 'is_primary', 'created_at')
+
+
+def archive_products(before, batch_size=500):
+    """
+    Archiva los productos inactivos sin cambios desde antes de ``before``.
+
+    Args:
+        before: Fecha límite de la última actualización
+        batch_size: Productos por transacción
+
+    Returns:
+        tuple: (productos archivados, imágenes archivadas)
+    """
+    products_total = images_total = 0
+    while True:
+        with transaction.atomic():
+            locked = list(
+                Product.objects.select_for_update()
+                .filter(is_active=False, updated_at__lt=before)
+                .only('id', 'stock', 'stock_shards')
+                .order_by('id')[:batch_size]
+            )
+            if not locked:
+                return products_total, images_total
+            ids = [product.id for product in locked]
+            fold_product_movements(ids)
+            fold_shards(locked)
+            products = list(Product.objects.filter(id__in=ids).order_by('id').values(*ARCHIVED_FIELDS))
+            images = list(
+                ProductImage.objects.filter(product_id__in=ids).values(*ARCHIVED_IMAGE_FIELDS)
+            )
+            now = timezone.now()
+            ArchivedProduct.objects.bulk_create([
+                ArchivedProduct(archived_at=now, **product) for product in products
+            ])
+            ArchivedProductImage.objects.bulk_create([
+                ArchivedProductImage(**image) for image in images
+            ])
+            Product.objects.filter(id__in=ids).delete()
+        products_total += len(products)
+        images_total += len(images)
+
+
+def product_exists(product_id):
+    """
+    Indica si el producto está en la tabla principal o en el archivo; en
+    ambos casos conserva su libro de stock y su historial de precios.
+    """
+    return (
+        Product.objects.filter(pk=product_id).exists()
+        or ArchivedProduct.objects.filter(pk=product_id).exists()
+    )
+
+
+def get_archived_product(product_id):
+    """
+    Busca un producto en el archivo.
+
+    Returns:
+        ArchivedProduct: Con sus imágenes precargadas, o None si no existe
+    """
+    return (
+        ArchivedProduct.objects.select_related('category')
+        .prefetch_related('additional_images')
+        .filter(pk=product_id)
+        .first()
+    )
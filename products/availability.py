@@ -0,0 +1,129 @@
+"""
+Consulta de disponibilidad de stock para validar carritos.
+
+El stock disponible de un producto es su stock total (incluidas las
+fracciones de ``StockShard`` y los movimientos del libro todavía no
+plegados en ``Product.stock``) menos las reservas (``StockHold``)
+vigentes. Se guarda en la caché durante ``AVAILABILITY_CACHE_TIMEOUT``
+segundos y se invalida al confirmarse un cambio de stock o de reservas,
+así que validar un carrito cuesta a lo sumo una consulta para los
+productos que no estén en caché.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from catalogo_backend.metrics import record_cache_lookup
+from .models import Product, StockHold, StockMovement, StockShard
+
+
+# Valor guardado para productos inexistentes o inactivos
+MISSING = 'missing'
+
+
+def _stock_key(product_id):
+    return f'availability:stock:{product_id}'
+
+
+def total_stock():
+    """
+    Expresión con el stock total de cada producto: la instantánea
+    ``stock``, sus fracciones y sus movimientos pendientes (ver ledger.py).
+    """
+    shards = (
+        StockShard.objects.filter(product=OuterRef('pk'))
+        .order_by().values('product').annotate(total=Sum('stock')).values('total')
+    )
+    pending = (
+        StockMovement.objects.filter(product=OuterRef('pk'), pending=True)
+        .order_by().values('product').annotate(total=Sum('quantity')).values('total')
+    )
+    return F('stock') + Coalesce(Subquery(shards), 0) + Coalesce(Subquery(pending), 0)
+
+
+def active_holds(exclude_token=None):
+    """
+    Expresión con la cantidad reservada vigente de cada producto.
+
+    Args:
+        exclude_token: Token cuyas reservas no se cuentan (las del propio
+            carrito al confirmarlo)
+    """
+    holds = StockHold.objects.filter(product=OuterRef('pk'), expires_at__gt=timezone.now())
+    if exclude_token:
+        holds = holds.exclude(token=exclude_token)
+    total = holds.order_by().values('product').annotate(total=Sum('quantity')).values('total')
+    return Coalesce(Subquery(total), 0)
+
+
+def stock_levels(product_ids):
+    """
+    Retorna el stock disponible de los productos activos indicados.
+
+    Args:
+        product_ids: IDs de producto
+
+    Returns:
+        dict: {id: stock - reservas vigentes} solo para los productos activos
+    """
+    keys = {_stock_key(product_id): product_id for product_id in product_ids}
+    cached = cache.get_many(keys)
+    levels = {keys[key]: value for key, value in cached.items()}
+    for product_id in product_ids:
+        record_cache_lookup('availability', product_id in levels)
+
+    missing = [product_id for product_id in product_ids if product_id not in levels]
+    if missing:
+        found = dict(
+            Product.objects.filter(id__in=missing, is_active=True)
+            .annotate(available=total_stock() - active_holds())
+            .order_by()
+            .values_list('id', 'available')
+        )
+        loaded = {product_id: found.get(product_id, MISSING) for product_id in missing}
+        cache.set_many(
+            {_stock_key(product_id): value for product_id, value in loaded.items()},
+            getattr(settings, 'AVAILABILITY_CACHE_TIMEOUT', 5)
+        )
+        levels.update(loaded)
+
+    return {product_id: stock for product_id, stock in levels.items() if stock != MISSING}
+
+
+def check_availability(lines):
+    """
+    Verifica si hay stock suficiente para cada línea de un carrito.
+
+    Args:
+        lines: dict {id: cantidad}
+
+    Returns:
+        tuple: (líneas con id, quantity, stock y available; IDs no encontrados)
+    """
+    product_ids = list(lines)
+    levels = stock_levels(product_ids)
+    results = []
+    for product_id, quantity in lines.items():
+        if product_id not in levels:
+            continue
+        stock = max(levels[product_id], 0)
+        results.append({
+            'id': product_id,
+            'quantity': quantity,
+            'stock': stock,
+            'available': stock >= quantity,
+        })
+    missing = [product_id for product_id in product_ids if product_id not in levels]
+    return results, missing
+
+
+def invalidate_stock(product_ids):
+    """
+    Descarta el stock disponible en caché de los productos al confirmarse
+    la transacción.
+    """
+    keys = [_stock_key(product_id) for product_id in product_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,497 @@
+"""
+Instantánea en columnas del catálogo activo para filtrar en memoria.
+
+Las columnas de los productos activos (id, precio en centavos, stock total,
+categoría y fecha de creación) y las permutaciones que las ordenan se
+guardan como archivos ``.npy`` y cada worker los abre con ``mmap_mode='r'``: el sistema
+operativo comparte las mismas páginas entre todos los procesos. Los nombres
+se guardan en un buffer de bytes con sus offsets para poder recalcular el
+orden por nombre en cada actualización sin volver a la base de datos.
+
+Los filtros de precio, stock y categoría se evalúan de forma vectorizada
+sobre las columnas y el orden sale de las permutaciones precalculadas; solo los productos de la página
+final se leen de la base de datos.
+
+La instantánea solo se usa cuando la petición trae algún filtro: el
+listado por defecto sigue en SQL con su índice. Los productos con
+``updated_at`` posterior a la marca de agua de la generación se leen de la
+base de datos en cada petición y reemplazan a sus filas de la instantánea,
+así que la respuesta no depende de la antigüedad de la generación.
+
+Cada generación se escribe en una carpeta nueva y ``CURRENT`` apunta a la
+vigente, así que los lectores nunca ven una instantánea a medio escribir.
+refresh_columns() parte de la instantánea anterior y solo aplica los
+productos modificados desde su marca de agua (el mismo feed de cambios de
+/products/changes/), sin recorrer la tabla completa.
+
+NumPy es opcional: sin él, o si la instantánea es más antigua que
+``CATALOG_COLUMNS_MAX_AGE``, las vistas usan SQL como siempre.
+"""
+import bisect
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import ROUND_CEILING, ROUND_FLOOR, Decimal, InvalidOperation
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from catalogo_backend.metrics import record_cache_lookup
+from categories.models import Category
+from .availability import total_stock
+from .models import Product
+from .sync import sync_upper_bound
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - dependencia opcional
+    np = None
+
+
+COLUMNS = (
+    'ids', 'price', 'stock', 'category', 'created', 'name_offsets', 'name_bytes',
+    'order_price', 'order_stock', 'order_created', 'order_name', 'order_category',
+)
+
+# Campos de ?ordering= soportados y la permutación precalculada de cada uno
+ORDERINGS = {
+    'price': 'order_price',
+    'stock': 'order_stock',
+    'created_at': 'order_created',
+    'name': 'order_name',
+}
+
+# Parámetros de /products/ que la instantánea sabe resolver
+SUPPORTED_PARAMS = {'min_price', 'max_price', 'in_stock', 'ordering', 'page', 'fields', 'exclude'}
+
+# Parámetros de /products/search/ sin texto de búsqueda
+SEARCH_PARAMS = {'q', 'category', 'min_price', 'max_price', 'in_stock', 'fields', 'exclude'}
+
+# Parámetros que filtran; sin ninguno la petición se resuelve con SQL
+FILTER_PARAMS = ('min_price', 'max_price', 'in_stock', 'category')
+
+# Filas leídas por consulta al generar la instantánea
+BUILD_CHUNK_SIZE = 5000
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _directory():
+    return str(getattr(
+        settings, 'CATALOG_COLUMNS_DIR', os.path.join(settings.BASE_DIR, 'var', 'catalog_columns')
+    ))
+
+
+def _micros(value):
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _cents(value, rounding):
+    return int((Decimal(value) * 100).to_integral_value(rounding))
+
+
+def _filter_mask(price, stock, category, min_price=None, max_price=None, in_stock=False,
+                 category_ids=None):
+    """
+    Máscara de las filas que cumplen los filtros, sobre columnas paralelas.
+    """
+    mask = np.ones(len(price), dtype=bool)
+    if min_price is not None:
+        mask &= price >= _cents(min_price, ROUND_CEILING)
+    if max_price is not None:
+        mask &= price <= _cents(max_price, ROUND_FLOOR)
+    if in_stock:
+        mask &= stock > 0
+    if category_ids is not None:
+        mask &= np.isin(category, np.fromiter(category_ids, dtype=np.int64))
+    return mask
+
+
+class _SortKeys:
+    """
+    Vista de solo lectura con la clave de orden (valor, id) de cada fila
+    seleccionada, para buscar posiciones con bisect sin copiar las columnas.
+    """
+
+    def __init__(self, rows, ids, key):
+        self.rows = rows
+        self.ids = ids
+        self.key = key
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        return self.key(self.rows[index]), int(self.ids[index])
+
+
+class Columns:
+    """
+    Columnas de una generación de la instantánea, abiertas en modo solo lectura.
+    """
+
+    def __init__(self, path, meta):
+        self.path = path
+        self.version = os.path.basename(path)
+        self.meta = meta
+        self.built_at = parse_datetime(meta['built_at'])
+        self.watermark = parse_datetime(meta['watermark'])
+        for name in COLUMNS:
+            setattr(self, name, np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r'))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def names(self):
+        """
+        Decodifica todos los nombres (solo se usa al regenerar).
+        """
+        raw = bytes(self.name_bytes)
+        offsets = self.name_offsets
+        return [raw[offsets[i]:offsets[i + 1]].decode() for i in range(len(self.ids))]
+
+    def _name(self, row):
+        offsets = self.name_offsets
+        return bytes(self.name_bytes[offsets[row]:offsets[row + 1]]).decode()
+
+    def _sort_key(self, field):
+        """
+        Clave de orden de una fila para ``field``, la misma de las permutaciones.
+        """
+        if field == 'name':
+            return lambda row: self._name(row).casefold()
+        column = {'price': self.price, 'stock': self.stock, 'created_at': self.created}[field]
+        return lambda row: int(column[row])
+
+    def select(self, min_price=None, max_price=None, in_stock=False, category_ids=None,
+               ordering=None, changed=()):
+        """
+        Retorna los ids que cumplen los filtros, en el orden pedido.
+
+        Args:
+            min_price, max_price: Límites de precio (Decimal o str)
+            in_stock: Solo productos con stock
+            category_ids: Limitar a estas categorías
+            ordering: Campo de ORDERINGS, con '-' para descendente; por
+                defecto el de la vista (-created_at, -id)
+            changed: Filas leídas de la base de datos después de la
+                generación (ver _changed_rows()); reemplazan a las de la
+                instantánea
+        """
+        filters = {
+            'min_price': min_price, 'max_price': max_price,
+            'in_stock': in_stock, 'category_ids': category_ids,
+        }
+        mask = _filter_mask(self.price, self.stock, self.category, **filters)
+        if changed:
+            mask &= ~np.isin(self.ids, np.asarray([row['id'] for row in changed], dtype=np.int64))
+
+        ordering = ordering or '-created_at'
+        field = ordering.lstrip('-')
+        # La permutación ya está ordenada (con desempate por id); solo se filtra
+        order = getattr(self, ORDERINGS[field])
+        rows = order[mask[order]]
+        ids = self.ids[rows]
+
+        active = [row for row in changed if row['is_active']]
+        if active:
+            matches = _filter_mask(
+                *(np.asarray([row[name] for row in active], dtype=np.int64)
+                  for name in ('price', 'stock', 'category')),
+                **filters,
+            )
+            extra = sorted(
+                (row[field].casefold() if field == 'name' else row[field], row['id'])
+                for row, match in zip(active, matches) if match
+            )
+            keys = _SortKeys(rows, ids, self._sort_key(field))
+            positions = [bisect.bisect_left(keys, key) for key in extra]
+            ids = np.insert(ids, positions, [product_id for _, product_id in extra])
+
+        if ordering.startswith('-'):
+            ids = ids[::-1]
+        return ids
+
+
+_current = {'version': None, 'columns': None}
+
+
+def _open_generation(directory):
+    """
+    Abre la generación a la que apunta CURRENT.
+
+    Returns:
+        tuple: (versión, Columns), o (None, None) si no hay una generación válida
+    """
+    try:
+        with open(os.path.join(directory, 'CURRENT')) as f:
+            version = f.read().strip()
+        if version == _current['version']:
+            return version, _current['columns']
+        path = os.path.join(directory, version)
+        with open(os.path.join(path, 'meta.json')) as f:
+            return version, Columns(path, json.load(f))
+    except (OSError, ValueError, KeyError):
+        return None, None
+
+
+def load_columns():
+    """
+    Retorna la generación vigente, o None si no hay o está desactualizada.
+
+    Solo se lee ``CURRENT``, un archivo pequeño; las columnas se vuelven a
+    abrir únicamente cuando cambia la generación.
+    """
+    if np is None:
+        return None
+    version, columns = _open_generation(_directory())
+    if columns is None:
+        return None
+    _current.update(version=version, columns=columns)
+    max_age = getattr(settings, 'CATALOG_COLUMNS_MAX_AGE', 300)
+    if (timezone.now() - columns.built_at).total_seconds() > max_age:
+        return None
+    return columns
+
+
+def select_ids(params, allowed=SUPPORTED_PARAMS, category_names=None):
+    """
+    Resuelve los filtros de ``params`` con la instantánea.
+
+    Args:
+        params: Parámetros de la petición
+        allowed: Parámetros soportados; con cualquier otro se usa SQL
+        category_names: Texto a buscar en el nombre de la categoría (opcional)
+
+    Returns:
+        ndarray: Ids ordenados, o None si hay que usar SQL
+    """
+    if set(params) - set(allowed):
+        return None
+    if not any(params.get(name) for name in FILTER_PARAMS):
+        return None
+    ordering = params.get('ordering') or None
+    if ordering and ordering.lstrip('-') not in ORDERINGS:
+        return None
+    columns = load_columns()
+    record_cache_lookup('catalog_columns', columns is not None)
+    if columns is None:
+        return None
+
+    category_ids = None
+    if category_names:
+        category_ids = list(
+            Category.objects.filter(name__icontains=category_names).values_list('id', flat=True)
+        )
+    try:
+        return columns.select(
+            min_price=params.get('min_price') or None,
+            max_price=params.get('max_price') or None,
+            in_stock=(params.get('in_stock') or '').lower() == 'true',
+            category_ids=category_ids,
+            ordering=ordering,
+            changed=_changed_rows(columns),
+        )
+    except (InvalidOperation, ValueError):
+        # Valores inválidos: SQL responde con el mismo error de siempre
+        return None
+
+
+def _changed_rows(columns):
+    """
+    Lee los productos modificados después de la marca de agua de la generación.
+
+    Returns:
+        list: dicts con id, is_active y las columnas en las unidades de la
+            instantánea (precio en centavos, creación en microsegundos)
+    """
+    return [
+        {
+            'id': product_id,
+            'price': _cents(price, ROUND_FLOOR),
+            'stock': stock,
+            'category': category_id,
+            'created_at': _micros(created_at),
+            'name': name,
+            'is_active': is_active,
+        }
+        for product_id, price, stock, category_id, created_at, name, is_active
+        in _fetch_rows(Product.objects.filter(updated_at__gt=columns.watermark))
+    ]
+
+
+class HydratedProducts:
+    """
+    Secuencia de productos por ids que solo consulta la base de datos al
+    cortarla, de modo que el paginador lee únicamente la página pedida.
+
+    Los ids ya incluyen los cambios posteriores a la generación (ver
+    select_ids()); solo puede faltar un producto desactivado entre esa
+    lectura y la de la página, y en ese caso la página se completa con los
+    ids siguientes para mantener su tamaño.
+
+    Args:
+        ids: Ids en el orden final
+        queryset: Queryset base para leer los productos
+    """
+
+    def __init__(self, ids, queryset):
+        self.ids = ids
+        self.queryset = queryset
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        start, stop, _ = index.indices(len(self.ids))
+        size = stop - start
+        products = []
+        while len(products) < size and start < len(self.ids):
+            ids = [int(product_id) for product_id in self.ids[start:start + size - len(products)]]
+            found = self.queryset.in_bulk(ids)
+            products.extend(found[product_id] for product_id in ids if product_id in found)
+            start += len(ids)
+        return products
+
+
+def _write_generation(directory, arrays, meta):
+    """
+    Escribe una generación nueva y la publica en CURRENT.
+    """
+    version = f'{time.time_ns()}'
+    path = os.path.join(directory, version)
+    os.makedirs(path)
+    for name in COLUMNS:
+        np.save(os.path.join(path, f'{name}.npy'), arrays[name])
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+    pointer = os.path.join(directory, 'CURRENT.tmp')
+    with open(pointer, 'w') as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(directory, 'CURRENT'))
+
+    # Se conservan la generación nueva y la anterior, que puede seguir abierta
+    versions = sorted(
+        (entry for entry in os.listdir(directory) if entry.isdigit()), key=int
+    )
+    for old in versions[:-2]:
+        shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+    return version
+
+
+def _fetch_rows(queryset):
+    """
+    Lee (id, precio, stock total, categoría, creación, nombre) por lotes de id.
+    """
+    last_id = 0
+    while True:
+        rows = list(
+            queryset.filter(id__gt=last_id).order_by('id')
+            .annotate(total=total_stock())
+            .values_list('id', 'price', 'total', 'category_id', 'created_at', 'name', 'is_active')
+            [:BUILD_CHUNK_SIZE]
+        )
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield from rows
+
+
+def _arrays(ids, prices, stocks, categories, created, names):
+    """
+    Construye las columnas ordenadas por id a partir de listas paralelas.
+
+    Las permutaciones ``order_*`` se calculan aquí, una vez por generación:
+    con orden estable sobre filas ya ordenadas por id, los empates quedan
+    por id y las vistas y la analítica no ordenan nada por petición.
+    """
+    order = np.argsort(np.asarray(ids, dtype=np.int64), kind='stable')
+    names = [names[i] for i in order]
+    encoded = [name.encode() for name in names]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(name) for name in encoded], out=offsets[1:])
+    arrays = {
+        'ids': np.asarray(ids, dtype=np.int64)[order],
+        'price': np.asarray(prices, dtype=np.int64)[order],
+        'stock': np.asarray(stocks, dtype=np.int64)[order],
+        'category': np.asarray(categories, dtype=np.int64)[order],
+        'created': np.asarray(created, dtype=np.int64)[order],
+        'name_offsets': offsets,
+        'name_bytes': np.frombuffer(b''.join(encoded), dtype=np.uint8),
+        'order_name': np.asarray(
+            sorted(range(len(names)), key=lambda i: names[i].casefold()), dtype=np.int64
+        ),
+    }
+    _sort_orders(arrays)
+    return arrays
+
+
+def _sort_orders(arrays):
+    """
+    Recalcula las permutaciones que dependen de precio, stock y creación.
+    """
+    arrays['order_price'] = np.argsort(arrays['price'], kind='stable')
+    arrays['order_stock'] = np.argsort(arrays['stock'], kind='stable')
+    arrays['order_created'] = np.argsort(arrays['created'], kind='stable')
+    arrays['order_category'] = np.lexsort((arrays['price'], arrays['category']))
+
+
+def refresh_columns(full=False):
+    """
+    Genera una nueva instantánea, incremental desde la anterior salvo con ``full``.
+
+    Returns:
+        dict: Productos en la instantánea, filas leídas y si fue completa
+    """
+    if np is None:
+        raise RuntimeError('La instantánea en columnas requiere NumPy.')
+    directory = _directory()
+    os.makedirs(directory, exist_ok=True)
+    upper_bound = sync_upper_bound()
+
+    previous = None if full else _open_generation(directory)[1]
+    if previous is None:
+        queryset = Product.objects.filter(is_active=True)
+        base = {'ids': [], 'price': [], 'stock': [], 'category': [], 'created': [], 'names': []}
+    else:
+        queryset = Product.objects.filter(updated_at__gt=parse_datetime(previous.meta['watermark']))
+        base = None
+
+    changed = {'ids': [], 'price': [], 'stock': [], 'category': [], 'created': [], 'names': []}
+    removed = []
+    read = 0
+    for product_id, price, stock, category_id, created_at, name, is_active in _fetch_rows(queryset):
+        read += 1
+        if not is_active:
+            removed.append(product_id)
+            continue
+        changed['ids'].append(product_id)
+        changed['price'].append(_cents(price, ROUND_FLOOR))
+        changed['stock'].append(stock)
+        changed['category'].append(category_id)
+        changed['created'].append(_micros(created_at))
+        changed['names'].append(name)
+
+    if previous is not None:
+        # Se conservan las filas anteriores que no cambiaron
+        keep = ~np.isin(previous.ids, np.asarray(changed['ids'] + removed, dtype=np.int64))
+        names = previous.names()
+        base = {
+            'ids': previous.ids[keep].tolist(),
+            'price': previous.price[keep].tolist(),
+            'stock': previous.stock[keep].tolist(),
+            'category': previous.category[keep].tolist(),
+            'created': previous.created[keep].tolist(),
+            'names': [name for name, kept in zip(names, keep) if kept],
+        }
+    arrays = _arrays(*(base[key] + changed[key] for key in ('ids', 'price', 'stock', 'category', 'created', 'names')))
+    _write_generation(directory, arrays, {
+        'built_at': timezone.now().isoformat(),
+        'watermark': upper_bound.isoformat(),
+        'count': len(arrays['ids']),
+    })
+    return {'products': len(arrays['ids']), 'read': read, 'full': previous is None}
+
@@ -0,0 +1,198 @@
+"""
+Publicación de cambios de stock, precio y estado de productos.
+
+Los cambios se publican en un bus en memoria al que se suscriben los
+streams SSE de ``/products/stream/``. Con varios workers, cada proceso
+abre un socket Unix de datagramas en ``PRODUCT_EVENTS_SOCKET_DIR`` y
+reenvía sus eventos a los sockets de los demás, sin depender de la red.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+
+from django.conf import settings
+from django.db import transaction
+
+
+logger = logging.getLogger(__name__)
+
+# Campos cuyo cambio genera un evento
+TRACKED_FIELDS = ('stock', 'price', 'is_active')
+
+# Eventos pendientes por suscriptor antes de descartar los nuevos
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+
+class Subscription:
+    """
+    Suscripción de un stream a los cambios de ciertos productos o categorías.
+    """
+
+    def __init__(self, product_ids=(), category_ids=()):
+        self.product_ids = set(product_ids)
+        self.category_ids = set(category_ids)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.dropped = 0
+
+    def matches(self, event):
+        return event['id'] in self.product_ids or event['category_id'] in self.category_ids
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def deliver(self, event):
+        """
+        Entrega el evento desde cualquier hilo al loop del suscriptor.
+        """
+        self.loop.call_soon_threadsafe(self._put, event)
+
+
+class ProductEventBus:
+    """
+    Bus de eventos en memoria del proceso.
+    """
+
+    def __init__(self):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, product_ids=(), category_ids=()):
+        subscription = Subscription(product_ids, category_ids)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def dispatch(self, event):
+        """
+        Entrega el evento a los suscriptores locales interesados.
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if subscription.matches(event):
+                subscription.deliver(event)
+
+
+class SocketFanout:
+    """
+    Reparte eventos entre workers mediante sockets Unix de datagramas.
+
+    Cada proceso escucha en ``<directorio>/worker-<pid>.sock`` y envía cada
+    evento a los sockets de los demás procesos. Los sockets de procesos
+    que ya no existen se eliminan al fallar el envío.
+    """
+
+    def __init__(self, directory, bus):
+        self.directory = directory
+        self.bus = bus
+        self.path = os.path.join(directory, f'worker-{os.getpid()}.sock')
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.receiver.bind(self.path)
+        self.sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sender.setblocking(False)
+        threading.Thread(target=self._receive, name='product-events', daemon=True).start()
+
+    def _receive(self):
+        while True:
+            data = self.receiver.recv(65536)
+            try:
+                self.bus.dispatch(json.loads(data))
+            except (ValueError, KeyError):
+                logger.warning('Evento de producto inválido recibido por el socket')
+
+    def send(self, event):
+        data = json.dumps(event).encode()
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if path == self.path or not name.endswith('.sock'):
+                continue
+            try:
+                self.sender.sendto(data, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Worker terminado: su socket ya no tiene lector
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            except BlockingIOError:
+                logger.warning('Cola del socket llena, evento descartado', extra={'socket': path})
+
+
+bus = ProductEventBus()
+_fanout = None
+_fanout_lock = threading.Lock()
+
+
+def _get_fanout():
+    """
+    Inicializa el reparto entre procesos si está configurado.
+    """
+    global _fanout
+    directory = getattr(settings, 'PRODUCT_EVENTS_SOCKET_DIR', '')
+    if not directory:
+        return None
+    with _fanout_lock:
+        if _fanout is None or _fanout.path != os.path.join(directory, f'worker-{os.getpid()}.sock'):
+            _fanout = SocketFanout(directory, bus)
+    return _fanout
+
+
+def publish(event):
+    """
+    Publica un evento en este proceso y en los demás workers.
+    """
+    bus.dispatch(event)
+    fanout = _get_fanout()
+    if fanout is not None:
+        fanout.send(event)
+
+
+def product_event(product_id, category_id, stock, price, is_active, updated_at=None):
+    """
+    Construye el evento serializable de un producto.
+    """
+    return {
+        'id': product_id,
+        'category_id': category_id,
+        'stock': stock,
+        'price': str(price) if price is not None else None,
+        'is_active': is_active,
+        'updated_at': updated_at.isoformat() if updated_at else None,
+    }
+
+
+def publish_on_commit(event):
+    """
+    Publica el evento cuando se confirme la transacción en curso.
+    """
+    transaction.on_commit(lambda: publish(event))
+
+
+def publish_many_on_commit(events):
+    """
+    Publica varios eventos con un solo callback al confirmar la transacción.
+    """
+    events = list(events)
+    if events:
+        transaction.on_commit(lambda: [publish(event) for event in events])
+
+
+def ensure_listening():
+    """
+    Abre el socket de este worker para recibir eventos de los demás.
+    """
+    _get_fanout()
@@ -0,0 +1,237 @@
+"""
+Exportaciones masivas del catálogo a CSV o XLSX.
+
+La petición a ``/products/exports/`` solo crea el registro ProductExport y
+encola la tarea ``products.run_export``; el worker recorre el queryset con
+los mismos filtros que ``/products/`` usando un cursor por bloques y
+escribe el archivo en ``MEDIA_ROOT/exports/`` sin cargar el catálogo en
+memoria. Después de cada bloque actualiza ``processed`` para que la API
+informe el avance.
+
+El archivo se escribe con extensión ``.part`` y se renombra al terminar,
+así que solo se puede descargar completo; la descarga admite ``Range``
+para retomar archivos grandes (ver parse_range()).
+
+XLSX requiere ``openpyxl`` (opcional); se escribe en modo ``write_only``,
+que tampoco guarda las filas en memoria.
+"""
+import csv
+import os
+import secrets
+from datetime import timezone as dt_timezone
+from itertools import islice
+
+from django.conf import settings
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+from rest_framework.request import Request
+
+from .availability import total_stock
+from .models import ProductExport, Task
+
+try:
+    import openpyxl
+except ImportError:  # pragma: no cover - dependencia opcional
+    openpyxl = None
+
+
+# Parámetros de /products/ que se pueden usar como filtros de la exportación
+EXPORT_FILTER_PARAMS = (
+    'min_price', 'max_price', 'in_stock', 'category', 'is_active', 'search', 'ordering',
+)
+
+# Columnas del archivo: campo (o anotación) y encabezado
+EXPORT_COLUMNS = (
+    ('id', 'ID'),
+    ('sku', 'SKU'),
+    ('name', 'Nombre'),
+    ('category__name', 'Categoría'),
+    ('price', 'Precio'),
+    ('total_stock', 'Stock'),
+    ('is_active', 'Activo'),
+    ('created_at', 'Fecha de creación'),
+    ('updated_at', 'Última actualización'),
+)
+
+# Filas leídas de la base de datos y escritas por bloque
+CHUNK_SIZE = 2000
+
+CONTENT_TYPES = {
+    ProductExport.CSV: 'text/csv; charset=utf-8',
+    ProductExport.XLSX: 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+class RangeNotSatisfiable(Exception):
+    """
+    El rango pedido empieza después del final del archivo.
+    """
+
+
+def export_queryset(filters):
+    """
+    Aplica los filtros a los productos igual que ProductListCreateView.
+
+    Se usa la propia vista (get_queryset y sus filter backends) para que la
+    exportación siga cualquier cambio en los filtros de /products/.
+
+    Raises:
+        rest_framework.exceptions.ValidationError: Filtros inválidos
+    """
+    from .views import ProductListCreateView
+
+    http_request = HttpRequest()
+    http_request.method = 'GET'
+    http_request.GET = QueryDict(mutable=True)
+    http_request.GET.update(filters)
+    view = ProductListCreateView(request=Request(http_request), args=(), kwargs={}, format_kwarg=None)
+    return view.filter_queryset(view.get_queryset())
+
+
+def _chunks(rows):
+    while True:
+        chunk = list(islice(rows, CHUNK_SIZE))
+        if not chunk:
+            return
+        yield chunk
+
+
+class _CsvWriter:
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+
+    def write(self, rows):
+        self.writer.writerows(
+            [value.isoformat() if hasattr(value, 'isoformat') else value for value in row]
+            for row in rows
+        )
+
+    def close(self):
+        self.file.close()
+
+
+class _XlsxWriter:
+    def __init__(self, path):
+        self.path = path
+        self.workbook = openpyxl.Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet('Productos')
+
+    def write(self, rows):
+        for row in rows:
+            # Excel no admite zonas horarias: las fechas se guardan en UTC
+            self.sheet.append([
+                value.astimezone(dt_timezone.utc).replace(tzinfo=None)
+                if hasattr(value, 'astimezone') else value
+                for value in row
+            ])
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+def run_export(export_id):
+    """
+    Genera el archivo de una exportación.
+
+    Returns:
+        dict: Productos exportados y tamaño del archivo
+    """
+    export = ProductExport.objects.select_related('task').get(id=export_id)
+    queryset = export_queryset(export.filters)
+    total = queryset.count()
+    ProductExport.objects.filter(id=export.id).update(
+        status=Task.RUNNING, started_at=timezone.now(), total=total, processed=0, error=''
+    )
+
+    name = f'exports/{export.id}-{secrets.token_hex(8)}.{export.format}'
+    path = os.path.join(settings.MEDIA_ROOT, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = f'{path}.part'
+    rows = (
+        queryset.annotate(total_stock=total_stock())
+        .values_list(*(field for field, _ in EXPORT_COLUMNS))
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    writer = _XlsxWriter(partial) if export.format == ProductExport.XLSX else _CsvWriter(partial)
+    processed = 0
+    try:
+        writer.write([[header for _, header in EXPORT_COLUMNS]])
+        for chunk in _chunks(rows):
+            writer.write(chunk)
+            processed += len(chunk)
+            ProductExport.objects.filter(id=export.id).update(processed=processed)
+        writer.close()
+        os.replace(partial, path)
+    except Exception as exc:
+        writer.close()
+        if os.path.exists(partial):
+            os.remove(partial)
+        # Si la tarea todavía tiene reintentos, la exportación vuelve a quedar en espera
+        task = export.task
+        retrying = task is not None and task.attempts < task.max_attempts
+        ProductExport.objects.filter(id=export.id).update(
+            status=Task.PENDING if retrying else Task.FAILED,
+            error=str(exc),
+            finished_at=None if retrying else timezone.now(),
+        )
+        raise
+
+    size = os.path.getsize(path)
+    if export.file:
+        export.file.delete(save=False)
+    ProductExport.objects.filter(id=export.id).update(
+        status=Task.DONE, file=name, size=size, processed=processed, finished_at=timezone.now()
+    )
+    return {'processed': processed, 'size': size}
+
+
+def parse_range(header, size):
+    """
+    Interpreta una cabecera ``Range`` de un solo rango de bytes.
+
+    Args:
+        header: Valor de la cabecera (``bytes=0-499``, ``bytes=500-``, ``bytes=-500``)
+        size: Tamaño del archivo
+
+    Returns:
+        tuple: (inicio, fin) inclusivos, o None si la cabecera no aplica y
+            hay que responder el archivo completo (ausente, mal formada o
+            con varios rangos)
+
+    Raises:
+        RangeNotSatisfiable: El rango empieza después del final del archivo
+    """
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    start, separator, end = header[len('bytes='):].strip().partition('-')
+    if not separator or not (start.isdigit() or end.isdigit()):
+        return None
+    if not start:
+        # Sufijo: los últimos N bytes
+        length = int(end)
+        if not length or not size:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+    if not start.isdigit() or (end and not end.isdigit()):
+        return None
+    start = int(start)
+    if end and int(end) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, min(int(end), size - 1) if end else size - 1
+
+
+def read_file(path, start, length, block_size=64 * 1024):
+    """
+    Lee ``length`` bytes desde ``start`` en bloques.
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            block = f.read(min(block_size, length))
+            if not block:
+                return
+            length -= len(block)
+            yield block
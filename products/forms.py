@@ -0,0 +1,36 @@
+"""
+Formularios del panel de administración de productos.
+"""
+from django import forms
+
+
+OPERATION_CHOICES = [
+    ('add', 'Agregar'),
+    ('reduce', 'Reducir'),
+    ('set', 'Establecer'),
+]
+
+
+class StockUploadForm(forms.Form):
+    """
+    Formulario para cargar ajustes de stock desde un archivo CSV.
+    """
+
+    csv_file = forms.FileField(
+        required=False,
+        label='Archivo CSV',
+        help_text='Columnas: sku, quantity, operation (add, reduce o set)'
+    )
+
+
+class StockLineForm(forms.Form):
+    """
+    Ajuste de stock para uno de los productos seleccionados.
+    """
+
+    product_id = forms.IntegerField(widget=forms.HiddenInput)
+    operation = forms.ChoiceField(choices=OPERATION_CHOICES, initial='set', label='Operación')
+    quantity = forms.IntegerField(min_value=0, required=False, label='Cantidad')
+
+
+StockLineFormSet = forms.formset_factory(StockLineForm, extra=0)
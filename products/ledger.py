@@ -0,0 +1,332 @@
+"""
+Libro de movimientos de stock.
+
+Las escrituras de stock de los productos sin fracciones no modifican
+``Product.stock``: agregan una fila ``StockMovement`` pendiente
+(``pending=True``) con la variación y el saldo resultante. Para validar el
+saldo, las escrituras de un mismo producto se esperan entre sí con un
+bloqueo consultivo (lock_stock()), sin bloquear ni reescribir la fila del
+producto: cada escritura es una inserción angosta en lugar de una nueva
+versión de la fila completa.
+
+Cada escritura encola el pliegue (schedule_fold(), tarea
+``products.fold_stock_ledger``) unos segundos después. fold_movements()
+pliega los movimientos pendientes en ``Product.stock`` por lotes, con un
+UPDATE por lote, y actualiza ``updated_at`` para que el cambio llegue a
+/products/changes/, a las instantáneas y a la mezcla de cambios de la
+instantánea en columnas. ``manage.py fold_stock_ledger`` lo ejecuta a mano
+o de forma periódica.
+
+El stock total (``total_stock()``) suma los movimientos pendientes, así
+que las lecturas y las validaciones nunca ven un saldo atrasado. Los
+filtros e índices sobre la columna ``stock`` (``in_stock``, orden por
+stock, stock bajo) y ``updated_at`` se atrasan hasta ese pliegue
+(``STOCK_LEDGER_FOLD_DELAY`` segundos).
+
+Para que el libro no crezca sin límite, compact_ledger() reemplaza los
+movimientos ya plegados anteriores a una fecha por una fila ``snapshot``
+por producto con el saldo a esa fecha, procesando los productos por lotes.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, IntegerField, Max, OuterRef, Subquery, Sum, When
+from django.utils import timezone
+
+from .availability import invalidate_stock, total_stock
+from .events import product_event, publish_on_commit
+from .models import Product, StockMovement
+from .queue import enqueue
+
+
+# Espacio de nombres de los bloqueos consultivos de stock en PostgreSQL
+STOCK_LOCK_NAMESPACE = 4101
+
+# Fin del intervalo cubierto por el último pliegue encolado en este proceso
+_fold_scheduled_until = None
+
+
+def stock_movement(product_id, quantity, balance, reason, created_at=None, pending=False):
+    """
+    Construye (sin guardar) un movimiento de stock.
+    """
+    return StockMovement(
+        product_id=product_id,
+        quantity=quantity,
+        balance=balance,
+        reason=reason,
+        created_at=created_at or timezone.now(),
+        pending=pending,
+    )
+
+
+def record_movements(movements):
+    """
+    Inserta los movimientos con variación distinta de cero en una sentencia.
+    """
+    movements = [movement for movement in movements if movement.quantity]
+    if movements:
+        StockMovement.objects.bulk_create(movements)
+
+
+def lock_stock(product_ids):
+    """
+    Serializa las escrituras de stock de los productos hasta el final de la
+    transacción en curso.
+
+    En PostgreSQL toma un bloqueo consultivo por producto, en orden de ID:
+    las escrituras del libro se esperan entre sí, pero no bloquean la fila
+    del producto, así que no esperan ni detienen a las ediciones, a las
+    lecturas con bloqueo ni al pliegue. En otros motores bloquea las filas
+    con ``SELECT ... FOR UPDATE``.
+
+    Args:
+        product_ids: IDs de los productos
+    """
+    product_ids = sorted(set(product_ids))
+    if not product_ids:
+        return
+    if connection.vendor != 'postgresql':
+        list(
+            Product.objects.select_for_update().filter(pk__in=product_ids)
+            .order_by('id').values_list('id', flat=True)
+        )
+        return
+    with connection.cursor() as cursor:
+        # La subconsulta ordenada fija el orden en que se toman los bloqueos
+        cursor.execute(
+            'SELECT pg_advisory_xact_lock(%s, key) FROM ('
+            '  SELECT DISTINCT (id %% 2147483647)::int AS key'
+            '  FROM unnest(%s::bigint[]) AS id ORDER BY key'
+            ') AS keys',
+            [STOCK_LOCK_NAMESPACE, product_ids],
+        )
+
+
+def schedule_fold():
+    """
+    Encola el pliegue de los movimientos pendientes para dentro de
+    ``STOCK_LEDGER_FOLD_DELAY`` segundos.
+
+    Las escrituras de ese intervalo comparten el mismo pliegue: cada proceso
+    encola como mucho una tarea por intervalo. Se llama dentro de la
+    transacción de la escritura, así que la tarea solo existe si se confirma.
+    """
+    now = timezone.now()
+    if _fold_scheduled_until is not None and now < _fold_scheduled_until:
+        return
+    run_at = now + timedelta(seconds=getattr(settings, 'STOCK_LEDGER_FOLD_DELAY', 5))
+    enqueue('products.fold_stock_ledger', run_at=run_at)
+
+    def scheduled():
+        global _fold_scheduled_until
+        _fold_scheduled_until = run_at
+
+    transaction.on_commit(scheduled)
+
+
+def append_stock(product, reason, quantity=0, target=None):
+    """
+    Agrega un movimiento pendiente al libro de un producto sin fracciones.
+
+    Toma el bloqueo de stock del producto (lock_stock()) para leer su
+    stock total y validar el saldo, sin bloquear ni reescribir la fila.
+
+    Args:
+        product: Instancia de Product
+        reason: Motivo del movimiento
+        quantity: Variación del stock (negativa en los descuentos)
+        target: Stock total a fijar; si se indica reemplaza a ``quantity``
+
+    Returns:
+        int: Stock total resultante, o None si no alcanza para el descuento
+    """
+    with transaction.atomic():
+        lock_stock([product.pk])
+        total = (
+            Product.objects.filter(pk=product.pk)
+            .annotate(total=total_stock()).values_list('total', flat=True).get()
+        )
+        if target is not None:
+            quantity = target - total
+        if total + quantity < 0:
+            return None
+        product.total_stock = total + quantity
+        if quantity:
+            record_movements([stock_movement(product.id, quantity, product.total_stock, reason, pending=True)])
+            schedule_fold()
+            invalidate_stock([product.id])
+            publish_on_commit(product_event(
+                product.id, product.category_id, product.total_stock,
+                product.price, product.is_active, timezone.now()
+            ))
+    return product.total_stock
+
+
+def fold_product_movements(product_ids, now=None):
+    """
+    Pliega en ``Product.stock`` los movimientos pendientes de los productos.
+
+    Debe llamarse dentro de una transacción, con las filas de los productos
+    ya bloqueadas. Las escrituras del libro no esperan a ese bloqueo, así
+    que solo se marcan como plegados los movimientos que se sumaron; los
+    que se agreguen mientras tanto quedan para el próximo pliegue.
+
+    Returns:
+        dict: {id: variación plegada} de los productos con movimientos pendientes
+    """
+    movements = list(
+        StockMovement.objects.filter(product_id__in=product_ids, pending=True)
+        .values_list('id', 'product_id', 'quantity')
+    )
+    sums = {}
+    for _, product_id, quantity in movements:
+        sums[product_id] = sums.get(product_id, 0) + quantity
+    if not sums:
+        return sums
+    StockMovement.objects.filter(id__in=[movement[0] for movement in movements]).update(pending=False)
+    Product.objects.filter(pk__in=sums).update(
+        stock=Case(
+            *(When(pk=product_id, then=F('stock') + quantity) for product_id, quantity in sums.items()),
+            output_field=IntegerField(),
+        ),
+        updated_at=now or timezone.now(),
+    )
+    return sums
+
+
+def fold_movements(batch_size=500):
+    """
+    Pliega los movimientos pendientes en ``Product.stock`` por lotes.
+
+    Cada lote de productos con movimientos pendientes (índice parcial
+    ``stock_movements_pending_idx``) se bloquea en orden de ID y se pliega
+    en su propia transacción corta.
+
+    Args:
+        batch_size: Productos por transacción
+
+    Returns:
+        int: Productos actualizados
+    """
+    folded = 0
+    while True:
+        with transaction.atomic():
+            product_ids = list(
+                StockMovement.objects.filter(pending=True).order_by()
+                .values_list('product_id', flat=True).distinct()[:batch_size]
+            )
+            if not product_ids:
+                return folded
+            locked = list(
+                Product.objects.select_for_update().filter(pk__in=product_ids)
+                .order_by('id').values_list('id', flat=True)
+            )
+            # El libro se conserva al borrar un producto: sus movimientos
+            # pendientes ya no tienen dónde plegarse
+            StockMovement.objects.filter(
+                product_id__in=set(product_ids) - set(locked), pending=True
+            ).update(pending=False)
+            folded += len(fold_product_movements(locked))
+
+
+def product_history(product_id, since=None, until=None, limit=100):
+    """
+    Movimientos de un producto en un rango de fechas, del más reciente al
+    más antiguo, resueltos con el índice (product, created_at).
+    """
+    queryset = StockMovement.objects.filter(product_id=product_id)
+    if since:
+        queryset = queryset.filter(created_at__gte=since)
+    if until:
+        queryset = queryset.filter(created_at__lt=until)
+    return list(queryset.order_by('-created_at', '-id')[:limit])
+
+
+def compact_ledger(before, batch_size=500):
+    """
+    Reemplaza los movimientos anteriores a ``before`` por un saldo por producto.
+
+    Cada lote de productos se compacta en su propia transacción: se suma la
+    variación de los movimientos antiguos ya plegados, se toma el saldo del
+    último (por ``created_at`` e ``id``, igual que ledger_mismatches()) y se
+    inserta una fila ``snapshot`` con esos valores y la fecha de ese último
+    movimiento antes de borrarlos. Los movimientos pendientes no se tocan.
+
+    Args:
+        before: Fecha límite; se conservan los movimientos posteriores
+        batch_size: Productos por transacción
+
+    Returns:
+        tuple: (productos compactados, movimientos eliminados)
+    """
+    compacted = removed = 0
+    last_id = 0
+    while True:
+        product_ids = list(
+            Product.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not product_ids:
+            return compacted, removed
+        last_id = product_ids[-1]
+
+        with transaction.atomic():
+            old = StockMovement.objects.filter(
+                product_id__in=product_ids, created_at__lt=before, pending=False
+            )
+            # Solo se compactan productos con más de un movimiento antiguo
+            summary = {
+                row['product_id']: row
+                for row in old.order_by().values('product_id').annotate(
+                    quantity=Sum('quantity'), last_at=Max('created_at'), count=Count('id'),
+                ).filter(count__gt=1)
+            }
+            if not summary:
+                continue
+            # Una snapshot anterior tiene un id mayor que los movimientos que
+            # la siguen: el último movimiento se elige por fecha y después por id
+            last_balances = dict(
+                Product.objects.filter(pk__in=summary).annotate(
+                    last_balance=Subquery(
+                        old.filter(product=OuterRef('pk'))
+                        .order_by('-created_at', '-id').values('balance')[:1]
+                    )
+                ).values_list('id', 'last_balance')
+            )
+            snapshots = [
+                stock_movement(
+                    product_id, row['quantity'], last_balances[product_id], 'snapshot', row['last_at']
+                )
+                for product_id, row in summary.items()
+            ]
+            deleted, _ = old.filter(product_id__in=summary).delete()
+            StockMovement.objects.bulk_create(snapshots)
+        compacted += len(snapshots)
+        removed += deleted
+
+
+def ledger_mismatches(batch_size=500):
+    """
+    Productos cuyo stock total no coincide con el saldo del último movimiento.
+
+    Returns:
+        list: tuplas (id, stock total, saldo del libro o None)
+    """
+    last_balance = Subquery(
+        StockMovement.objects.filter(product=OuterRef('pk'))
+        .order_by('-created_at', '-id').values('balance')[:1]
+    )
+    mismatches = []
+    last_id = 0
+    while True:
+        rows = list(
+            Product.objects.filter(id__gt=last_id).order_by('id')
+            .annotate(total=total_stock(), ledger=last_balance)
+            .values_list('id', 'total', 'ledger')[:batch_size]
+        )
+        if not rows:
+            return mismatches
+        last_id = rows[-1][0]
+        mismatches.extend(row for row in rows if row[1] != (row[2] or 0))
@@ -0,0 +1,109 @@
+"""
+Detección de productos con stock bajo.
+
+Cada producto guarda su umbral efectivo en ``reorder_level`` y el índice
+parcial ``products_low_stock_idx`` contiene solo las filas activas con
+``stock <= reorder_level``, así que listar los productos con stock bajo
+recorre únicamente esas filas, sin ordenar la tabla completa.
+
+Los productos con stock fraccionado guardan casi todo su stock en las
+fracciones y no pueden usar el índice; son pocos y se evalúan aparte con
+su stock total.
+
+scan_low_stock() compara ese conjunto con las alertas abiertas y solo
+escribe las diferencias: abre alertas para los productos que entraron y
+cierra las de los que salieron.
+"""
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .availability import total_stock
+from .models import LowStockAlert, Product
+
+
+LOW_STOCK_FIELDS = ('id', 'name', 'sku', 'category_id', 'stock', 'reorder_level')
+
+
+def low_stock_products(category_id=None, limit=None):
+    """
+    Retorna los productos activos con stock menor o igual a su umbral.
+
+    Args:
+        category_id: Limitar a una categoría (opcional)
+        limit: Máximo de productos (opcional)
+
+    Returns:
+        list: Diccionarios con LOW_STOCK_FIELDS, ordenados por stock e id
+    """
+    base = Product.objects.filter(is_active=True, reorder_level__gt=0)
+    if category_id is not None:
+        base = base.filter(category_id=category_id)
+
+    # Mismas condiciones que el índice parcial para que el planificador lo use
+    unsharded = base.filter(stock_shards=0, stock__lte=F('reorder_level')).order_by('stock', 'id')
+    if limit:
+        unsharded = unsharded[:limit]
+    rows = list(unsharded.values(*LOW_STOCK_FIELDS))
+
+    sharded = (
+        base.filter(stock_shards__gt=0)
+        .annotate(total=total_stock())
+        .filter(total__lte=F('reorder_level'))
+        .values(*LOW_STOCK_FIELDS, 'total')
+    )
+    for row in sharded:
+        row['stock'] = row.pop('total')
+        rows.append(row)
+
+    rows.sort(key=lambda row: (row['stock'], row['id']))
+    return rows[:limit] if limit else rows
+
+
+def scan_low_stock(now=None):
+    """
+    Sincroniza las alertas abiertas con los productos que hoy tienen stock bajo.
+
+    Returns:
+        tuple: (alertas abiertas, alertas resueltas) en esta pasada
+    """
+    now = now or timezone.now()
+    current = {row['id']: row for row in low_stock_products()}
+    with transaction.atomic():
+        open_alerts = dict(
+            LowStockAlert.objects.select_for_update()
+            .filter(resolved_at__isnull=True)
+            .values_list('product_id', 'id')
+        )
+        opened = LowStockAlert.objects.bulk_create([
+            LowStockAlert(
+                product_id=product_id,
+                stock=row['stock'],
+                reorder_level=row['reorder_level'],
+                opened_at=now,
+                changed_at=now,
+            )
+            for product_id, row in current.items()
+            if product_id not in open_alerts
+        ])
+        resolved_ids = [
+            alert_id for product_id, alert_id in open_alerts.items()
+            if product_id not in current
+        ]
+        LowStockAlert.objects.filter(id__in=resolved_ids).update(resolved_at=now, changed_at=now)
+    return opened, resolved_ids
+
+
+def alert_changes(since, after_id=0, category_id=None, limit=500):
+    """
+    Alertas abiertas o resueltas después de ``since``, en orden de cambio.
+
+    Las alertas de una misma pasada comparten ``changed_at``; ``after_id``
+    desempata para continuar una consulta que se cortó por ``limit``.
+    """
+    alerts = LowStockAlert.objects.filter(
+        Q(changed_at__gt=since) | Q(changed_at=since, id__gt=after_id)
+    )
+    if category_id is not None:
+        alerts = alerts.filter(product__category_id=category_id)
+    return list(alerts.order_by('changed_at', 'id')[:limit])
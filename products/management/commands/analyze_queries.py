@@ -0,0 +1,359 @@
+"""
+Comando para analizar las consultas SQL de los endpoints del catálogo.
+
+Ejecuta cada URL de ``products/urls.py`` y ``categories/urls.py`` contra
+los datos cargados, captura el SQL generado, obtiene su plan de ejecución
+y sugiere índices para los recorridos secuenciales y ordenamientos.
+
+Uso:
+    python manage.py analyze_queries
+    python manage.py analyze_queries --url-name products:product-list-create
+    python manage.py analyze_queries --min-rows 1000
+"""
+import json
+import re
+import time
+from collections import Counter
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from categories import urls as category_urls
+from products import urls as product_urls
+from products.models import Product, ProductExport, Task
+
+
+# Parámetros representativos por nombre de URL. Los valores entre llaves se
+# reemplazan con datos reales del catálogo (ver _sample_values).
+SCENARIOS = {
+    'products:product-list-create': [
+        {},
+        {'ordering': 'price'},
+        {'ordering': '-stock'},
+        {'min_price': '{price_low}', 'max_price': '{price_high}'},
+        {'in_stock': 'true'},
+        {'category': '{category_name}'},
+        {'search': '{search_term}'},
+    ],
+    'products:product-search': [
+        {'q': '{search_term}'},
+        {'category': '{category_name}', 'min_price': '{price_low}', 'in_stock': 'true'},
+    ],
+    'categories:category-list-create': [
+        {},
+        {'search': '{search_term}'},
+    ],
+}
+
+# Endpoints que modifican datos: se ejecutan dentro de una transacción que
+# se revierte al terminar.
+WRITE_SCENARIOS = {
+    'products:product-stock-update': ('patch', {'stock': 1, 'operation': 'add'}),
+}
+
+# Argumentos de URL por aplicación y el valor de ejemplo que los llena
+URL_KWARGS = {
+    'products': {'pk': 'product_id', 'product_id': 'product_id'},
+    'categories': {'pk': 'category_id', 'category_id': 'category_id'},
+}
+
+# URLs cuyo ``pk`` no es un producto ni una categoría
+URL_NAME_KWARGS = {
+    'products:product-export-detail': {'pk': 'export_id'},
+    'products:product-export-download': {'pk': 'export_id'},
+}
+
+_TABLE_COLUMN_RE = re.compile(r'"(\w+)"\."(\w+)"')
+# Columnas comparadas con LIKE '%...': un índice B-tree no las resuelve
+_LEADING_WILDCARD_RE = re.compile(r'"(\w+)"\."(\w+)"(?:::text)?\)?\s+LIKE\s+(?:UPPER\()?\'%')
+# Literales que se reemplazan para agrupar consultas con la misma forma
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_ORDER_RE = re.compile(r'"(\w+)"\."(\w+)"\s*(ASC|DESC)?', re.IGNORECASE)
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta los endpoints del catálogo, analiza el plan de sus consultas y sugiere índices'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url-name',
+            action='append',
+            dest='url_names',
+            help='Analizar solo esta URL (por ejemplo products:product-list-create). Se puede repetir.'
+        )
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=0,
+            help='Ignorar recorridos secuenciales sobre tablas con menos filas que este valor'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            raise CommandError(f'Motor no soportado: {connection.vendor}')
+
+        samples = self._sample_values()
+        self.min_rows = options['min_rows']
+        self.table_rows = {}
+        self.existing_indexes = self._existing_indexes()
+        suggestions = Counter()
+
+        client = Client()
+        with override_settings(ALLOWED_HOSTS=['*']):
+            for app_name, url_name, pattern in self._url_patterns():
+                if options['url_names'] and url_name not in options['url_names']:
+                    continue
+                sample_names = {**URL_KWARGS[app_name], **URL_NAME_KWARGS.get(url_name, {})}
+                kwargs = {
+                    name: samples[sample_names[name]]
+                    for name in pattern.pattern.converters
+                    if name in sample_names
+                }
+                if None in kwargs.values():
+                    self.stdout.write(self.style.NOTICE(f'\n{url_name}: sin datos de ejemplo, se omite'))
+                    continue
+                url = reverse(url_name, kwargs=kwargs)
+
+                if url_name in WRITE_SCENARIOS:
+                    method, body = WRITE_SCENARIOS[url_name]
+                    runs = [(method, body)]
+                else:
+                    runs = [
+                        ('get', {key: value.format(**samples) for key, value in params.items()})
+                        for params in SCENARIOS.get(url_name, [{}])
+                    ]
+
+                for method, data in runs:
+                    for suggestion in self._analyze(client, url_name, url, method, data):
+                        suggestions[suggestion] += 1
+
+        self.stdout.write('')
+        if not suggestions:
+            self.stdout.write(self.style.SUCCESS('Todas las consultas usan índices.'))
+            return
+        self.stdout.write(self.style.MIGRATE_HEADING('Índices sugeridos para Meta.indexes:'))
+        for suggestion, count in suggestions.most_common():
+            self.stdout.write(f'  {suggestion}  # {count} consulta(s)')
+
+    def _url_patterns(self):
+        """
+        Retorna (aplicación, nombre, patrón) de las URLs de productos y categorías.
+        """
+        for module in (product_urls, category_urls):
+            for pattern in module.urlpatterns:
+                if pattern.name:
+                    yield module.app_name, f'{module.app_name}:{pattern.name}', pattern
+
+    def _sample_values(self):
+        """
+        Obtiene valores reales del catálogo para construir las peticiones.
+        """
+        product = Product.objects.filter(is_active=True).select_related('category').first()
+        if product is None:
+            raise CommandError('No hay productos activos. Carga datos con load_data.py primero.')
+
+        prices = list(
+            Product.objects.filter(is_active=True).order_by('price').values_list('price', flat=True)[:1000]
+        )
+        return {
+            'product_id': product.id,
+            'category_id': product.category_id,
+            'category_name': product.category.name,
+            'search_term': product.name.split()[0][:20],
+            'price_low': str(prices[len(prices) // 4]),
+            'price_high': str(prices[(len(prices) * 3) // 4]),
+            'export_id': ProductExport.objects.filter(status=Task.DONE)
+                .order_by('-id').values_list('id', flat=True).first(),
+        }
+
+    def _existing_indexes(self):
+        """
+        Retorna las columnas de los índices declarados por tabla.
+        """
+        existing = {}
+        for model in apps.get_models():
+            table = model._meta.db_table
+            columns = existing.setdefault(table, [])
+            for index in model._meta.indexes:
+                columns.append([
+                    model._meta.get_field(name.lstrip('-')).column
+                    for name in index.fields
+                ])
+            for field in model._meta.fields:
+                if field.db_index or field.unique or field.primary_key:
+                    columns.append([field.column])
+        return existing
+
+    def _analyze(self, client, url_name, url, method, data):
+        """
+        Ejecuta una petición, explica sus consultas y retorna las sugerencias.
+        """
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                if method == 'get':
+                    response = client.get(url, data)
+                else:
+                    response = getattr(client, method)(
+                        url, json.dumps(data), content_type='application/json'
+                    )
+                elapsed = (time.perf_counter() - start) * 1000
+            transaction.set_rollback(True)
+
+        query_string = '&'.join(f'{key}={value}' for key, value in data.items()) if method == 'get' else ''
+        label = f'{method.upper()} {url}' + (f'?{query_string}' if query_string else '')
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{url_name}  {label}'))
+        self.stdout.write(
+            f'  estado {response.status_code}, {len(context.captured_queries)} consultas, {elapsed:.1f} ms'
+        )
+
+        # Agrupar por forma de la consulta para explicar cada una una sola vez
+        shapes = {}
+        for query in context.captured_queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            shape = _LITERAL_RE.sub('?', sql)
+            first_sql, count = shapes.get(shape, (sql, 0))
+            shapes[shape] = (first_sql, count + 1)
+
+        suggestions = []
+        for sql, count in shapes.values():
+            if count > 1:
+                self.stdout.write(self.style.WARNING(f'  Consulta repetida {count} veces (posible N+1)'))
+                self.stdout.write(f'    {sql[:200]}{"..." if len(sql) > 200 else ""}')
+            for issue, table, suggestion in self._issues(sql):
+                self.stdout.write(self.style.WARNING(f'  {issue}'))
+                self.stdout.write(f'    {sql[:200]}{"..." if len(sql) > 200 else ""}')
+                if suggestion:
+                    self.stdout.write(f'    sugerencia: {suggestion}')
+                    suggestions.append(suggestion)
+        return suggestions
+
+    def _issues(self, sql):
+        """
+        Explica una consulta y retorna (problema, tabla, sugerencia) por cada
+        recorrido secuencial u ordenamiento encontrado.
+        """
+        if connection.vendor == 'postgresql':
+            findings = self._explain_postgresql(sql)
+        else:
+            findings = self._explain_sqlite(sql)
+
+        issues = []
+        for kind, table in findings:
+            if table not in self.existing_indexes:
+                # Subconsultas y tablas temporales: no hay índice que sugerir
+                table = None
+            if kind == 'seq_scan':
+                if table is None:
+                    continue
+                rows = self._row_count(table)
+                if rows < self.min_rows:
+                    continue
+                issue = f'Recorrido secuencial sobre {table} ({rows} filas)'
+            else:
+                issue = f'Ordenamiento sin índice{f" sobre {table}" if table else ""}'
+            issues.append((issue, table, self._suggest_index(sql, table)))
+        return issues
+
+    def _explain_postgresql(self, sql):
+        """
+        Ejecuta EXPLAIN ANALYZE y recorre el plan en formato JSON.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (ANALYZE, FORMAT JSON) {sql}')
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        findings = []
+
+        def walk(node, parent_table=None):
+            table = node.get('Relation Name', parent_table)
+            if node['Node Type'] == 'Seq Scan':
+                findings.append(('seq_scan', table))
+            elif node['Node Type'] in ('Sort', 'Incremental Sort'):
+                child_tables = [child.get('Relation Name') for child in node.get('Plans', [])]
+                findings.append(('sort', next((t for t in child_tables if t), table)))
+            for child in node.get('Plans', []):
+                walk(child, table)
+
+        walk(plan[0]['Plan'])
+        return findings
+
+    def _explain_sqlite(self, sql):
+        """
+        Ejecuta EXPLAIN QUERY PLAN y busca recorridos y árboles temporales.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            details = [row[-1] for row in cursor.fetchall()]
+
+        findings = []
+        for detail in details:
+            match = re.match(r'SCAN (\w+)', detail)
+            if match and 'INDEX' not in detail:
+                findings.append(('seq_scan', match.group(1)))
+            elif 'USE TEMP B-TREE FOR ORDER BY' in detail:
+                table = next(
+                    (re.match(r'(?:SCAN|SEARCH) (\w+)', d).group(1)
+                     for d in details if re.match(r'(?:SCAN|SEARCH) (\w+)', d)),
+                    None
+                )
+                findings.append(('sort', table))
+        return findings
+
+    def _row_count(self, table):
+        """
+        Cuenta las filas de una tabla (con caché durante la ejecución).
+        """
+        if table not in self.table_rows:
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+                self.table_rows[table] = cursor.fetchone()[0]
+        return self.table_rows[table]
+
+    def _suggest_index(self, sql, table):
+        """
+        Construye una sugerencia de índice a partir de las columnas del
+        WHERE (primero) y del ORDER BY de la tabla indicada.
+        """
+        if not table:
+            return None
+        upper = sql.upper()
+        where_start = upper.find(' WHERE ')
+        order_start = upper.find(' ORDER BY ')
+        end = min((pos for pos in (upper.find(' LIMIT '), upper.find(' GROUP BY ')) if pos > 0), default=len(sql))
+
+        where_sql = sql[where_start:order_start if order_start > where_start else end] if where_start > 0 else ''
+        order_sql = sql[order_start:end] if order_start > 0 else ''
+
+        fields = []
+        condition = None
+        unindexable = set(_LEADING_WILDCARD_RE.findall(where_sql))
+        for column_table, column in _TABLE_COLUMN_RE.findall(where_sql):
+            if column_table != table or (column_table, column) in unindexable:
+                continue
+            if column == 'is_active':
+                condition = 'models.Q(is_active=True)'
+            elif column not in fields:
+                fields.append(column)
+        for column_table, column, direction in _ORDER_RE.findall(order_sql):
+            if column_table == table and column not in fields:
+                fields.append(column)
+
+        if not fields:
+            return None
+        if any(existing[:len(fields)] == fields for existing in self.existing_indexes.get(table, [])):
+            return None
+
+        names = [column[:-3] if column.endswith('_id') else column for column in fields]
+        suggestion = f"{table}: models.Index(fields={names!r}"
+        if condition:
+            suggestion += f', condition={condition}'
+        return suggestion + ')'
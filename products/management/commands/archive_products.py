@@ -0,0 +1,45 @@
+"""
+Comando para archivar los productos inactivos desde hace tiempo.
+
+Mueve los productos inactivos sin cambios en los últimos N días, junto con
+sus imágenes adicionales, a las tablas de archivo en transacciones por
+lotes. Siguen disponibles en GET /api/products/{id}/?archived=true.
+
+Uso:
+    python manage.py archive_products
+    python manage.py archive_products --days 180 --batch-size 500
+"""
+import logging
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from products.archive import archive_products
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Mueve los productos inactivos desde hace más de N días a las tablas de archivo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=180,
+            help='Archivar productos inactivos sin cambios en los últimos N días (por defecto 180)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Productos por transacción (por defecto 500)'
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['days'])
+        products, images = archive_products(before, batch_size=options['batch_size'])
+        logger.info('Productos archivados', extra={'products': products, 'images': images})
+        self.stdout.write(f'Productos archivados: {products}, imágenes: {images}')
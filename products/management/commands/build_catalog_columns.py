@@ -0,0 +1,56 @@
+"""
+Comando para generar la instantánea en columnas de los productos activos.
+
+Escribe una nueva generación en CATALOG_COLUMNS_DIR que los workers abren
+con mmap para resolver los filtros de /products/ y /products/search/.
+Después de la primera ejecución solo relee los productos modificados desde
+la anterior (según updated_at). Debe ejecutarse con más frecuencia que
+CATALOG_COLUMNS_MAX_AGE; si no, las vistas vuelven a usar SQL.
+
+Uso:
+    python manage.py build_catalog_columns
+    python manage.py build_catalog_columns --full
+    python manage.py build_catalog_columns --interval 30
+"""
+import logging
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products import columnar
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Genera la instantánea en columnas (NumPy) de los productos activos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Releer todos los productos, no solo los modificados'
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Repetir cada N segundos en lugar de ejecutar una sola vez'
+        )
+
+    def handle(self, *args, **options):
+        if columnar.np is None:
+            raise CommandError('La instantánea en columnas requiere NumPy (pip install numpy).')
+        full = options['full']
+        while True:
+            result = columnar.refresh_columns(full=full)
+            logger.info('Instantánea en columnas generada', extra=result)
+            self.stdout.write(
+                f"Productos: {result['products']}, leídos: {result['read']}"
+                f"{' (completa)' if result['full'] else ''}"
+            )
+            if not options['interval']:
+                return
+            full = False
+            time.sleep(options['interval'])
@@ -0,0 +1,64 @@
+"""
+Comando para generar las instantáneas estáticas en JSON del catálogo.
+
+Renderiza las primeras páginas de /products/, los productos de cada
+categoría y /categories/ en CATALOG_SNAPSHOT_DIR. Después de la primera
+ejecución solo regenera las páginas afectadas por los productos y
+categorías modificados desde la anterior (según updated_at).
+
+Uso:
+    python manage.py build_catalog_snapshot
+    python manage.py build_catalog_snapshot --full --pages 10
+    python manage.py build_catalog_snapshot --interval 60
+"""
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.static_snapshot import build_snapshot
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Genera instantáneas estáticas en JSON de las páginas públicas del catálogo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Regenerar todas las páginas, no solo las afectadas por cambios'
+        )
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=None,
+            help='Páginas de /products/ a generar (por defecto CATALOG_SNAPSHOT_PAGES)'
+        )
+        parser.add_argument(
+            '--base-url',
+            default=None,
+            help='URL pública de la API para los enlaces next/previous'
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Repetir cada N segundos en lugar de ejecutar una sola vez'
+        )
+
+    def handle(self, *args, **options):
+        full = options['full']
+        while True:
+            result = build_snapshot(full=full, pages=options['pages'], base_url=options['base_url'])
+            logger.info('Instantánea del catálogo generada', extra=result)
+            self.stdout.write(
+                f"Archivos escritos: {result['written']}, eliminados: {result['removed']}"
+                f"{' (completa)' if result['full'] else ''}"
+            )
+            if not options['interval']:
+                return
+            full = False
+            time.sleep(options['interval'])
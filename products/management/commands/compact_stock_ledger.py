@@ -0,0 +1,67 @@
+"""
+Comando para compactar el libro de movimientos de stock.
+
+Reemplaza los movimientos anteriores a la fecha de corte por una fila
+``snapshot`` por producto con el saldo acumulado, procesando los productos
+por lotes en transacciones cortas. Con --verify compara además el saldo del
+último movimiento de cada producto con su stock total.
+
+Uso:
+    python manage.py compact_stock_ledger
+    python manage.py compact_stock_ledger --older-than-days 30 --batch-size 500 --verify
+"""
+import logging
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from products.ledger import compact_ledger, ledger_mismatches
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Compacta los movimientos de stock antiguos en un saldo por producto'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=90,
+            help='Compactar los movimientos con más de N días (por defecto 90)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Productos por transacción (por defecto 500)'
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Comparar el saldo del libro con el stock de cada producto'
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['older_than_days'])
+        compacted, removed = compact_ledger(before, batch_size=options['batch_size'])
+        logger.info(
+            'Libro de stock compactado',
+            extra={'products': compacted, 'removed': removed}
+        )
+        self.stdout.write(
+            f'Productos compactados: {compacted}, movimientos eliminados: {removed}'
+        )
+
+        if not options['verify']:
+            return
+        mismatches = ledger_mismatches(batch_size=options['batch_size'])
+        for product_id, total, balance in mismatches:
+            self.stdout.write(
+                f'Producto {product_id}: stock {total}, saldo del libro {balance}'
+            )
+        if mismatches:
+            raise CommandError(f'{len(mismatches)} productos no cuadran con el libro de stock')
+        self.stdout.write('El libro de stock cuadra con el stock de todos los productos')
@@ -0,0 +1,48 @@
+"""
+Comando para liberar las reservas temporales de stock expiradas.
+
+Las reservas expiradas ya no cuentan en el stock disponible, pero sus filas
+siguen en la tabla hasta que este comando las elimina por lotes. Se puede
+ejecutar periódicamente desde cron o dejarlo corriendo con --interval.
+
+Uso:
+    python manage.py expire_stock_holds
+    python manage.py expire_stock_holds --interval 30 --batch-size 1000
+"""
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.stock import expire_holds
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Elimina por lotes las reservas temporales de stock expiradas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Reservas eliminadas por transacción (por defecto 1000)'
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Repetir cada N segundos en lugar de ejecutar una sola vez'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            removed = expire_holds(batch_size=options['batch_size'])
+            if removed:
+                logger.info('Reservas de stock expiradas eliminadas', extra={'removed': removed})
+            self.stdout.write(f'Reservas expiradas eliminadas: {removed}')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
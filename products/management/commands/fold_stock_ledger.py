@@ -0,0 +1,51 @@
+"""
+Comando para plegar los movimientos pendientes del libro en Product.stock.
+
+Las escrituras de stock solo agregan movimientos pendientes al libro; este
+comando los suma en la columna ``stock`` de cada producto por lotes y
+actualiza su ``updated_at`` para que el cambio llegue a /products/changes/
+y a las instantáneas. Cada escritura ya encola este pliegue en la cola de
+tareas (``manage.py run_worker``); el comando sirve sin workers o para
+plegar a mano, desde cron o dejándolo corriendo con --interval.
+
+Uso:
+    python manage.py fold_stock_ledger
+    python manage.py fold_stock_ledger --interval 5
+"""
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.ledger import fold_movements
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Pliega los movimientos de stock pendientes en el stock de cada producto'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Productos por transacción (por defecto 500)'
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Repetir cada N segundos en lugar de ejecutar una sola vez'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            folded = fold_movements(batch_size=options['batch_size'])
+            if folded:
+                logger.info('Libro de stock plegado', extra={'products': folded})
+            self.stdout.write(f'Productos con movimientos plegados: {folded}')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
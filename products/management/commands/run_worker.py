@@ -0,0 +1,125 @@
+"""
+Comando para ejecutar los workers de la cola de tareas en base de datos.
+
+Con --processes N arranca N procesos hijos que reclaman y ejecutan tareas
+en paralelo; si uno termina (por --max-tasks o por un error) se reemplaza.
+SIGTERM o Ctrl+C detienen los workers después de la tarea en curso.
+
+Los hijos se crean con fork y envían sus registros al proceso principal,
+que es el único que escribe y rota el archivo de log.
+
+Para agregar las métricas de todos los procesos en /metrics, definir
+PROMETHEUS_MULTIPROC_DIR también en el entorno de los workers.
+
+Uso:
+    python manage.py run_worker
+    python manage.py run_worker --processes 4 --max-tasks 500
+    python manage.py run_worker --burst
+"""
+import logging
+import multiprocessing
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from catalogo_backend.logging_utils import share_with_children
+from products.queue import work
+
+
+logger = logging.getLogger(__name__)
+
+
+def _run_worker(poll_interval, burst, max_tasks):
+    """
+    Ciclo de un worker que termina limpiamente con SIGTERM o SIGINT.
+    """
+    stopping = []
+
+    def stop(signum, frame):
+        stopping.append(signum)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    return work(
+        poll_interval=poll_interval,
+        burst=burst,
+        max_tasks=max_tasks,
+        should_stop=lambda: bool(stopping),
+    )
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta workers que procesan la cola de tareas en base de datos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=1,
+            help='Procesos worker en paralelo (por defecto 1)'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Segundos de espera cuando no hay tareas (por defecto 1)'
+        )
+        parser.add_argument(
+            '--max-tasks',
+            type=int,
+            default=None,
+            help='Tareas por proceso antes de reemplazarlo'
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Terminar cuando no queden tareas listas'
+        )
+
+    def handle(self, *args, **options):
+        worker_args = (options['poll_interval'], options['burst'], options['max_tasks'])
+        if options['processes'] <= 1:
+            processed = _run_worker(*worker_args)
+            self.stdout.write(f'Tareas ejecutadas: {processed}')
+            return
+
+        stopping = []
+
+        def stop(signum, frame):
+            stopping.append(signum)
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        # Los hijos heredan la configuración de Django y de logging ya cargada
+        context = multiprocessing.get_context('fork')
+        share_with_children()
+
+        def start():
+            # Los hijos no deben heredar las conexiones abiertas del padre
+            connections.close_all()
+            process = context.Process(target=_run_worker, args=worker_args, daemon=True)
+            process.start()
+            return process
+
+        processes = [start() for _ in range(options['processes'])]
+        logger.info('Workers iniciados', extra={'processes': len(processes)})
+        while processes and not stopping:
+            time.sleep(options['poll_interval'])
+            for index, process in enumerate(processes):
+                if process.is_alive():
+                    continue
+                if options['burst'] and process.exitcode == 0:
+                    processes[index] = None
+                    continue
+                if process.exitcode:
+                    logger.warning('Worker terminado con error', extra={'exitcode': process.exitcode})
+                processes[index] = start()
+            processes = [process for process in processes if process is not None]
+
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+        self.stdout.write('Workers detenidos')
@@ -0,0 +1,56 @@
+"""
+Comando para reportar los cambios de stock bajo.
+
+Lee del índice parcial los productos que hoy están por debajo de su umbral
+de reposición, abre una alerta para los que entraron desde la pasada
+anterior y cierra las de los que se repusieron. Solo se registran y
+reportan los cambios; GET /api/products/low-stock/?since= los expone.
+
+Uso:
+    python manage.py scan_low_stock
+    python manage.py scan_low_stock --interval 300
+"""
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.low_stock import scan_low_stock
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Abre y cierra alertas de stock bajo según el umbral de reposición'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Repetir cada N segundos en lugar de ejecutar una sola vez'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            opened, resolved = scan_low_stock()
+            for alert in opened:
+                logger.warning(
+                    'Producto con stock bajo',
+                    extra={
+                        'product_id': alert.product_id,
+                        'stock': alert.stock,
+                        'reorder_level': alert.reorder_level,
+                    }
+                )
+                self.stdout.write(
+                    f'Stock bajo: producto {alert.product_id} '
+                    f'({alert.stock} <= {alert.reorder_level})'
+                )
+            if resolved:
+                logger.info('Alertas de stock bajo resueltas', extra={'resolved': len(resolved)})
+            self.stdout.write(f'Alertas abiertas: {len(opened)}, resueltas: {len(resolved)}')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
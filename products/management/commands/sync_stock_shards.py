@@ -0,0 +1,50 @@
+"""
+Comando para publicar los cambios de stock de los productos fraccionados.
+
+Las escrituras en las fracciones no actualizan la fila del producto; este
+comando reparte de nuevo el stock de los productos con fracciones marcadas
+y actualiza su ``updated_at`` para que el cambio llegue a
+/products/changes/ y a las instantáneas. Se puede ejecutar desde cron o
+dejarlo corriendo con --interval.
+
+Uso:
+    python manage.py sync_stock_shards
+    python manage.py sync_stock_shards --interval 5
+"""
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.shards import sync_sharded_products
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Reparte y publica el stock de los productos fraccionados con cambios'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Productos leídos por consulta (por defecto 100)'
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Repetir cada N segundos en lugar de ejecutar una sola vez'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            synced = sync_sharded_products(batch_size=options['batch_size'])
+            if synced:
+                logger.info('Stock fraccionado sincronizado', extra={'products': synced})
+            self.stdout.write(f'Productos fraccionados sincronizados: {synced}')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,43 @@
+"""
+Índices para las búsquedas del admin de productos.
+
+El admin busca con ``name__istartswith`` y ``sku__iexact``, que en
+PostgreSQL se traducen a ``UPPER(campo::text) LIKE 'X%'`` y
+``UPPER(campo::text) = 'X'``. Solo un índice sobre la misma expresión con
+``text_pattern_ops`` puede resolverlas sin recorrer toda la tabla. En
+otros motores la migración no hace nada.
+"""
+from django.db import migrations
+
+
+INDEXES = {
+    'products_name_upper_like_idx': 'UPPER("name"::text) text_pattern_ops',
+    'products_sku_upper_like_idx': 'UPPER("sku"::text) text_pattern_ops',
+}
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, expression in INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "products" ({expression})'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
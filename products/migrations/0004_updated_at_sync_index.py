@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 02:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0002_updated_at_sync_index'),
+        ('products', '0003_product_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['updated_at', 'id'], name='products_updated_idx'),
+        ),
+    ]
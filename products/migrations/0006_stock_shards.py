@@ -0,0 +1,37 @@
+# Generated by Django 5.0.1 on 2026-10-19 03:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_stock_holds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='stock_shards',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Si es mayor que cero, el stock se reparte en este número de filas StockShard para repartir la contención de escritura', verbose_name='Fracciones de stock'),
+        ),
+        migrations.CreateModel(
+            name='StockShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField(verbose_name='Fracción')),
+                ('stock', models.PositiveIntegerField(default=0, verbose_name='Stock')),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='stock_shard_rows', to='products.product', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Fracción de stock',
+                'verbose_name_plural': 'Fracciones de stock',
+                'db_table': 'products_stock_shards',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='stockshard',
+            constraint=models.UniqueConstraint(fields=('product', 'shard'), name='stock_shards_product_shard_uniq'),
+        ),
+    ]
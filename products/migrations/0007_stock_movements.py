@@ -0,0 +1,70 @@
+# Generated by Django 5.0.1 on 2026-10-19 03:19
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Sum
+from django.utils import timezone
+
+
+def create_opening_balances(apps, schema_editor):
+    """
+    Registra el stock actual de cada producto como saldo inicial del libro.
+    """
+    Product = apps.get_model('products', 'Product')
+    StockShard = apps.get_model('products', 'StockShard')
+    StockMovement = apps.get_model('products', 'StockMovement')
+    now = timezone.now()
+    last_id = 0
+    while True:
+        rows = list(
+            Product.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'stock')[:1000]
+        )
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        shards = dict(
+            StockShard.objects.filter(product_id__in=[row[0] for row in rows])
+            .order_by().values('product').annotate(total=Sum('stock'))
+            .values_list('product', 'total')
+        )
+        StockMovement.objects.bulk_create([
+            StockMovement(
+                product_id=product_id,
+                quantity=stock + shards.get(product_id, 0),
+                balance=stock + shards.get(product_id, 0),
+                reason='snapshot',
+                created_at=now,
+            )
+            for product_id, stock in rows
+            if stock + shards.get(product_id, 0)
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_stock_shards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField(verbose_name='Variación')),
+                ('balance', models.IntegerField(verbose_name='Saldo')),
+                ('reason', models.CharField(choices=[('create', 'Creación'), ('add', 'Entrada'), ('reduce', 'Salida'), ('set', 'Ajuste'), ('update', 'Edición'), ('reserve', 'Reserva'), ('snapshot', 'Saldo compactado')], max_length=10, verbose_name='Motivo')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha')),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='products.product', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Movimiento de stock',
+                'verbose_name_plural': 'Movimientos de stock',
+                'db_table': 'products_stock_movements',
+                'indexes': [models.Index(fields=['product', 'created_at'], name='stock_movements_product_idx')],
+            },
+        ),
+        migrations.RunPython(create_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.0.1 on 2026-10-19 03:21
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def create_initial_prices(apps, schema_editor):
+    """
+    Registra el precio actual de cada producto en su fecha de creación.
+    """
+    Product = apps.get_model('products', 'Product')
+    PriceChange = apps.get_model('products', 'PriceChange')
+    last_id = 0
+    while True:
+        rows = list(
+            Product.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'price', 'created_at')[:1000]
+        )
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        PriceChange.objects.bulk_create([
+            PriceChange(product_id=product_id, price=price, changed_at=created_at)
+            for product_id, price, created_at in rows
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0002_updated_at_sync_index'),
+        ('products', '0007_stock_movements'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Precio')),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha del cambio')),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='price_changes', to='products.product', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Cambio de precio',
+                'verbose_name_plural': 'Cambios de precio',
+                'db_table': 'products_price_changes',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyPrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Fecha')),
+                ('open_price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Precio de apertura')),
+                ('min_price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Precio mínimo')),
+                ('max_price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Precio máximo')),
+                ('close_price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Precio de cierre')),
+                ('category', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='daily_prices', to='categories.category', verbose_name='Categoría')),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='daily_prices', to='products.product', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Precio diario',
+                'verbose_name_plural': 'Precios diarios',
+                'db_table': 'products_daily_prices',
+                'indexes': [models.Index(fields=['category', 'day', 'min_price'], name='daily_prices_category_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailyprice',
+            constraint=models.UniqueConstraint(fields=('product', 'day'), name='daily_prices_product_day_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='pricechange',
+            index=models.Index(fields=['product', 'changed_at'], name='price_changes_product_idx'),
+        ),
+        migrations.RunPython(create_initial_prices, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.0.1 on 2026-10-19 03:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0003_reorder_threshold'),
+        ('products', '0008_price_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LowStockAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stock', models.IntegerField(verbose_name='Stock')),
+                ('reorder_level', models.PositiveIntegerField(verbose_name='Nivel de reposición')),
+                ('opened_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Abierta')),
+                ('resolved_at', models.DateTimeField(blank=True, null=True, verbose_name='Resuelta')),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Último cambio')),
+            ],
+            options={
+                'verbose_name': 'Alerta de stock bajo',
+                'verbose_name_plural': 'Alertas de stock bajo',
+                'db_table': 'products_low_stock_alerts',
+            },
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='reorder_level',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Nivel de reposición'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='reorder_threshold',
+            field=models.PositiveIntegerField(blank=True, help_text='Stock a partir del cual el producto se reporta como bajo; si se deja vacío, se usa el umbral de la categoría', null=True, verbose_name='Umbral de reposición'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True), ('reorder_level__gt', 0), ('stock__lte', models.F('reorder_level'))), fields=['category', 'stock'], name='products_low_stock_idx'),
+        ),
+        migrations.AddField(
+            model_name='lowstockalert',
+            name='product',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='low_stock_alerts', to='products.product', verbose_name='Producto'),
+        ),
+        migrations.AddIndex(
+            model_name='lowstockalert',
+            index=models.Index(fields=['changed_at', 'id'], name='low_stock_alerts_changed_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='lowstockalert',
+            constraint=models.UniqueConstraint(condition=models.Q(('resolved_at__isnull', True)), fields=('product',), name='low_stock_alerts_open_uniq'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.1 on 2026-10-19 03:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0004_category_deactivations'),
+        ('products', '0009_low_stock_alerts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='deactivated_by',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='products', to='categories.categorydeactivation', verbose_name='Desactivado por'),
+        ),
+    ]
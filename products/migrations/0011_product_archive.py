@@ -0,0 +1,54 @@
+# Generated by Django 5.0.1 on 2026-10-19 03:27
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0004_category_deactivations'),
+        ('products', '0010_product_deactivated_by'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedProduct',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='Nombre del producto')),
+                ('description', models.TextField(verbose_name='Descripción')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Precio')),
+                ('image', models.ImageField(blank=True, null=True, upload_to='products/images/', verbose_name='Imagen')),
+                ('stock', models.PositiveIntegerField(default=0, verbose_name='Stock')),
+                ('sku', models.CharField(blank=True, max_length=50, null=True, unique=True, verbose_name='SKU')),
+                ('created_at', models.DateTimeField(verbose_name='Fecha de creación')),
+                ('updated_at', models.DateTimeField(verbose_name='Fecha de actualización')),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de archivo')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_products', to='categories.category', verbose_name='Categoría')),
+            ],
+            options={
+                'verbose_name': 'Producto archivado',
+                'verbose_name_plural': 'Productos archivados',
+                'db_table': 'products_archive',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedProductImage',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.ImageField(upload_to='products/additional/', verbose_name='Imagen')),
+                ('alt_text', models.CharField(blank=True, max_length=200, verbose_name='Texto alternativo')),
+                ('is_primary', models.BooleanField(default=False, verbose_name='Imagen principal')),
+                ('created_at', models.DateTimeField(verbose_name='Fecha de creación')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='additional_images', to='products.archivedproduct', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Imagen de producto archivado',
+                'verbose_name_plural': 'Imágenes de productos archivados',
+                'db_table': 'products_images_archive',
+                'ordering': ['-is_primary', 'created_at'],
+            },
+        ),
+    ]
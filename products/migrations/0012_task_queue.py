@@ -0,0 +1,60 @@
+# Generated by Django 5.0.1 on 2026-10-19 03:41
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_product_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Task',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Tarea')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Argumentos')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('running', 'En ejecución'), ('done', 'Completada'), ('failed', 'Fallida')], default='pending', max_length=10, verbose_name='Estado')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Intentos')),
+                ('max_attempts', models.PositiveIntegerField(default=3, verbose_name='Máximo de intentos')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Ejecutar desde')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de creación')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Inicio')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Fin')),
+                ('locked_by', models.CharField(blank=True, max_length=100, verbose_name='Worker')),
+                ('locked_until', models.DateTimeField(blank=True, null=True, verbose_name='Bloqueada hasta')),
+                ('last_error', models.TextField(blank=True, verbose_name='Último error')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='Resultado')),
+            ],
+            options={
+                'verbose_name': 'Tarea',
+                'verbose_name_plural': 'Tareas',
+                'db_table': 'products_tasks',
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskLock',
+            fields=[
+                ('task', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='lock', serialize=False, to='products.task', verbose_name='Tarea')),
+                ('locked_by', models.CharField(max_length=100, verbose_name='Worker')),
+                ('locked_until', models.DateTimeField(verbose_name='Bloqueada hasta')),
+            ],
+            options={
+                'verbose_name': 'Bloqueo de tarea',
+                'verbose_name_plural': 'Bloqueos de tareas',
+                'db_table': 'products_task_locks',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['run_at', 'id'], name='tasks_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status', 'running')), fields=['locked_until'], name='tasks_running_idx'),
+        ),
+    ]
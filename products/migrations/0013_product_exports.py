@@ -0,0 +1,39 @@
+# Generated by Django 5.0.1 on 2026-10-19 03:44
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_task_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductExport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('format', models.CharField(choices=[('csv', 'CSV'), ('xlsx', 'Excel (XLSX)')], default='csv', max_length=4, verbose_name='Formato')),
+                ('filters', models.JSONField(blank=True, default=dict, verbose_name='Filtros')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('running', 'En ejecución'), ('done', 'Completada'), ('failed', 'Fallida')], default='pending', max_length=10, verbose_name='Estado')),
+                ('total', models.PositiveIntegerField(blank=True, null=True, verbose_name='Total de productos')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Productos exportados')),
+                ('file', models.FileField(blank=True, upload_to='exports/', verbose_name='Archivo')),
+                ('size', models.PositiveBigIntegerField(blank=True, null=True, verbose_name='Tamaño (bytes)')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de creación')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Inicio')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Fin')),
+                ('task', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='products.task', verbose_name='Tarea')),
+            ],
+            options={
+                'verbose_name': 'Exportación de productos',
+                'verbose_name_plural': 'Exportaciones de productos',
+                'db_table': 'products_exports',
+                'ordering': ['-created_at', '-id'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 03:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0013_product_exports'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockshard',
+            name='dirty',
+            field=models.BooleanField(default=False, verbose_name='Con cambios sin publicar'),
+        ),
+    ]
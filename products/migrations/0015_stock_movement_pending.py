@@ -0,0 +1,22 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0014_stock_shard_dirty'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockmovement',
+            name='pending',
+            field=models.BooleanField(default=False, verbose_name='Pendiente de plegar'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(condition=models.Q(('pending', True)), fields=['product'], name='stock_movements_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0015_stock_movement_pending'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dailyprice',
+            name='product',
+            field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='daily_prices', to='products.product', verbose_name='Producto'),
+        ),
+        migrations.AlterField(
+            model_name='pricechange',
+            name='product',
+            field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='price_changes', to='products.product', verbose_name='Producto'),
+        ),
+        migrations.AlterField(
+            model_name='stockmovement',
+            name='product',
+            field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='stock_movements', to='products.product', verbose_name='Producto'),
+        ),
+    ]
@@ -6,6 +6,7 @@ from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from categories.models import Category
+from .events import TRACKED_FIELDS, product_event, publish_on_commit
 
 
 class Product(models.Model):
@@ -18,9 +19,14 @@ class Product(models.Model):
         price: Precio del producto (en centavos para evitar problemas de decimales)
         category: Categoría a la que pertenece el producto
         image: Imagen del producto (opcional)
-        stock: Cantidad disponible en inventario
+        stock: Cantidad disponible en inventario (con stock fraccionado, la
+            parte no asignada a ninguna fracción)
+        stock_shards: Número de fracciones de stock, 0 si no se fracciona
+        reorder_threshold: Umbral de stock bajo propio del producto (opcional)
+        reorder_level: Umbral efectivo de stock bajo, 0 si no tiene
         sku: Código único del producto
         is_active: Indica si el producto está activo
+        deactivated_by: Desactivación de categoría que apagó el producto (opcional)
         created_at: Fecha de creación del registro
         updated_at: Fecha de última actualización
     """
@@ -67,6 +73,28 @@ class Product(models.Model):
         help_text='Cantidad disponible en inventario'
     )
     
+    reorder_threshold = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        verbose_name='Umbral de reposición',
+        help_text='Stock a partir del cual el producto se reporta como bajo; '
+                  'si se deja vacío, se usa el umbral de la categoría'
+    )
+    
+    # Umbral efectivo (el del producto o el de la categoría, 0 si ninguno),
+    # guardado en la fila para que lo cubra el índice parcial de stock bajo
+    reorder_level = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Nivel de reposición'
+    )
+    
+    stock_shards = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Fracciones de stock',
+        help_text='Si es mayor que cero, el stock se reparte en este número de '
+                  'filas StockShard para repartir la contención de escritura'
+    )
     sku = models.CharField(
         max_length=50,
         unique=True,
@@ -82,6 +110,18 @@ class Product(models.Model):
         help_text='Indica si el producto está disponible'
     )
     
+    # Desactivación en cascada de la categoría que apagó el producto, para
+    # que la restauración reactive solo esos productos
+    deactivated_by = models.ForeignKey(
+        'categories.CategoryDeactivation',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='products',
+        editable=False,
+        verbose_name='Desactivado por'
+    )
+    
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Fecha de creación'
@@ -98,13 +138,47 @@ class Product(models.Model):
         """
         verbose_name = 'Producto'
         verbose_name_plural = 'Productos'
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
         db_table = 'products'
+        # Todas las consultas públicas filtran is_active=True, así que los
+        # índices son parciales sobre los productos activos. La llave foránea
+        # category ya tiene su propio índice.
         indexes = [
             models.Index(fields=['name']),
-            models.Index(fields=['category']),
-            models.Index(fields=['price']),
-            models.Index(fields=['is_active']),
+            models.Index(fields=['updated_at', 'id'], name='products_updated_idx'),
+            models.Index(
+                fields=['created_at', 'id'],
+                condition=models.Q(is_active=True),
+                name='products_active_created_idx',
+            ),
+            models.Index(
+                fields=['category', 'price'],
+                condition=models.Q(is_active=True),
+                name='products_active_cat_price_idx',
+            ),
+            models.Index(
+                fields=['category', 'created_at'],
+                condition=models.Q(is_active=True),
+                name='products_active_cat_date_idx',
+            ),
+            models.Index(
+                fields=['price'],
+                condition=models.Q(is_active=True),
+                name='products_active_price_idx',
+            ),
+            models.Index(
+                fields=['stock'],
+                condition=models.Q(is_active=True, stock__gt=0),
+                name='products_in_stock_idx',
+            ),
+            # Solo contiene los productos por debajo de su umbral de reposición
+            models.Index(
+                fields=['category', 'stock'],
+                condition=models.Q(
+                    is_active=True, reorder_level__gt=0, stock__lte=models.F('reorder_level')
+                ),
+                name='products_low_stock_idx',
+            ),
         ]
 
     def __str__(self):
@@ -113,9 +187,27 @@ class Product(models.Model):
         """
         return f"{self.name} - {self.category.name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Guarda los valores cargados de los campos que generan eventos.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._tracked_values = {
+            field: getattr(instance, field)
+            for field in TRACKED_FIELDS
+            if field in field_names
+        }
+        return instance
+
     def save(self, *args, **kwargs):
         """
-        Sobrescribe el método save para generar SKU automáticamente.
+        Sobrescribe el método save para generar SKU automáticamente y
+        publicar los cambios de stock, precio o estado.
+        
+        En un producto existente no se escribe ``stock``: se cambia con
+        add_stock(), reduce_stock() o set_stock(), que lo registran en el
+        libro de movimientos.
         """
         if not self.sku:
             # Generar SKU basado en el nombre y la fecha
@@ -125,7 +217,71 @@ class Product(models.Model):
             unique_id = str(uuid.uuid4())[:8].upper()
             self.sku = f"{name_slug}-{date_slug}-{unique_id}"
         
+        update_fields = kwargs.get('update_fields')
+        # Un producto reactivado a mano ya no depende de la restauración de su categoría
+        if self.is_active and self.deactivated_by_id and (
+            update_fields is None or 'is_active' in update_fields
+        ):
+            self.deactivated_by = None
+            if update_fields is not None:
+                update_fields = kwargs['update_fields'] = {*update_fields, 'deactivated_by'}
+        if update_fields is None or {'reorder_threshold', 'category'} & set(update_fields):
+            self.reorder_level = self.get_reorder_level()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'reorder_level'}
+        
+        adding = self._state.adding
+        # Product.stock solo lo escribe el pliegue del libro (ver ledger.py)
+        if not adding:
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None:
+                update_fields = [
+                    field.attname for field in self._meta.concrete_fields
+                    if not field.primary_key and field.attname in self.__dict__
+                ]
+            kwargs['update_fields'] = [field for field in update_fields if field != 'stock']
+        
         super().save(*args, **kwargs)
+        self._publish_changes(adding)
+
+    def _publish_changes(self, adding):
+        """
+        Publica un evento si cambió algún campo seguido desde la carga y
+        registra los cambios de stock y de precio en sus historiales.
+        """
+        previous = getattr(self, '_tracked_values', {})
+        current = {
+            field: getattr(self, field)
+            for field in TRACKED_FIELDS
+            if adding or field in previous
+        }
+        # Los cambios de stock de un producto existente ya los publicó el libro
+        if adding or any(
+            previous[field] != value for field, value in current.items() if field != 'stock'
+        ):
+            from .availability import invalidate_stock
+            from .ledger import record_movements, stock_movement
+            from .prices import record_price_change
+            invalidate_stock([self.id])
+            total = self.stock if adding else self.get_total_stock()
+            if adding and 'stock' in current:
+                record_movements([stock_movement(self.id, current['stock'], total, 'create')])
+            if 'price' in current and (adding or previous['price'] != current['price']):
+                record_price_change(self.id, self.category_id, previous.get('price'), self.price)
+            publish_on_commit(product_event(
+                self.id, self.category_id, total, self.price, self.is_active, self.updated_at
+            ))
+        self._tracked_values = current
+
+    def get_reorder_level(self):
+        """
+        Retorna el umbral de reposición propio o, si no tiene, el de su categoría.
+        """
+        if self.reorder_threshold is not None:
+            return self.reorder_threshold
+        return Category.objects.filter(pk=self.category_id).values_list(
+            'reorder_threshold', flat=True
+        ).first() or 0
 
     def get_price_display(self):
         """
@@ -133,11 +289,27 @@ class Product(models.Model):
         """
         return f"${self.price:,.2f}"
 
+    def get_total_stock(self):
+        """
+        Retorna el stock total, sumando las fracciones y los movimientos
+        pendientes del libro.
+
+        Los listados anotan ``total_stock`` (ver availability.total_stock())
+        para no consultarlo producto por producto.
+        """
+        if 'total_stock' in self.__dict__:
+            return self.total_stock
+        if self._state.adding:
+            return self.stock
+        from .shards import stock_totals
+        self.total_stock = stock_totals([self.id])[self.id]
+        return self.total_stock
+
     def is_in_stock(self):
         """
         Verifica si el producto tiene stock disponible.
         """
-        return self.stock > 0
+        return self.get_total_stock() > 0
 
     def reduce_stock(self, quantity):
         """
@@ -149,11 +321,11 @@ class Product(models.Model):
         Returns:
             bool: True si se pudo reducir el stock, False en caso contrario
         """
-        if self.stock >= quantity:
-            self.stock -= quantity
-            self.save(update_fields=['stock', 'updated_at'])
-            return True
-        return False
+        if self.stock_shards:
+            from .shards import reduce_sharded_stock
+            return reduce_sharded_stock(self, quantity)
+        from .ledger import append_stock
+        return append_stock(self, 'reduce', -quantity) is not None
 
     def add_stock(self, quantity):
         """
@@ -162,8 +334,27 @@ class Product(models.Model):
         Args:
             quantity: Cantidad a agregar
         """
-        self.stock += quantity
-        self.save(update_fields=['stock', 'updated_at'])
+        if self.stock_shards:
+            from .shards import add_sharded_stock
+            add_sharded_stock(self, quantity)
+            return
+        from .ledger import append_stock
+        append_stock(self, 'add', quantity)
+    
+    def set_stock(self, quantity, reason='set'):
+        """
+        Fija el stock total del producto.
+        
+        Args:
+            quantity: Nuevo stock total
+            reason: Motivo del movimiento
+        """
+        if self.stock_shards:
+            from .shards import set_sharded_stock
+            set_sharded_stock(self, quantity)
+            return
+        from .ledger import append_stock
+        append_stock(self, reason, target=quantity)
 
     def soft_delete(self):
         """
@@ -231,3 +422,739 @@ class ProductImage(models.Model):
         super().save(*args, **kwargs)
 
 
+
+
+class StockShard(models.Model):
+    """
+    Fracción del stock de un producto con stock fraccionado.
+
+    Las escrituras frecuentes sobre un mismo producto se reparten entre
+    varias filas elegidas al azar en lugar de esperar el bloqueo de la fila
+    del producto. El stock total es ``Product.stock`` más la suma de las
+    fracciones.
+
+    Atributos:
+        product: Producto al que pertenece la fracción
+        shard: Número de la fracción, de 0 a stock_shards - 1
+        stock: Unidades asignadas a la fracción
+        dirty: La fracción cambió desde la última sincronización del producto
+    """
+    
+    # Sin índice propio: lo cubre la restricción única (product, shard)
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='stock_shard_rows',
+        db_index=False,
+        verbose_name='Producto'
+    )
+    shard = models.PositiveSmallIntegerField(
+        verbose_name='Fracción'
+    )
+    stock = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Stock'
+    )
+    # Marca barata de cambio: la pone cada escritura en la fracción y la
+    # limpia sync_sharded_products() al publicar el producto
+    dirty = models.BooleanField(
+        default=False,
+        verbose_name='Con cambios sin publicar'
+    )
+
+    class Meta:
+        verbose_name = 'Fracción de stock'
+        verbose_name_plural = 'Fracciones de stock'
+        db_table = 'products_stock_shards'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['product', 'shard'],
+                name='stock_shards_product_shard_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}#{self.shard}: {self.stock}"
+
+
+class StockMovement(models.Model):
+    """
+    Movimiento de stock en el libro de inventario (solo inserciones).
+
+    Cada cambio de stock agrega una fila con la variación y el stock total
+    resultante, en la misma transacción que el cambio. En los productos sin
+    fracciones la fila queda pendiente hasta que fold_movements() la pliega
+    en ``Product.stock`` (ver ledger.py). El comando compact_stock_ledger
+    reemplaza los movimientos antiguos de cada producto por una fila
+    ``snapshot`` con el saldo acumulado.
+
+    Atributos:
+        product: Producto afectado
+        quantity: Variación del stock (negativa en los descuentos)
+        balance: Stock total del producto después del movimiento
+        reason: Origen del movimiento
+        created_at: Momento del movimiento
+        pending: Si la variación todavía no se plegó en Product.stock
+    """
+    
+    REASONS = [
+        ('create', 'Creación'),
+        ('add', 'Entrada'),
+        ('reduce', 'Salida'),
+        ('set', 'Ajuste'),
+        ('update', 'Edición'),
+        ('reserve', 'Reserva'),
+        ('snapshot', 'Saldo compactado'),
+    ]
+    
+    # Sin índice propio: lo cubre el índice compuesto (product, created_at).
+    # Sin restricción ni cascada: el libro se conserva al archivar el producto
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='stock_movements',
+        db_index=False,
+        verbose_name='Producto'
+    )
+    quantity = models.IntegerField(
+        verbose_name='Variación'
+    )
+    balance = models.IntegerField(
+        verbose_name='Saldo'
+    )
+    reason = models.CharField(
+        max_length=10,
+        choices=REASONS,
+        verbose_name='Motivo'
+    )
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Fecha'
+    )
+    # Los movimientos ya plegados (la gran mayoría) quedan fuera del índice parcial
+    pending = models.BooleanField(
+        default=False,
+        verbose_name='Pendiente de plegar'
+    )
+
+    class Meta:
+        verbose_name = 'Movimiento de stock'
+        verbose_name_plural = 'Movimientos de stock'
+        db_table = 'products_stock_movements'
+        indexes = [
+            models.Index(fields=['product', 'created_at'], name='stock_movements_product_idx'),
+            models.Index(
+                fields=['product'],
+                condition=models.Q(pending=True),
+                name='stock_movements_pending_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.quantity:+d} ({self.reason})"
+
+
+class StockHold(models.Model):
+    """
+    Reserva temporal de stock de un producto.
+
+    Mientras no expire, la cantidad reservada se descuenta del stock
+    disponible sin modificar la fila del producto. Al confirmar la compra
+    la reserva se convierte en un descuento de stock; si expira, la
+    elimina el comando expire_stock_holds.
+
+    Atributos:
+        product: Producto reservado
+        token: Identificador compartido por las reservas de un mismo carrito
+        quantity: Cantidad reservada
+        expires_at: Momento en que la reserva deja de contar
+        created_at: Fecha de creación de la reserva
+    """
+    
+    # Sin índice propio: lo cubre el índice compuesto (product, expires_at)
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='holds',
+        db_index=False,
+        verbose_name='Producto'
+    )
+    token = models.CharField(
+        max_length=32,
+        db_index=True,
+        verbose_name='Token'
+    )
+    quantity = models.PositiveIntegerField(
+        validators=[MinValueValidator(1)],
+        verbose_name='Cantidad'
+    )
+    expires_at = models.DateTimeField(
+        verbose_name='Expira'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Fecha de creación'
+    )
+
+    class Meta:
+        verbose_name = 'Reserva de stock'
+        verbose_name_plural = 'Reservas de stock'
+        db_table = 'products_stock_holds'
+        indexes = [
+            # Barrido de reservas expiradas por lotes
+            models.Index(fields=['expires_at'], name='stock_holds_expires_idx'),
+            # Suma de reservas vigentes por producto
+            models.Index(fields=['product', 'expires_at'], name='stock_holds_product_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_id} hasta {self.expires_at:%Y-%m-%d %H:%M}"
+
+
+class PriceChange(models.Model):
+    """
+    Cambio de precio de un producto.
+
+    Se registra una fila solo cuando el precio cambia realmente; el precio
+    vigente en cualquier momento es el del último cambio anterior.
+
+    Atributos:
+        product: Producto afectado
+        price: Nuevo precio
+        changed_at: Momento del cambio
+    """
+    
+    # Sin índice propio: lo cubre el índice compuesto (product, changed_at).
+    # Sin restricción ni cascada: el historial se conserva al archivar el producto
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='price_changes',
+        db_index=False,
+        verbose_name='Producto'
+    )
+    price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        verbose_name='Precio'
+    )
+    changed_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Fecha del cambio'
+    )
+
+    class Meta:
+        verbose_name = 'Cambio de precio'
+        verbose_name_plural = 'Cambios de precio'
+        db_table = 'products_price_changes'
+        indexes = [
+            models.Index(fields=['product', 'changed_at'], name='price_changes_product_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.price} ({self.changed_at:%Y-%m-%d %H:%M})"
+
+
+class DailyPrice(models.Model):
+    """
+    Resumen diario de precios de un producto, solo para los días con cambios.
+
+    ``min_price`` y ``max_price`` incluyen el precio con el que abrió el día,
+    así que el mínimo de un producto en un rango de días es el mínimo de sus
+    filas en el rango y de su precio actual: entre cambios el precio no varía.
+
+    Atributos:
+        product: Producto
+        category: Categoría del producto el día del cambio
+        day: Fecha
+        open_price: Precio antes del primer cambio del día
+        min_price: Precio mínimo del día
+        max_price: Precio máximo del día
+        close_price: Precio al final del día
+    """
+    
+    # Sin restricción ni cascada: el resumen se conserva al archivar el producto
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='daily_prices',
+        db_index=False,
+        verbose_name='Producto'
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='daily_prices',
+        db_index=False,
+        verbose_name='Categoría'
+    )
+    day = models.DateField(
+        verbose_name='Fecha'
+    )
+    open_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        verbose_name='Precio de apertura'
+    )
+    min_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        verbose_name='Precio mínimo'
+    )
+    max_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        verbose_name='Precio máximo'
+    )
+    close_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        verbose_name='Precio de cierre'
+    )
+
+    class Meta:
+        verbose_name = 'Precio diario'
+        verbose_name_plural = 'Precios diarios'
+        db_table = 'products_daily_prices'
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'day'], name='daily_prices_product_day_uniq'),
+        ]
+        indexes = [
+            # Precio mínimo por categoría en los últimos N días
+            models.Index(fields=['category', 'day', 'min_price'], name='daily_prices_category_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.day}: {self.min_price} - {self.max_price}"
+
+
+class LowStockAlert(models.Model):
+    """
+    Periodo en que un producto estuvo por debajo de su umbral de reposición.
+
+    El comando scan_low_stock abre una alerta cuando el producto entra en
+    el índice parcial de stock bajo y la cierra cuando sale, así que cada
+    cambio queda registrado una sola vez.
+
+    Atributos:
+        product: Producto con stock bajo
+        stock: Stock total al abrir la alerta
+        reorder_level: Umbral vigente al abrir la alerta
+        opened_at: Momento en que se detectó el stock bajo
+        resolved_at: Momento en que se repuso el stock, None si sigue abierta
+        changed_at: Última apertura o cierre, para consultar cambios incrementales
+    """
+    
+    # Sin índice propio: lo cubre la restricción parcial sobre las alertas abiertas
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='low_stock_alerts',
+        db_index=False,
+        verbose_name='Producto'
+    )
+    stock = models.IntegerField(
+        verbose_name='Stock'
+    )
+    reorder_level = models.PositiveIntegerField(
+        verbose_name='Nivel de reposición'
+    )
+    opened_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Abierta'
+    )
+    resolved_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Resuelta'
+    )
+    changed_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Último cambio'
+    )
+
+    class Meta:
+        verbose_name = 'Alerta de stock bajo'
+        verbose_name_plural = 'Alertas de stock bajo'
+        db_table = 'products_low_stock_alerts'
+        constraints = [
+            # Una sola alerta abierta por producto
+            models.UniqueConstraint(
+                fields=['product'],
+                condition=models.Q(resolved_at__isnull=True),
+                name='low_stock_alerts_open_uniq',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['changed_at', 'id'], name='low_stock_alerts_changed_idx'),
+        ]
+
+    def __str__(self):
+        state = 'abierta' if self.resolved_at is None else 'resuelta'
+        return f"{self.product_id}: {self.stock}/{self.reorder_level} ({state})"
+
+
+class ArchivedProduct(models.Model):
+    """
+    Producto inactivo movido fuera de la tabla principal.
+
+    El comando archive_products mueve aquí los productos inactivos desde
+    hace tiempo para que no ocupen espacio en la tabla ni en los índices de
+    ``products``. Conserva el id original, así que ProductDetailView puede
+    seguir sirviéndolos con ``?archived=true``.
+
+    Atributos:
+        Los mismos de Product que tienen sentido para un producto inactivo,
+        más archived_at: Momento en que se archivó
+    """
+    
+    id = models.BigIntegerField(
+        primary_key=True,
+        verbose_name='ID'
+    )
+    name = models.CharField(
+        max_length=200,
+        verbose_name='Nombre del producto'
+    )
+    description = models.TextField(
+        verbose_name='Descripción'
+    )
+    price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        verbose_name='Precio'
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.PROTECT,
+        related_name='archived_products',
+        verbose_name='Categoría'
+    )
+    image = models.ImageField(
+        upload_to='products/images/',
+        blank=True,
+        null=True,
+        verbose_name='Imagen'
+    )
+    stock = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Stock'
+    )
+    sku = models.CharField(
+        max_length=50,
+        unique=True,
+        blank=True,
+        null=True,
+        verbose_name='SKU'
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Fecha de creación'
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Fecha de actualización'
+    )
+    archived_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Fecha de archivo'
+    )
+
+    class Meta:
+        verbose_name = 'Producto archivado'
+        verbose_name_plural = 'Productos archivados'
+        db_table = 'products_archive'
+
+    def __str__(self):
+        return f"{self.name} (archivado)"
+
+
+class ArchivedProductImage(models.Model):
+    """
+    Imagen adicional de un producto archivado; conserva el id original.
+    """
+    
+    id = models.BigIntegerField(
+        primary_key=True,
+        verbose_name='ID'
+    )
+    product = models.ForeignKey(
+        ArchivedProduct,
+        on_delete=models.CASCADE,
+        related_name='additional_images',
+        verbose_name='Producto'
+    )
+    image = models.ImageField(
+        upload_to='products/additional/',
+        verbose_name='Imagen'
+    )
+    alt_text = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name='Texto alternativo'
+    )
+    is_primary = models.BooleanField(
+        default=False,
+        verbose_name='Imagen principal'
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Fecha de creación'
+    )
+
+    class Meta:
+        verbose_name = 'Imagen de producto archivado'
+        verbose_name_plural = 'Imágenes de productos archivados'
+        db_table = 'products_images_archive'
+        ordering = ['-is_primary', 'created_at']
+
+
+class Task(models.Model):
+    """
+    Tarea diferida de la cola en base de datos (ver queue.py).
+
+    Atributos:
+        name: Nombre con el que se registró la función de la tarea
+        payload: Argumentos con nombre de la función
+        status: pending, running, done o failed
+        attempts: Ejecuciones iniciadas, incluida la actual
+        max_attempts: Ejecuciones permitidas antes de marcarla como fallida
+        run_at: Momento desde el que puede ejecutarse (se pospone en cada reintento)
+        created_at: Momento en que se encoló
+        started_at: Inicio de la última ejecución
+        finished_at: Fin de la ejecución que la completó o la hizo fallar
+        locked_by: Worker que la está ejecutando
+        locked_until: Fin del plazo del worker; vencido, la tarea vuelve a la cola
+        last_error: Error de la última ejecución fallida
+        result: Valor retornado por la función
+    """
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pendiente'),
+        (RUNNING, 'En ejecución'),
+        (DONE, 'Completada'),
+        (FAILED, 'Fallida'),
+    ]
+
+    name = models.CharField(
+        max_length=100,
+        verbose_name='Tarea'
+    )
+    payload = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Argumentos'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        verbose_name='Estado'
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Intentos'
+    )
+    max_attempts = models.PositiveIntegerField(
+        default=3,
+        verbose_name='Máximo de intentos'
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Ejecutar desde'
+    )
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Fecha de creación'
+    )
+    started_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Inicio'
+    )
+    finished_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Fin'
+    )
+    locked_by = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name='Worker'
+    )
+    locked_until = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Bloqueada hasta'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Último error'
+    )
+    result = models.JSONField(
+        blank=True,
+        null=True,
+        verbose_name='Resultado'
+    )
+
+    class Meta:
+        verbose_name = 'Tarea'
+        verbose_name_plural = 'Tareas'
+        db_table = 'products_tasks'
+        indexes = [
+            # Solo las tareas en espera, en el orden en que se reclaman
+            models.Index(
+                fields=['run_at', 'id'],
+                condition=models.Q(status='pending'),
+                name='tasks_pending_idx',
+            ),
+            # Tareas en ejecución cuyo plazo puede vencer
+            models.Index(
+                fields=['locked_until'],
+                condition=models.Q(status='running'),
+                name='tasks_running_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.id} ({self.status})"
+
+
+class TaskLock(models.Model):
+    """
+    Bloqueo de una tarea en bases de datos sin ``SKIP LOCKED`` (SQLite).
+
+    La clave primaria es la tarea, así que solo un worker puede insertar el
+    bloqueo; los demás reciben IntegrityError y pasan a la siguiente.
+
+    Atributos:
+        task: Tarea bloqueada
+        locked_by: Worker que la reclamó
+        locked_until: Vencido el plazo, otro worker puede reclamarla
+    """
+
+    task = models.OneToOneField(
+        Task,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='lock',
+        verbose_name='Tarea'
+    )
+    locked_by = models.CharField(
+        max_length=100,
+        verbose_name='Worker'
+    )
+    locked_until = models.DateTimeField(
+        verbose_name='Bloqueada hasta'
+    )
+
+    class Meta:
+        verbose_name = 'Bloqueo de tarea'
+        verbose_name_plural = 'Bloqueos de tareas'
+        db_table = 'products_task_locks'
+
+    def __str__(self):
+        return f"{self.task_id} ({self.locked_by})"
+
+
+class ProductExport(models.Model):
+    """
+    Exportación masiva del catálogo a CSV o XLSX, generada por un worker.
+
+    Atributos:
+        format: csv o xlsx
+        filters: Parámetros de filtro de /products/ con los que se pidió
+        status: pending, running, done o failed
+        total: Productos a exportar, calculado al iniciar
+        processed: Productos escritos hasta ahora
+        file: Archivo generado en MEDIA_ROOT
+        size: Tamaño del archivo en bytes
+        task: Tarea de la cola que la genera
+        error: Error de la última ejecución fallida
+        created_at: Momento en que se pidió
+        started_at: Inicio de la generación
+        finished_at: Fin de la generación
+    """
+
+    CSV = 'csv'
+    XLSX = 'xlsx'
+    FORMAT_CHOICES = [
+        (CSV, 'CSV'),
+        (XLSX, 'Excel (XLSX)'),
+    ]
+
+    format = models.CharField(
+        max_length=4,
+        choices=FORMAT_CHOICES,
+        default=CSV,
+        verbose_name='Formato'
+    )
+    filters = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Filtros'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=Task.STATUS_CHOICES,
+        default=Task.PENDING,
+        verbose_name='Estado'
+    )
+    total = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        verbose_name='Total de productos'
+    )
+    processed = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Productos exportados'
+    )
+    file = models.FileField(
+        upload_to='exports/',
+        blank=True,
+        verbose_name='Archivo'
+    )
+    size = models.PositiveBigIntegerField(
+        blank=True,
+        null=True,
+        verbose_name='Tamaño (bytes)'
+    )
+    task = models.ForeignKey(
+        Task,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='+',
+        verbose_name='Tarea'
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name='Error'
+    )
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Fecha de creación'
+    )
+    started_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Inicio'
+    )
+    finished_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Fin'
+    )
+
+    class Meta:
+        verbose_name = 'Exportación de productos'
+        verbose_name_plural = 'Exportaciones de productos'
+        db_table = 'products_exports'
+        ordering = ['-created_at', '-id']
+
+    def __str__(self):
+        return f"Exportación {self.id} ({self.format}, {self.status})"
@@ -0,0 +1,123 @@
+"""
+Historial de precios de los productos.
+
+Cada cambio real de precio agrega una fila ``PriceChange`` y actualiza el
+resumen ``DailyPrice`` del producto para ese día. Las consultas por rango
+de un producto usan el índice (product, changed_at); el precio mínimo de
+una categoría en los últimos N días se resuelve con el índice
+(category, day, min_price) del resumen diario y el índice parcial
+(category, price) de los productos activos, sin recorrer el historial.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+
+from .models import DailyPrice, PriceChange, Product
+
+
+def record_price_change(product_id, category_id, previous, price, now=None):
+    """
+    Registra un cambio de precio y actualiza el resumen del día.
+
+    Args:
+        product_id: ID del producto
+        category_id: ID de la categoría del producto
+        previous: Precio anterior, None si el producto es nuevo
+        price: Nuevo precio
+        now: Momento del cambio; por defecto, ahora
+    """
+    now = now or timezone.now()
+    day = timezone.localdate(now)
+    opening = price if previous is None else previous
+    PriceChange.objects.create(product_id=product_id, price=price, changed_at=now)
+
+    def update_day():
+        return DailyPrice.objects.filter(product_id=product_id, day=day).update(
+            min_price=Least(F('min_price'), price),
+            max_price=Greatest(F('max_price'), price),
+            close_price=price,
+        )
+
+    if update_day():
+        return
+    try:
+        with transaction.atomic():
+            DailyPrice.objects.create(
+                product_id=product_id,
+                category_id=category_id,
+                day=day,
+                open_price=opening,
+                min_price=min(opening, price),
+                max_price=max(opening, price),
+                close_price=price,
+            )
+    except IntegrityError:
+        # Otra escritura creó la fila del día entre el UPDATE y el INSERT
+        update_day()
+
+
+def price_history(product_id, since=None, until=None):
+    """
+    Retorna el precio vigente al inicio del rango y los cambios dentro de él.
+
+    Returns:
+        tuple: (precio al inicio o None, lista de PriceChange en orden cronológico)
+    """
+    changes = PriceChange.objects.filter(product_id=product_id)
+    opening = None
+    if since:
+        opening = (
+            changes.filter(changed_at__lte=since)
+            .order_by('-changed_at', '-id')
+            .values_list('price', flat=True)
+            .first()
+        )
+        changes = changes.filter(changed_at__gt=since)
+    if until:
+        changes = changes.filter(changed_at__lt=until)
+    return opening, list(changes.order_by('changed_at', 'id'))
+
+
+def lowest_price(category_id, days):
+    """
+    Precio más bajo de los productos activos de una categoría en los últimos días.
+
+    Entre cambios el precio no varía, así que el mínimo del rango es el menor
+    entre los mínimos diarios registrados en el rango (que incluyen el precio
+    de apertura) y los precios actuales.
+
+    Args:
+        category_id: ID de la categoría
+        days: Número de días, contando hoy
+
+    Returns:
+        dict: product_id, price y day (None si es el precio actual), o None
+            si la categoría no tiene productos activos
+    """
+    start = timezone.localdate() - timedelta(days=days - 1)
+    historical = (
+        DailyPrice.objects.filter(category_id=category_id, day__gte=start, product__is_active=True)
+        .order_by('min_price', 'day')
+        .values('product_id', 'min_price', 'day')
+        .first()
+    )
+    current = (
+        Product.objects.filter(category_id=category_id, is_active=True)
+        .order_by('price', 'id')
+        .values('id', 'price')
+        .first()
+    )
+    candidates = []
+    if historical:
+        candidates.append({
+            'product_id': historical['product_id'],
+            'price': historical['min_price'],
+            'day': historical['day'],
+        })
+    if current:
+        candidates.append({'product_id': current['id'], 'price': current['price'], 'day': None})
+    # Ante un empate se prefiere el precio actual
+    return min(candidates, key=lambda row: (row['price'], row['day'] is not None), default=None)
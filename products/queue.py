@@ -0,0 +1,279 @@
+"""
+Cola de tareas diferidas guardada en la base de datos del proyecto.
+
+Las funciones se registran con el decorador ``@task`` (en los módulos
+``tasks.py`` de cada aplicación) y se encolan con ``enqueue()``. Como la
+tarea es una fila más, encolarla dentro de una transacción la hace visible
+solo si la transacción se confirma.
+
+Los workers (``manage.py run_worker``) reclaman una tarea a la vez:
+
+- Con ``SELECT ... FOR UPDATE SKIP LOCKED`` (PostgreSQL) cada worker salta
+  las filas que otro está reclamando, sin esperas entre ellos.
+- Sin ``SKIP LOCKED`` (SQLite) el worker inserta un TaskLock con la tarea
+  como clave primaria; si otro ya lo insertó recibe IntegrityError y prueba
+  con la siguiente candidata.
+
+Cada ejecución tiene un plazo (``lease``); si el worker muere, la tarea
+vuelve a la cola al vencer el plazo. Los errores se reintentan con espera
+exponencial hasta ``max_attempts`` y después la tarea queda como fallida.
+"""
+import logging
+import os
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from catalogo_backend.metrics import record_task
+from .models import Task, TaskLock
+
+
+logger = logging.getLogger(__name__)
+
+# Tareas registradas por nombre
+REGISTRY = {}
+
+# Candidatas que revisa un worker sin SKIP LOCKED antes de esperar
+CLAIM_CANDIDATES = 10
+
+
+class TaskDefinition:
+    """
+    Función registrada como tarea y su política de ejecución.
+
+    Args:
+        func: Función a ejecutar con el payload como argumentos con nombre
+        name: Nombre de registro
+        max_attempts: Ejecuciones permitidas
+        retry_delay: Segundos antes del primer reintento (se duplica en cada uno)
+        lease: Segundos que el worker tiene la tarea antes de que vuelva a la cola
+    """
+
+    def __init__(self, func, name, max_attempts, retry_delay, lease):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.lease = lease
+
+
+def task(name=None, max_attempts=3, retry_delay=30, lease=None):
+    """
+    Registra una función como tarea.
+
+    La función decorada se sigue pudiendo llamar directamente y gana el
+    atributo ``enqueue(**payload)`` para diferirla.
+    """
+    def decorator(func):
+        definition = TaskDefinition(
+            func,
+            name or f'{func.__module__}.{func.__name__}',
+            max_attempts,
+            retry_delay,
+            lease or getattr(settings, 'TASK_DEFAULT_LEASE', 300),
+        )
+        REGISTRY[definition.name] = definition
+        func.task_name = definition.name
+        func.enqueue = lambda run_at=None, **payload: enqueue(definition.name, payload, run_at=run_at)
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, run_at=None):
+    """
+    Encola una tarea.
+
+    Args:
+        name: Nombre registrado de la tarea
+        payload: Argumentos con nombre (serializables en JSON)
+        run_at: No ejecutar antes de este momento (opcional)
+
+    Returns:
+        Task: Tarea creada
+    """
+    definition = REGISTRY.get(name)
+    return Task.objects.create(
+        name=name,
+        payload=payload or {},
+        max_attempts=definition.max_attempts if definition else 3,
+        run_at=run_at or timezone.now(),
+    )
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _lease(name):
+    definition = REGISTRY.get(name)
+    seconds = definition.lease if definition else getattr(settings, 'TASK_DEFAULT_LEASE', 300)
+    return timedelta(seconds=seconds)
+
+
+def _claim_skip_locked(worker, now):
+    with transaction.atomic():
+        candidate = (
+            Task.objects.select_for_update(skip_locked=True)
+            .filter(status=Task.PENDING, run_at__lte=now)
+            .order_by('run_at', 'id')
+            .values_list('id', 'name')
+            .first()
+        )
+        if candidate is None:
+            return None
+        task_id, name = candidate
+        Task.objects.filter(id=task_id).update(
+            status=Task.RUNNING,
+            attempts=F('attempts') + 1,
+            started_at=now,
+            locked_by=worker,
+            locked_until=now + _lease(name),
+        )
+    return Task.objects.get(id=task_id)
+
+
+def _claim_lock_table(worker, now):
+    candidates = list(
+        Task.objects.filter(status=Task.PENDING, run_at__lte=now)
+        .order_by('run_at', 'id')
+        .values_list('id', 'name')[:CLAIM_CANDIDATES]
+    )
+    for task_id, name in candidates:
+        locked_until = now + _lease(name)
+        try:
+            with transaction.atomic():
+                TaskLock.objects.create(task_id=task_id, locked_by=worker, locked_until=locked_until)
+        except IntegrityError:
+            continue
+        # Otro worker pudo completarla entre la consulta y el bloqueo
+        if Task.objects.filter(id=task_id, status=Task.PENDING).update(
+            status=Task.RUNNING,
+            attempts=F('attempts') + 1,
+            started_at=now,
+            locked_by=worker,
+            locked_until=locked_until,
+        ):
+            return Task.objects.get(id=task_id)
+        TaskLock.objects.filter(task_id=task_id, locked_by=worker).delete()
+    return None
+
+
+def claim_task(worker):
+    """
+    Reclama la próxima tarea lista para ejecutarse.
+
+    Returns:
+        Task: Tarea en estado running a nombre de ``worker``, o None
+    """
+    now = timezone.now()
+    if connection.features.has_select_for_update_skip_locked:
+        return _claim_skip_locked(worker, now)
+    return _claim_lock_table(worker, now)
+
+
+def requeue_expired(now=None):
+    """
+    Devuelve a la cola las tareas cuyo worker no terminó dentro del plazo.
+
+    El intento ya se contó al reclamarla: una tarea que agotó sus intentos
+    (por ejemplo, porque tumba al worker cada vez) queda como fallida.
+
+    Returns:
+        int: Tareas devueltas a la cola
+    """
+    now = now or timezone.now()
+    expired = Task.objects.filter(status=Task.RUNNING, locked_until__lt=now)
+    with transaction.atomic():
+        expired.filter(attempts__gte=F('max_attempts')).update(
+            status=Task.FAILED, locked_by='', locked_until=None, finished_at=now,
+            last_error='El worker no terminó la tarea dentro del plazo.'
+        )
+        count = expired.update(status=Task.PENDING, locked_by='', locked_until=None, run_at=now)
+        TaskLock.objects.filter(locked_until__lt=now).delete()
+    return count
+
+
+def _finish(task, **fields):
+    """
+    Guarda el resultado solo si la tarea sigue a nombre de este worker.
+    """
+    fields.update(locked_by='', locked_until=None)
+    updated = Task.objects.filter(
+        id=task.id, status=Task.RUNNING, locked_by=task.locked_by
+    ).update(**fields)
+    TaskLock.objects.filter(task_id=task.id, locked_by=task.locked_by).delete()
+    if not updated:
+        logger.warning('La tarea %s venció mientras se ejecutaba', task.id)
+
+
+def run_task(task):
+    """
+    Ejecuta una tarea reclamada y registra su resultado.
+
+    Returns:
+        str: done, retry o failed
+    """
+    definition = REGISTRY.get(task.name)
+    started = time.monotonic()
+    latency = (task.started_at - task.run_at).total_seconds()
+    try:
+        if definition is None:
+            raise LookupError(f'Tarea no registrada: {task.name}')
+        value = definition.func(**task.payload)
+    except Exception:
+        error = traceback.format_exc()
+        now = timezone.now()
+        if definition is not None and task.attempts < task.max_attempts:
+            outcome = 'retry'
+            delay = definition.retry_delay * 2 ** (task.attempts - 1)
+            _finish(task, status=Task.PENDING, run_at=now + timedelta(seconds=delay), last_error=error)
+        else:
+            outcome = 'failed'
+            _finish(task, status=Task.FAILED, finished_at=now, last_error=error)
+        logger.exception('Error en la tarea %s #%s (%s)', task.name, task.id, outcome)
+    else:
+        outcome = 'done'
+        _finish(task, status=Task.DONE, finished_at=timezone.now(), result=value)
+    record_task(task.name, latency, time.monotonic() - started, outcome)
+    return outcome
+
+
+def work(poll_interval=1.0, burst=False, max_tasks=None, should_stop=lambda: False):
+    """
+    Ciclo de un worker: reclama y ejecuta tareas hasta que se le pida parar.
+
+    Args:
+        poll_interval: Segundos de espera cuando la cola está vacía
+        burst: Terminar cuando no queden tareas listas
+        max_tasks: Terminar después de este número de tareas (opcional)
+        should_stop: Función que indica si hay que terminar después de la tarea actual
+
+    Returns:
+        int: Tareas ejecutadas
+    """
+    autodiscover_modules('tasks')
+    worker = worker_name()
+    processed = 0
+    last_requeue = 0
+    while not should_stop() and (max_tasks is None or processed < max_tasks):
+        if time.monotonic() - last_requeue > poll_interval * 10:
+            requeue_expired()
+            last_requeue = time.monotonic()
+        # Como al inicio de cada petición: descarta conexiones vencidas o rotas
+        close_old_connections()
+        task = claim_task(worker)
+        if task is None:
+            if burst:
+                break
+            time.sleep(poll_interval)
+            continue
+        run_task(task)
+        processed += 1
+    return processed
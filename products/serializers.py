@@ -2,9 +2,27 @@
 Serializadores para la API de productos.
 Convierte los modelos Django a JSON y viceversa.
 """
+import logging
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.urls import reverse
 from rest_framework import serializers
+from catalogo_backend.sparse_fields import SparseFieldsetMixin
 from categories.models import Category
-from .models import Product, ProductImage
+from .models import (
+    ArchivedProduct,
+    ArchivedProductImage,
+    LowStockAlert,
+    PriceChange,
+    Product,
+    ProductExport,
+    ProductImage,
+    StockMovement,
+)
+
+
+logger = logging.getLogger(__name__)
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
@@ -24,14 +42,23 @@ class ProductImageSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializador principal para el modelo Product.
+    Acepta ?fields= y ?exclude= para retornar solo algunos campos.
     """
     
+    field_dependencies = {
+        'price_display': ['price'],
+        'stock': ['stock', 'stock_shards'],
+        'is_in_stock': ['stock', 'stock_shards'],
+    }
+    
     # Campos calculados
     price_display = serializers.SerializerMethodField()
     is_in_stock = serializers.SerializerMethodField()
+    # Stock total, incluidas las fracciones de los productos con stock fraccionado
+    stock = serializers.IntegerField(source='get_total_stock', read_only=True)
     
     # Relaciones
     category_name = serializers.CharField(source='category.name', read_only=True)
@@ -155,17 +182,16 @@ class ProductCreateSerializer(serializers.ModelSerializer):
         """
         Sobrescribe create para agregar logging.
         """
-        print("=== CREATING PRODUCT ===")
-        print("Validated data:", validated_data)
+        logger.debug('Creando producto', extra={'payload': validated_data})
         
         try:
             # Crear el producto normalmente
             product = super().create(validated_data)
-            print(f"✅ Producto creado exitosamente: {product.id}")
+            logger.info('Producto creado', extra={'product_id': product.id, 'sku': product.sku})
             return product
             
-        except Exception as e:
-            print(f"💥 Error al crear producto: {str(e)}")
+        except Exception:
+            logger.exception('Error al crear producto')
             raise
 
 
@@ -217,15 +243,40 @@ class ProductUpdateSerializer(serializers.ModelSerializer):
             )
         return value
 
+    def update(self, instance, validated_data):
+        """
+        El stock se fija con set_stock(): un movimiento del libro, o un nuevo
+        reparto entre las fracciones.
+        """
+        stock = validated_data.pop('stock', None)
+        instance = super().update(instance, validated_data)
+        if stock is not None:
+            instance.set_stock(stock)
+        return instance
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if 'stock' in data:
+            data['stock'] = instance.get_total_stock()
+        return data
 
-class ProductListSerializer(serializers.ModelSerializer):
+
+class ProductListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializador simplificado para listar productos.
+    Acepta ?fields= y ?exclude= para retornar solo algunos campos.
     """
     
+    field_dependencies = {
+        'price_display': ['price'],
+        'stock': ['stock', 'stock_shards'],
+        'is_in_stock': ['stock', 'stock_shards'],
+    }
+    
     category_name = serializers.CharField(source='category.name', read_only=True)
     price_display = serializers.SerializerMethodField()
     is_in_stock = serializers.SerializerMethodField()
+    stock = serializers.IntegerField(source='get_total_stock', read_only=True)
     
     class Meta:
         model = Product
@@ -268,4 +319,253 @@ class ProductStockUpdateSerializer(serializers.Serializer):
                 "La cantidad a reducir debe ser mayor a cero."
             )
         
-        return data
\ No newline at end of file
+        return data
+
+
+class AvailabilityLineSerializer(serializers.Serializer):
+    """
+    Línea de carrito a verificar: producto y cantidad.
+    """
+    
+    id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class AvailabilityRequestSerializer(serializers.Serializer):
+    """
+    Serializador para verificar la disponibilidad de varias líneas.
+    """
+    
+    items = AvailabilityLineSerializer(many=True, allow_empty=False, max_length=100)
+    hold = serializers.BooleanField(default=False)
+
+
+class StockReservationSerializer(serializers.Serializer):
+    """
+    Serializador para reservar el stock de varias líneas a la vez.
+    """
+    
+    items = AvailabilityLineSerializer(many=True, allow_empty=False, max_length=100)
+    hold = serializers.CharField(required=False, allow_blank=True)
+
+
+class StockMovementSerializer(serializers.ModelSerializer):
+    """
+    Serializador de solo lectura para el historial de stock.
+    """
+    
+    class Meta:
+        model = StockMovement
+        fields = [
+            'id',
+            'quantity',
+            'balance',
+            'reason',
+            'created_at',
+            'pending'
+        ]
+        read_only_fields = fields
+
+
+class PriceChangeSerializer(serializers.ModelSerializer):
+    """
+    Serializador de solo lectura para el historial de precios.
+    """
+    
+    class Meta:
+        model = PriceChange
+        fields = [
+            'price',
+            'changed_at'
+        ]
+        read_only_fields = fields
+
+
+class LowStockAlertSerializer(serializers.ModelSerializer):
+    """
+    Serializador de solo lectura para las alertas de stock bajo.
+    """
+    
+    class Meta:
+        model = LowStockAlert
+        fields = [
+            'id',
+            'product',
+            'stock',
+            'reorder_level',
+            'opened_at',
+            'resolved_at',
+            'changed_at'
+        ]
+        read_only_fields = fields
+
+
+class ArchivedProductImageSerializer(serializers.ModelSerializer):
+    """
+    Serializador de las imágenes adicionales de un producto archivado.
+    """
+    
+    class Meta:
+        model = ArchivedProductImage
+        fields = [
+            'id',
+            'image',
+            'alt_text',
+            'is_primary',
+            'created_at'
+        ]
+        read_only_fields = fields
+
+
+class ArchivedProductSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Serializador de solo lectura para productos archivados.
+    Retorna los mismos campos que ProductSerializer más archived_at.
+    """
+    
+    price_display = serializers.SerializerMethodField()
+    category_name = serializers.CharField(source='category.name', read_only=True)
+    additional_images = ArchivedProductImageSerializer(many=True, read_only=True)
+    is_active = serializers.SerializerMethodField()
+    is_in_stock = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ArchivedProduct
+        fields = [
+            'id',
+            'name',
+            'description',
+            'price',
+            'price_display',
+            'category',
+            'category_name',
+            'image',
+            'additional_images',
+            'stock',
+            'sku',
+            'is_active',
+            'is_in_stock',
+            'created_at',
+            'updated_at',
+            'archived_at'
+        ]
+        read_only_fields = fields
+
+    def get_price_display(self, obj):
+        return f"${obj.price:,.2f}"
+
+    def get_is_active(self, obj):
+        return False
+
+    def get_is_in_stock(self, obj):
+        return False
+
+
+class ProductExportSerializer(serializers.ModelSerializer):
+    """
+    Serializador de solo lectura del estado de una exportación.
+    """
+    
+    progress = serializers.SerializerMethodField()
+    download_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ProductExport
+        fields = [
+            'id',
+            'format',
+            'filters',
+            'status',
+            'total',
+            'processed',
+            'progress',
+            'size',
+            'error',
+            'created_at',
+            'started_at',
+            'finished_at',
+            'download_url'
+        ]
+        read_only_fields = fields
+
+    def get_progress(self, obj):
+        """
+        Porcentaje exportado, o None mientras no se conoce el total.
+        """
+        if obj.total is None:
+            return None
+        if not obj.total:
+            return 100.0
+        return round(obj.processed * 100 / obj.total, 1)
+
+    def get_download_url(self, obj):
+        """
+        URL de descarga cuando el archivo está listo.
+        """
+        if obj.status != 'done':
+            return None
+        url = reverse('products:product-export-download', kwargs={'pk': obj.id})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+
+class ProductExportCreateSerializer(serializers.ModelSerializer):
+    """
+    Serializador para pedir una exportación.
+    
+    ``filters`` acepta los mismos parámetros que GET /products/.
+    """
+    
+    class Meta:
+        model = ProductExport
+        fields = [
+            'format',
+            'filters'
+        ]
+
+    def validate_format(self, value):
+        """
+        Valida que el formato se pueda generar con las dependencias instaladas.
+        """
+        from .exports import openpyxl
+        
+        if value == ProductExport.XLSX and openpyxl is None:
+            raise serializers.ValidationError(
+                "La exportación a XLSX requiere el paquete openpyxl."
+            )
+        return value
+
+    def validate_filters(self, value):
+        """
+        Valida los filtros construyendo el queryset que usará el worker.
+        """
+        from .exports import EXPORT_FILTER_PARAMS, export_queryset
+        
+        if not isinstance(value, dict):
+            raise serializers.ValidationError(
+                "Debe ser un objeto con parámetros de /products/."
+            )
+        unknown = sorted(set(value) - set(EXPORT_FILTER_PARAMS))
+        if unknown:
+            raise serializers.ValidationError(
+                f"Parámetros no soportados: {', '.join(unknown)}."
+            )
+        filters = {key: str(item) for key, item in value.items() if item not in (None, '')}
+        try:
+            export_queryset(filters)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(exc.messages)
+        return filters
+
+    def create(self, validated_data):
+        """
+        Crea la exportación y encola la tarea que la genera.
+        """
+        from .tasks import run_export
+        
+        with transaction.atomic():
+            export = ProductExport.objects.create(**validated_data)
+            export.task = run_export.enqueue(export_id=export.id)
+            export.save(update_fields=['task'])
+        logger.info('Exportación encolada', extra={'export_id': export.id, 'format': export.format})
+        return export
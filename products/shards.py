@@ -0,0 +1,325 @@
+"""
+Stock fraccionado para productos con mucha contención de escritura.
+
+Con ``Product.stock_shards = N`` el stock de un producto se reparte entre
+N filas ``StockShard``. Cada escritura elige una fracción al azar y la
+actualiza con un UPDATE condicional, así que N escritores concurrentes
+bloquean filas distintas en lugar de esperar todos la fila del producto.
+
+``Product.stock`` queda como reserva sin asignar: el stock total es esa
+reserva más la suma de las fracciones, y las lecturas lo obtienen con la
+anotación ``total_stock()``. Cuando ninguna fracción alcanza para un
+descuento, se bloquea el producto y se reparte de nuevo el total.
+
+Las escrituras en las fracciones no tocan la fila del producto; solo
+marcan la fracción con ``dirty``. sync_sharded_products(), que corre en
+segundo plano (``manage.py sync_stock_shards`` o la tarea
+``products.sync_stock_shards``), reparte de nuevo el stock de los
+productos marcados y actualiza su ``updated_at`` una vez por ejecución, de
+modo que el cambio llega a /products/changes/ y a las instantáneas sin
+volver a bloquear la fila del producto en cada escritura.
+"""
+import random
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from catalogo_backend.metrics import record_stock_operation
+from .availability import invalidate_stock, total_stock
+from .events import product_event, publish_on_commit
+from .ledger import fold_product_movements, lock_stock, record_movements, stock_movement
+from .models import Product, StockShard
+
+
+def in_stock_filter():
+    """
+    Filtro de productos activos con stock total mayor que cero.
+
+    Cada rama es su propio ``id IN (...)`` para que el planificador las
+    resuelva por separado: los productos sin fracciones con el índice
+    parcial ``products_in_stock_idx`` (la subconsulta repite sus
+    condiciones) y los fraccionados con sus fracciones no vacías. Con
+    ``stock > 0`` directamente en el OR se recorren todos los productos
+    activos.
+    """
+    return Q(id__in=Product.objects.filter(is_active=True, stock__gt=0).values('id')) | Q(
+        stock_shards__gt=0,
+        id__in=StockShard.objects.filter(stock__gt=0).values('product_id'),
+    )
+
+
+def _split(total, shards):
+    """
+    Reparte ``total`` unidades en ``shards`` partes lo más iguales posible.
+    """
+    base, extra = divmod(total, shards)
+    return [base + (1 if shard < extra else 0) for shard in range(shards)]
+
+
+def _publish(product, quantity, reason):
+    """
+    Registra el movimiento y publica el nuevo stock total del producto al
+    confirmar la transacción.
+
+    ``updated_at`` no se modifica para no volver a bloquear la fila del
+    producto en cada escritura; lo actualiza sync_sharded_products().
+    """
+    product.total_stock = stock_totals([product.id])[product.id]
+    record_movements([stock_movement(product.id, quantity, product.total_stock, reason)])
+    invalidate_stock([product.id])
+    publish_on_commit(product_event(
+        product.id, product.category_id, product.total_stock,
+        product.price, product.is_active, timezone.now()
+    ))
+
+
+def stock_totals(product_ids):
+    """
+    Retorna el stock total (reserva más fracciones) de los productos indicados.
+
+    Returns:
+        dict: {id: stock total}
+    """
+    return dict(
+        Product.objects.filter(pk__in=product_ids)
+        .annotate(total=total_stock())
+        .values_list('id', 'total')
+    )
+
+
+def fold_shards(products):
+    """
+    Devuelve las fracciones a Product.stock para los productos indicados.
+
+    Debe llamarse dentro de una transacción, con las filas de los productos
+    ya bloqueadas. Pliega también los movimientos pendientes del libro que
+    se hayan agregado antes de fraccionar el producto, y actualiza
+    ``stock`` de las instancias recibidas.
+
+    Args:
+        products: Instancias bloqueadas de Product
+    """
+    sharded = {product.id: product for product in products if product.stock_shards}
+    if not sharded:
+        return
+    for product_id, quantity in fold_product_movements(list(sharded)).items():
+        sharded[product_id].stock += quantity
+    # Se bloquean también las fracciones vacías para que un escritor
+    # concurrente no sume en una fila que después se sobrescribe
+    rows = [
+        row for row in StockShard.objects.select_for_update()
+        .filter(product_id__in=sharded)
+        .order_by('product_id', 'shard')
+        if row.stock
+    ]
+    totals = {}
+    for row in rows:
+        totals[row.product_id] = totals.get(row.product_id, 0) + row.stock
+    if not totals:
+        return
+    StockShard.objects.filter(id__in=[row.id for row in rows]).update(stock=0)
+    for product_id, total in totals.items():
+        Product.objects.filter(pk=product_id).update(stock=F('stock') + total)
+        sharded[product_id].stock += total
+
+
+def _resplit(product_id, shards, total):
+    """
+    Reparte ``total`` entre las fracciones y deja la reserva en cero.
+
+    Debe llamarse con el producto y sus fracciones bloqueados (fold_shards()).
+    """
+    for shard, stock in enumerate(_split(total, shards)):
+        StockShard.objects.filter(product_id=product_id, shard=shard).update(stock=stock, dirty=False)
+    Product.objects.filter(pk=product_id).update(stock=0)
+
+
+def enable_sharding(product_id, shards=None):
+    """
+    Activa el stock fraccionado de un producto y reparte su stock actual.
+
+    Args:
+        product_id: ID del producto
+        shards: Número de fracciones; por defecto STOCK_SHARDS
+    """
+    shards = shards or getattr(settings, 'STOCK_SHARDS', 8)
+    with transaction.atomic():
+        # Espera a las escrituras del libro que ya validaron contra el stock actual
+        lock_stock([product_id])
+        product = Product.objects.select_for_update().get(pk=product_id)
+        for quantity in fold_product_movements([product_id]).values():
+            product.stock += quantity
+        fold_shards([product])
+        StockShard.objects.filter(product=product).delete()
+        StockShard.objects.bulk_create([
+            StockShard(product=product, shard=shard, stock=stock)
+            for shard, stock in enumerate(_split(product.stock, shards))
+        ])
+        Product.objects.filter(pk=product_id).update(stock=0, stock_shards=shards)
+
+
+def disable_sharding(product_id):
+    """
+    Vuelve al stock en una sola fila sumando las fracciones.
+    """
+    with transaction.atomic():
+        product = Product.objects.select_for_update().get(pk=product_id)
+        fold_shards([product])
+        StockShard.objects.filter(product=product).delete()
+        Product.objects.filter(pk=product_id).update(stock_shards=0)
+
+
+def put_sharded_stock(product_id, shards, quantity):
+    """
+    Suma stock a una fracción elegida al azar, sin bloquear el producto.
+    """
+    StockShard.objects.filter(product_id=product_id, shard=random.randrange(shards)).update(
+        stock=F('stock') + quantity, dirty=True
+    )
+
+
+def take_sharded_stock(product_id, shards, quantity):
+    """
+    Descuenta stock de una fracción con unidades suficientes.
+
+    Prueba las fracciones en orden aleatorio con un UPDATE condicional; solo
+    si ninguna alcanza bloquea el producto y reparte de nuevo el total.
+
+    Returns:
+        bool: True si se pudo descontar, False si no hay stock suficiente
+    """
+    for shard in random.sample(range(shards), shards):
+        if StockShard.objects.filter(
+            product_id=product_id, shard=shard, stock__gte=quantity
+        ).update(stock=F('stock') - quantity, dirty=True):
+            return True
+    return _rebalance(product_id, quantity)
+
+
+def adjust_sharded_stock(product_id, shards, operation, quantity):
+    """
+    Aplica un ajuste add, reduce o set a un producto fraccionado.
+
+    ``add`` y ``reduce`` van a una fracción sin bloquear el producto;
+    ``set`` reemplaza el total y sí lo bloquea.
+
+    Returns:
+        bool: False si no hay stock suficiente para el descuento
+    """
+    if operation == 'add':
+        put_sharded_stock(product_id, shards, quantity)
+        return True
+    if operation == 'reduce':
+        return take_sharded_stock(product_id, shards, quantity)
+    replace_sharded_stock(product_id, quantity)
+    return True
+
+
+def add_sharded_stock(product, quantity):
+    """
+    Suma stock a una fracción elegida al azar.
+    """
+    with transaction.atomic():
+        put_sharded_stock(product.id, product.stock_shards, quantity)
+        _publish(product, quantity, 'add')
+
+
+def reduce_sharded_stock(product, quantity):
+    """
+    Descuenta stock de las fracciones de un producto (ver take_sharded_stock()).
+
+    Returns:
+        bool: True si se pudo descontar, False si no hay stock suficiente
+    """
+    with transaction.atomic():
+        if take_sharded_stock(product.id, product.stock_shards, quantity):
+            _publish(product, -quantity, 'reduce')
+            return True
+    record_stock_operation('reduce_sharded', 'insufficient')
+    return False
+
+
+def _rebalance(product_id, quantity):
+    """
+    Descuenta del total y reparte el resto entre las fracciones.
+    """
+    locked = (
+        Product.objects.select_for_update()
+        .only('id', 'stock', 'stock_shards')
+        .get(pk=product_id)
+    )
+    fold_shards([locked])
+    if locked.stock < quantity:
+        return False
+    record_stock_operation('reduce_sharded', 'rebalanced')
+    _resplit(product_id, locked.stock_shards, locked.stock - quantity)
+    # Ya se bloqueó la fila del producto: se publica el cambio de una vez
+    Product.objects.filter(pk=product_id).update(updated_at=timezone.now())
+    return True
+
+
+def replace_sharded_stock(product_id, quantity):
+    """
+    Fija el stock total de un producto fraccionado bajo su bloqueo.
+
+    Returns:
+        int: Stock total anterior
+    """
+    locked = Product.objects.select_for_update().only('id', 'stock', 'stock_shards').get(pk=product_id)
+    fold_shards([locked])
+    _resplit(product_id, locked.stock_shards, quantity)
+    Product.objects.filter(pk=product_id).update(updated_at=timezone.now())
+    return locked.stock
+
+
+def set_sharded_stock(product, quantity):
+    """
+    Fija el stock total de un producto fraccionado.
+    """
+    with transaction.atomic():
+        previous = replace_sharded_stock(product.id, quantity)
+        product.stock = 0
+        _publish(product, quantity - previous, 'set')
+
+
+def sync_sharded_products(batch_size=100):
+    """
+    Publica los cambios de stock de los productos fraccionados.
+
+    Para cada producto con alguna fracción marcada (``dirty``) bloquea el
+    producto y sus fracciones, reparte de nuevo el total entre las
+    fracciones (las que se vaciaron vuelven a tener unidades) y actualiza
+    ``updated_at``, una transacción corta por producto. Una escritura que
+    llegue durante el bloqueo vuelve a marcar su fracción y se publica en
+    la siguiente ejecución.
+
+    Returns:
+        int: Productos sincronizados
+    """
+    dirty = StockShard.objects.filter(product=OuterRef('pk'), dirty=True)
+    synced = 0
+    last_id = 0
+    while True:
+        product_ids = list(
+            Product.objects.filter(stock_shards__gt=0, id__gt=last_id)
+            .filter(Exists(dirty)).order_by('id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not product_ids:
+            return synced
+        last_id = product_ids[-1]
+        for product_id in product_ids:
+            with transaction.atomic():
+                locked = (
+                    Product.objects.select_for_update()
+                    .only('id', 'stock', 'stock_shards')
+                    .filter(pk=product_id, stock_shards__gt=0).first()
+                )
+                if locked is None:
+                    continue
+                fold_shards([locked])
+                _resplit(product_id, locked.stock_shards, locked.stock)
+                Product.objects.filter(pk=product_id).update(updated_at=timezone.now())
+            synced += 1
@@ -0,0 +1,241 @@
+"""
+Instantáneas estáticas en JSON de las páginas públicas del catálogo.
+
+build_snapshot() renderiza con las mismas vistas de la API las primeras
+páginas de ``/products/``, cada ``/categories/<id>/products/`` y todas las
+páginas de ``/categories/``, y las escribe en ``CATALOG_SNAPSHOT_DIR``
+para que nginx las sirva sin pasar por Django:
+
+    products/page-<n>.json
+    categories/page-<n>.json
+    categories/<id>/products.json
+
+``manifest.json`` guarda la marca de agua de ``updated_at`` de la última
+generación y los ids de cada página. En la siguiente ejecución solo se
+regeneran las páginas afectadas por los productos y categorías con
+``updated_at`` posterior: las páginas de una categoría si alguno de sus
+productos cambió (o salió de ella) y el listado general si un producto
+cambiado aparece o debería aparecer en sus primeras páginas.
+"""
+import gzip
+import json
+import os
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils.dateparse import parse_datetime
+
+from categories.models import Category
+from .models import Product
+from .sync import sync_upper_bound
+
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def _write(path, content, compress=True):
+    """
+    Escribe el archivo (y su versión .gz para gzip_static) de forma atómica.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    targets = [(path, content)]
+    if compress:
+        targets.append((f'{path}.gz', gzip.compress(content)))
+    for target, data in targets:
+        tmp = f'{target}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, target)
+
+
+def _remove(path):
+    """
+    Elimina el archivo y su versión .gz si existen.
+    """
+    for target in (path, f'{path}.gz'):
+        if os.path.exists(target):
+            os.remove(target)
+
+
+class SnapshotBuilder:
+    """
+    Genera las instantáneas en ``directory`` usando un cliente HTTP interno.
+
+    Args:
+        directory: Carpeta de salida
+        pages: Número de páginas de /products/ a generar
+        base_url: URL pública de la API, usada en los enlaces next/previous
+    """
+
+    def __init__(self, directory, pages, base_url):
+        self.directory = str(directory)
+        self.pages = pages
+        parts = urlsplit(base_url)
+        self.client = Client(HTTP_HOST=parts.netloc or 'localhost')
+        self.secure = parts.scheme == 'https'
+        self.written = 0
+        self.removed = 0
+
+    def _get(self, url, **params):
+        response = self.client.get(
+            url, params, HTTP_ACCEPT='application/json', secure=self.secure
+        )
+        return response.status_code, response.content
+
+    def _path(self, *parts):
+        return os.path.join(self.directory, *parts)
+
+    def _render_pages(self, url, folder, max_pages=None):
+        """
+        Genera las páginas de un listado paginado.
+
+        Returns:
+            list: Ids de cada página generada
+        """
+        ids = []
+        page = 1
+        while max_pages is None or page <= max_pages:
+            status, content = self._get(url, page=page)
+            if status != 200:
+                break
+            _write(self._path(folder, f'page-{page}.json'), content)
+            self.written += 1
+            data = json.loads(content)
+            ids.append([item['id'] for item in data['results']])
+            if not data.get('next'):
+                break
+            page += 1
+        # Páginas que sobraban de una generación anterior: el bucle puede
+        # terminar en la última página escrita o en la siguiente
+        stale = len(ids) + 1
+        while os.path.exists(self._path(folder, f'page-{stale}.json')):
+            _remove(self._path(folder, f'page-{stale}.json'))
+            self.removed += 1
+            stale += 1
+        return ids
+
+    def _render_category(self, category_id):
+        """
+        Genera los productos de una categoría, o elimina el archivo si ya no está activa.
+
+        Returns:
+            list: Ids de los productos, o None si la categoría no existe o está inactiva
+        """
+        path = self._path('categories', str(category_id), 'products.json')
+        status, content = self._get(
+            reverse('categories:category-products', kwargs={'category_id': category_id})
+        )
+        if status != 200:
+            if os.path.exists(path):
+                _remove(path)
+                self.removed += 1
+            return None
+        _write(path, content)
+        self.written += 1
+        return [product['id'] for product in json.loads(content)['products']]
+
+    def _load_manifest(self):
+        try:
+            with open(self._path(MANIFEST_NAME)) as f:
+                manifest = json.load(f)
+            manifest['watermark'] = parse_datetime(manifest['watermark'])
+            return manifest
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def build(self, full=False):
+        """
+        Genera las páginas afectadas desde la última ejecución, o todas con ``full``.
+
+        Returns:
+            dict: Archivos escritos y eliminados, y si la generación fue completa
+        """
+        manifest = None if full else self._load_manifest()
+        upper_bound = sync_upper_bound()
+
+        with override_settings(ALLOWED_HOSTS=['*']):
+            if manifest is None:
+                list_pages = True
+                categories = set(
+                    Category.objects.filter(is_active=True).values_list('id', flat=True)
+                )
+                category_ids = {}
+            else:
+                watermark = manifest['watermark']
+                changed = list(
+                    Product.objects.filter(updated_at__gt=watermark)
+                    .values_list('id', 'category_id', 'created_at')
+                )
+                changed_ids = {row[0] for row in changed}
+                category_ids = {
+                    int(category_id): ids
+                    for category_id, ids in manifest['categories'].items()
+                }
+                listed = {product_id for page in manifest['products'] for product_id in page}
+                oldest = manifest['oldest_listed'] and parse_datetime(manifest['oldest_listed'])
+                list_pages = bool(changed_ids & listed) or any(
+                    not oldest or created_at >= oldest
+                    for _, _, created_at in changed
+                )
+                categories = {row[1] for row in changed}
+                # Categorías de las que salió un producto cambiado
+                categories |= {
+                    category_id for category_id, ids in category_ids.items()
+                    if changed_ids.intersection(ids)
+                }
+                categories |= set(
+                    Category.objects.filter(updated_at__gt=watermark).values_list('id', flat=True)
+                )
+                if not (list_pages or categories):
+                    manifest['watermark'] = upper_bound
+                    self._save_manifest(manifest)
+                    return {'written': 0, 'removed': 0, 'full': False}
+
+            products = manifest['products'] if manifest else []
+            oldest_listed = manifest['oldest_listed'] if manifest else None
+            if list_pages:
+                products = self._render_pages(reverse('products:product-list-create'), 'products', self.pages)
+                listed = [product_id for page in products for product_id in page]
+                oldest = Product.objects.filter(id__in=listed).order_by('created_at').values_list(
+                    'created_at', flat=True
+                ).first()
+                oldest_listed = oldest.isoformat() if oldest else None
+
+            for category_id in sorted(categories):
+                ids = self._render_category(category_id)
+                if ids is None:
+                    category_ids.pop(category_id, None)
+                else:
+                    category_ids[category_id] = ids
+            self._render_pages(reverse('categories:category-list-create'), 'categories')
+
+        self._save_manifest({
+            'watermark': upper_bound,
+            'products': products,
+            'oldest_listed': oldest_listed,
+            'categories': category_ids,
+        })
+        return {'written': self.written, 'removed': self.removed, 'full': manifest is None}
+
+    def _save_manifest(self, manifest):
+        manifest = dict(manifest, watermark=manifest['watermark'].isoformat())
+        _write(
+            self._path(MANIFEST_NAME),
+            json.dumps(manifest, separators=(',', ':')).encode(),
+            compress=False,
+        )
+
+
+def build_snapshot(full=False, pages=None, base_url=None):
+    """
+    Genera las instantáneas con la configuración de settings.
+    """
+    builder = SnapshotBuilder(
+        getattr(settings, 'CATALOG_SNAPSHOT_DIR', os.path.join(settings.STATIC_ROOT, 'catalog')),
+        pages or getattr(settings, 'CATALOG_SNAPSHOT_PAGES', 5),
+        base_url or getattr(settings, 'CATALOG_SNAPSHOT_BASE_URL', 'http://localhost:8000'),
+    )
+    return builder.build(full=full)
@@ -0,0 +1,79 @@
+"""
+Estadísticas de /products/stats/ calculadas en la cola de tareas.
+
+El resultado se guarda en caché junto con la fecha del cálculo. Las
+peticiones responden siempre desde la caché; si el resultado tiene más de
+``PRODUCT_STATS_REFRESH`` segundos, la primera petición que lo nota encola
+la tarea ``products.refresh_product_stats`` (una sola por intervalo) y
+sigue respondiendo con el resultado anterior hasta que el worker lo
+reemplaza. Solo se calcula en la petición cuando la caché está vacía.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count
+from django.utils import timezone
+
+from catalogo_backend.metrics import record_cache_lookup
+from .models import Product
+from .queue import enqueue
+from .shards import in_stock_filter
+
+
+CACHE_KEY = 'products:stats'
+
+
+def compute_stats():
+    """
+    Calcula las estadísticas del catálogo activo.
+
+    Returns:
+        dict: Totales, stock, precio promedio y productos por categoría
+    """
+    active = Product.objects.filter(is_active=True)
+    total_products = active.count()
+    products_in_stock = Product.objects.filter(in_stock_filter(), is_active=True).count()
+    products_by_category = active.values('category__name').annotate(count=Count('id')).order_by('-count')
+    avg_price = active.aggregate(avg_price=Avg('price'))['avg_price'] or 0
+
+    return {
+        'total_products': total_products,
+        'products_in_stock': products_in_stock,
+        'out_of_stock': total_products - products_in_stock,
+        'average_price': round(float(avg_price), 2),
+        'products_by_category': list(products_by_category)
+    }
+
+
+def refresh_stats():
+    """
+    Recalcula las estadísticas y las deja en caché.
+
+    Returns:
+        dict: Estadísticas calculadas
+    """
+    result = compute_stats()
+    cache.set(
+        CACHE_KEY, {'result': result, 'computed_at': timezone.now()},
+        getattr(settings, 'PRODUCT_STATS_CACHE_TIMEOUT', 3600)
+    )
+    return result
+
+
+def product_stats():
+    """
+    Retorna las estadísticas desde caché y encola su recálculo si son antiguas.
+
+    Returns:
+        dict: Estadísticas del catálogo activo
+    """
+    cached = cache.get(CACHE_KEY)
+    record_cache_lookup('product_stats', cached is not None)
+    if cached is None:
+        return refresh_stats()
+
+    refresh = getattr(settings, 'PRODUCT_STATS_REFRESH', 30)
+    if (timezone.now() - cached['computed_at']).total_seconds() > refresh:
+        # cache.add es atómica: solo una petición por intervalo encola la tarea
+        if cache.add(f'{CACHE_KEY}:refreshing', True, refresh):
+            enqueue('products.refresh_product_stats')
+    return cached['result']
@@ -0,0 +1,463 @@
+"""
+Operaciones de stock sobre varios productos a la vez.
+
+Las actualizaciones masivas se validan completas antes de escribir y se
+registran como movimientos pendientes del libro (ver ledger.py) con una
+sola inserción dentro de una transacción: o se aplica todo el lote o no se
+aplica nada. fold_movements() los pliega después en ``Product.stock``.
+
+Las reservas temporales (``StockHold``) apartan stock sin escribir en la
+fila del producto hasta que el carrito se confirma con reserve_stock().
+"""
+import csv
+import io
+import uuid
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from catalogo_backend.metrics import record_stock_operation
+from .availability import active_holds, invalidate_stock, total_stock
+from .events import product_event, publish_on_commit
+from .ledger import lock_stock, record_movements, schedule_fold, stock_movement
+from .models import Product, StockHold
+from .shards import adjust_sharded_stock, stock_totals, take_sharded_stock
+
+
+STOCK_OPERATIONS = ('add', 'reduce', 'set')
+
+
+@dataclass(frozen=True)
+class StockAdjustment:
+    """
+    Ajuste de stock para un producto.
+
+    Atributos:
+        key: SKU o ID del producto, según el campo de búsqueda usado
+        quantity: Cantidad a aplicar
+        operation: add, reduce o set
+        line: Número de línea de origen, para los mensajes de error
+    """
+    key: object
+    quantity: int
+    operation: str
+    line: int = 0
+
+
+class StockAdjustmentError(Exception):
+    """
+    Error de validación de un lote de ajustes de stock.
+
+    Atributos:
+        errors: Lista de mensajes, uno por línea inválida
+    """
+
+    def __init__(self, errors):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+
+def parse_stock_csv(uploaded_file):
+    """
+    Lee un CSV con columnas sku, quantity y operation.
+
+    Args:
+        uploaded_file: Archivo subido con el CSV
+
+    Returns:
+        list: Ajustes leídos del archivo
+
+    Raises:
+        StockAdjustmentError: Si alguna línea no es válida
+    """
+    try:
+        text = uploaded_file.read().decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise StockAdjustmentError(['El archivo CSV debe estar codificado en UTF-8.'])
+    reader = csv.DictReader(io.StringIO(text, newline=''))
+    missing = {'sku', 'quantity', 'operation'} - set(reader.fieldnames or [])
+    if missing:
+        raise StockAdjustmentError(
+            [f"Faltan columnas en el CSV: {', '.join(sorted(missing))}"]
+        )
+
+    adjustments = []
+    errors = []
+    # La línea 1 es la cabecera
+    for line, row in enumerate(reader, start=2):
+        sku = (row['sku'] or '').strip()
+        operation = (row['operation'] or '').strip().lower()
+        try:
+            quantity = int((row['quantity'] or '').strip())
+        except ValueError:
+            errors.append(f"Línea {line}: cantidad inválida '{row['quantity']}'.")
+            continue
+        if not sku:
+            errors.append(f"Línea {line}: SKU vacío.")
+            continue
+        adjustments.append(StockAdjustment(sku, quantity, operation, line))
+
+    if errors:
+        raise StockAdjustmentError(errors)
+    return adjustments
+
+
+def _validate(adjustments, products, lookup):
+    """
+    Valida todo el lote contra el stock actual y retorna los errores.
+    """
+    errors = []
+    seen = set()
+    for adjustment in adjustments:
+        prefix = f"Línea {adjustment.line}" if adjustment.line else f"Producto {adjustment.key}"
+        if adjustment.operation not in STOCK_OPERATIONS:
+            errors.append(f"{prefix}: operación inválida '{adjustment.operation}'.")
+            continue
+        if adjustment.quantity < 0:
+            errors.append(f"{prefix}: la cantidad no puede ser negativa.")
+            continue
+        if adjustment.operation == 'reduce' and adjustment.quantity == 0:
+            errors.append(f"{prefix}: la cantidad a reducir debe ser mayor a cero.")
+            continue
+        if adjustment.key in seen:
+            errors.append(f"{prefix}: el producto {adjustment.key} aparece más de una vez.")
+            continue
+        seen.add(adjustment.key)
+
+        product = products.get(adjustment.key)
+        if product is None:
+            errors.append(f"{prefix}: no existe un producto con {lookup} '{adjustment.key}'.")
+        elif adjustment.operation == 'reduce' and product.total < adjustment.quantity:
+            errors.append(
+                f"{prefix}: stock insuficiente para {product.sku} "
+                f"(disponible {product.total}, solicitado {adjustment.quantity})."
+            )
+    return errors
+
+
+def _new_stock(stock, adjustment):
+    """
+    Stock resultante de aplicar un ajuste sobre el valor bloqueado.
+    """
+    if adjustment.operation == 'add':
+        return stock + adjustment.quantity
+    if adjustment.operation == 'reduce':
+        return stock - adjustment.quantity
+    return adjustment.quantity
+
+
+def apply_stock_adjustments(adjustments, lookup='sku'):
+    """
+    Valida y aplica un lote de ajustes de stock de forma atómica.
+
+    Se toma el bloqueo de stock de los productos (ledger.lock_stock(), en
+    orden de ID para que dos lotes concurrentes no se bloqueen mutuamente)
+    y se valida el lote contra su stock total; los ajustes se insertan como
+    movimientos pendientes del libro, sin bloquear ni reescribir las filas
+    de los productos. Los productos con stock fraccionado no se bloquean:
+    sus ajustes se aplican sobre las fracciones (adjust_sharded_stock()).
+
+    Args:
+        adjustments: Lista de StockAdjustment
+        lookup: Campo usado para identificar productos ('sku' o 'id')
+
+    Returns:
+        int: Número de productos actualizados
+
+    Raises:
+        StockAdjustmentError: Si alguna línea no es válida; en ese caso
+            no se modifica ningún producto.
+    """
+    if not adjustments:
+        raise StockAdjustmentError(['No se indicó ningún ajuste de stock.'])
+
+    keys = {adjustment.key for adjustment in adjustments}
+    with transaction.atomic():
+        candidates = (
+            Product.objects.filter(**{f'{lookup}__in': keys})
+            .only('id', 'sku', 'stock', 'stock_shards', 'price', 'category_id', 'is_active')
+            .annotate(total=total_stock())
+            .order_by('id')
+        )
+        lock_stock(candidates.filter(stock_shards=0).values_list('id', flat=True))
+        products = {
+            getattr(product, lookup): product
+            for product in candidates.filter(stock_shards=0)
+        }
+        products.update(
+            (getattr(product, lookup), product) for product in candidates.filter(stock_shards__gt=0)
+        )
+
+        errors = _validate(adjustments, products, lookup)
+        if errors:
+            raise StockAdjustmentError(errors)
+
+        now = timezone.now()
+        sharded = [adjustment for adjustment in adjustments if products[adjustment.key].stock_shards]
+        for adjustment in sharded:
+            product = products[adjustment.key]
+            if not adjust_sharded_stock(
+                product.id, product.stock_shards, adjustment.operation, adjustment.quantity
+            ):
+                # Otra escritura descontó de las fracciones después de validar
+                raise StockAdjustmentError([
+                    f"Producto {adjustment.key}: stock insuficiente para {product.sku}."
+                ])
+        totals = stock_totals([products[adjustment.key].id for adjustment in sharded])
+
+        invalidate_stock([products[adjustment.key].id for adjustment in adjustments])
+        movements = []
+        for adjustment in adjustments:
+            product = products[adjustment.key]
+            stock = totals.get(product.id, _new_stock(product.total, adjustment))
+            movements.append(stock_movement(
+                product.id, stock - product.total, stock, adjustment.operation, now,
+                pending=not product.stock_shards,
+            ))
+            publish_on_commit(product_event(
+                product.id,
+                product.category_id,
+                stock,
+                product.price,
+                product.is_active,
+                now,
+            ))
+        record_movements(movements)
+        if len(sharded) < len(adjustments):
+            schedule_fold()
+
+    for adjustment in adjustments:
+        record_stock_operation(adjustment.operation, 'ok')
+    return len(adjustments)
+
+
+class StockReservationError(Exception):
+    """
+    Una o más líneas de una reserva no tienen stock suficiente.
+
+    Atributos:
+        shortages: Lista de dicts con id, requested y available por línea
+    """
+
+    def __init__(self, shortages):
+        super().__init__(f'Stock insuficiente para {len(shortages)} producto(s)')
+        self.shortages = shortages
+
+
+def _shortages(lines, stock_by_id):
+    """
+    Líneas cuyo stock disponible no alcanza, en orden de ID.
+    """
+    return [
+        {
+            'id': product_id,
+            'requested': quantity,
+            'available': max(stock_by_id.get(product_id, 0), 0),
+            'missing': product_id not in stock_by_id,
+        }
+        for product_id, quantity in sorted(lines.items())
+        if stock_by_id.get(product_id, 0) < quantity
+    ]
+
+
+def _lock_products(ids, exclude_token=None):
+    """
+    Bloquea los productos activos en orden de ID con su stock disponible.
+
+    El bloqueo es el de las escrituras del libro (ledger.lock_stock()), no
+    el de la fila. El stock disponible (``available``) descuenta las
+    reservas vigentes de otros carritos. Crear una reserva toma el mismo
+    bloqueo, así que el valor no cambia mientras dure la transacción.
+
+    Los productos con stock fraccionado se leen sin bloquearlos, para no
+    volver a concentrar las compras en ellos: su descuento es un UPDATE
+    condicional sobre las fracciones y para ellos ``available`` es solo
+    orientativo. Los demás se descuentan con un movimiento pendiente del
+    libro, validado bajo este bloqueo.
+    """
+    products = (
+        Product.objects.filter(id__in=ids, is_active=True)
+        .only('id', 'stock', 'stock_shards', 'price', 'category_id', 'is_active')
+        .annotate(total=total_stock())
+        .annotate(available=F('total') - active_holds(exclude_token))
+        .order_by('id')
+    )
+    lock_stock(products.filter(stock_shards=0).values_list('id', flat=True))
+    locked = {product.id: product for product in products.filter(stock_shards=0)}
+    locked.update((product.id, product) for product in products.filter(stock_shards__gt=0))
+    return locked
+
+
+def reserve_stock(lines, hold_token=None):
+    """
+    Descuenta el stock de varios productos en una sola transacción.
+
+    Se toma el bloqueo de stock de los productos en orden de ID, así que
+    dos reservas concurrentes sobre los mismos productos esperan en lugar
+    de bloquearse mutuamente. El descuento es un movimiento pendiente
+    del libro por producto, insertados en una sola sentencia, o un UPDATE
+    condicional sobre una fracción en los productos con stock fraccionado;
+    si alguna fracción ya no alcanza la transacción se revierte y no se
+    descuenta nada.
+
+    Args:
+        lines: dict {id de producto: cantidad}
+        hold_token: Token de las reservas temporales que se confirman; sus
+            cantidades no se restan del disponible y se eliminan al descontar
+
+    Returns:
+        dict: {id: stock resultante}
+
+    Raises:
+        StockReservationError: Si algún producto no existe, está inactivo o
+            no tiene stock suficiente.
+    """
+    ids = sorted(lines)
+    try:
+        with transaction.atomic():
+            products = _lock_products(ids, hold_token)
+            shortages = _shortages(lines, {pk: p.available for pk, p in products.items()})
+            if shortages:
+                raise StockReservationError(shortages)
+
+            single = [product_id for product_id in ids if not products[product_id].stock_shards]
+            sharded = [product_id for product_id in ids if products[product_id].stock_shards]
+            now = timezone.now()
+            taken = sum(
+                take_sharded_stock(product_id, products[product_id].stock_shards, lines[product_id])
+                for product_id in sharded
+            )
+            if taken != len(sharded):
+                # Las fracciones se vaciaron después de validar
+                current = dict(
+                    Product.objects.filter(id__in=ids, is_active=True)
+                    .annotate(total=total_stock()).values_list('id', 'total')
+                )
+                raise StockReservationError(_shortages(lines, current))
+            remaining = {
+                product_id: products[product_id].total - lines[product_id] for product_id in single
+            }
+            remaining.update(stock_totals(sharded))
+
+            if hold_token:
+                held_ids = StockHold.objects.filter(token=hold_token).values_list('product_id', flat=True)
+                invalidate_stock(set(held_ids))
+                StockHold.objects.filter(token=hold_token).delete()
+
+            invalidate_stock(ids)
+            record_movements([
+                stock_movement(
+                    product_id, -lines[product_id], remaining[product_id], 'reserve', now,
+                    pending=not products[product_id].stock_shards,
+                )
+                for product_id in ids
+            ])
+            if single:
+                schedule_fold()
+            for product_id in ids:
+                product = products[product_id]
+                publish_on_commit(product_event(
+                    product.id,
+                    product.category_id,
+                    remaining[product_id],
+                    product.price,
+                    product.is_active,
+                    now,
+                ))
+    except StockReservationError:
+        record_stock_operation('reserve', 'insufficient')
+        raise
+
+    record_stock_operation('reserve', 'ok')
+    return remaining
+
+
+def place_hold(lines, timeout=None):
+    """
+    Reserva temporalmente el stock de varios productos.
+
+    No modifica la fila del producto: solo inserta una ``StockHold`` por
+    línea, que cuenta como stock no disponible hasta ``expires_at``.
+
+    Args:
+        lines: dict {id de producto: cantidad}
+        timeout: Segundos de vigencia; por defecto AVAILABILITY_HOLD_TIMEOUT
+
+    Returns:
+        dict: token y fecha de expiración de la reserva
+
+    Raises:
+        StockReservationError: Si alguna línea no tiene stock disponible.
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'AVAILABILITY_HOLD_TIMEOUT', 300)
+    ids = sorted(lines)
+    token = uuid.uuid4().hex
+    expires_at = timezone.now() + timedelta(seconds=timeout)
+    try:
+        with transaction.atomic():
+            products = _lock_products(ids)
+            shortages = _shortages(lines, {pk: p.available for pk, p in products.items()})
+            if shortages:
+                raise StockReservationError(shortages)
+            StockHold.objects.bulk_create([
+                StockHold(product_id=product_id, token=token, quantity=lines[product_id],
+                          expires_at=expires_at)
+                for product_id in ids
+            ])
+            invalidate_stock(ids)
+    except StockReservationError:
+        record_stock_operation('hold', 'insufficient')
+        raise
+
+    record_stock_operation('hold', 'ok')
+    return {'token': token, 'expires_at': timezone.localtime(expires_at)}
+
+
+def release_hold(token):
+    """
+    Libera las reservas temporales de un carrito.
+
+    Returns:
+        bool: False si no había reservas con ese token
+    """
+    with transaction.atomic():
+        holds = StockHold.objects.filter(token=token)
+        product_ids = set(holds.values_list('product_id', flat=True))
+        if not product_ids:
+            return False
+        holds.delete()
+        invalidate_stock(product_ids)
+    record_stock_operation('release', 'ok')
+    return True
+
+
+def expire_holds(batch_size=1000, now=None):
+    """
+    Elimina por lotes las reservas temporales ya expiradas.
+
+    Las reservas expiradas ya no cuentan en el stock disponible; el
+    barrido solo libera las filas. Cada lote es una transacción corta que
+    usa el índice sobre ``expires_at``.
+
+    Returns:
+        int: Número de reservas eliminadas
+    """
+    now = now or timezone.now()
+    removed = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                StockHold.objects.filter(expires_at__lte=now)
+                .order_by('expires_at')
+                .values_list('id', 'product_id')[:batch_size]
+            )
+            if not batch:
+                return removed
+            StockHold.objects.filter(id__in=[hold_id for hold_id, _ in batch]).delete()
+            invalidate_stock({product_id for _, product_id in batch})
+        removed += len(batch)
@@ -0,0 +1,92 @@
+"""
+Tareas de productos que se pueden diferir a la cola (ver queue.py).
+
+Envuelven los trabajos pesados que hoy corren en comandos o peticiones
+para encolarlos desde cualquier parte:
+
+    from products.tasks import refresh_catalog_columns
+    refresh_catalog_columns.enqueue(full=True)
+"""
+from .queue import task
+
+
+@task(name='products.refresh_catalog_columns', max_attempts=2)
+def refresh_catalog_columns(full=False):
+    """
+    Genera una nueva instantánea en columnas (ver columnar.py).
+    """
+    from .columnar import refresh_columns
+
+    return refresh_columns(full=full)
+
+
+@task(name='products.build_catalog_snapshot', max_attempts=2, lease=1800)
+def build_catalog_snapshot(full=False):
+    """
+    Regenera las instantáneas estáticas en JSON (ver static_snapshot.py).
+    """
+    from .static_snapshot import build_snapshot
+
+    return build_snapshot(full=full)
+
+
+@task(name='products.warm_analytics', max_attempts=1)
+def warm_analytics(bins=20):
+    """
+    Calcula /products/analytics/ para dejarlo en caché.
+    """
+    from .analytics import product_analytics
+
+    result = product_analytics(bins)
+    return {'total_products': result['total_products'], 'source': result['source']}
+
+
+@task(name='products.refresh_product_stats', max_attempts=1)
+def refresh_product_stats():
+    """
+    Recalcula /products/stats/ y lo deja en caché (ver stats.py).
+    """
+    from .stats import refresh_stats
+
+    return {'total_products': refresh_stats()['total_products']}
+
+
+@task(name='products.scan_low_stock')
+def scan_low_stock():
+    """
+    Sincroniza las alertas de stock bajo (ver low_stock.py).
+    """
+    from .low_stock import scan_low_stock as scan
+
+    opened, resolved = scan()
+    return {'opened': len(opened), 'resolved': len(resolved)}
+
+
+@task(name='products.sync_stock_shards')
+def sync_stock_shards():
+    """
+    Reparte y publica el stock de los productos fraccionados (ver shards.py).
+    """
+    from .shards import sync_sharded_products
+
+    return {'products': sync_sharded_products()}
+
+
+@task(name='products.fold_stock_ledger')
+def fold_stock_ledger():
+    """
+    Pliega los movimientos pendientes del libro en Product.stock (ver ledger.py).
+    """
+    from .ledger import fold_movements
+
+    return {'products': fold_movements()}
+
+
+@task(name='products.run_export', max_attempts=2, lease=3600)
+def run_export(export_id):
+    """
+    Genera el archivo de una exportación (ver exports.py).
+    """
+    from .exports import run_export as run
+
+    return run(export_id)
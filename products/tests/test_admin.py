@@ -0,0 +1,53 @@
+"""
+Pruebas de las acciones del admin de productos.
+"""
+from unittest import mock
+
+from django.contrib.admin import helpers
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from products.models import Product
+from .utils import make_category, make_product
+
+
+class ProductAdminActionTests(TestCase):
+    """
+    Activar y desactivar desde el admin publica los cambios como una edición.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'clave')
+        category = make_category()
+        cls.active = make_product(category, name='Activo')
+        cls.inactive = make_product(category, name='Inactivo', is_active=False)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def run_action(self, action):
+        with mock.patch('products.models.publish_on_commit') as publish:
+            response = self.client.post(reverse('admin:products_product_changelist'), {
+                'action': action,
+                helpers.ACTION_CHECKBOX_NAME: [self.active.pk, self.inactive.pk],
+            })
+        self.assertEqual(response.status_code, 302)
+        return [call.args[0] for call in publish.call_args_list]
+
+    def test_deactivate_publishes_one_event_per_changed_product(self):
+        before = Product.objects.get(pk=self.active.pk).updated_at
+
+        events = self.run_action('deactivate_products')
+
+        product = Product.objects.get(pk=self.active.pk)
+        self.assertFalse(product.is_active)
+        self.assertGreater(product.updated_at, before)
+        self.assertEqual([(event['id'], event['is_active']) for event in events], [(self.active.pk, False)])
+
+    def test_activate_publishes_one_event_per_changed_product(self):
+        events = self.run_action('activate_products')
+
+        self.assertTrue(Product.objects.get(pk=self.inactive.pk).is_active)
+        self.assertEqual([(event['id'], event['is_active']) for event in events], [(self.inactive.pk, True)])
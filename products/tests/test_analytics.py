@@ -0,0 +1,80 @@
+"""
+Pruebas de la analítica de precios y stock.
+"""
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import skipIf
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from products import analytics, columnar
+from products.models import Product
+from .utils import make_category, make_product
+
+
+class AnalyticsTests(TestCase):
+    """
+    El cálculo con SQL usa un número fijo de consultas y coincide con el de columnas.
+    """
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings = override_settings(CATALOG_COLUMNS_DIR=directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        columnar._current.update(version=None, columns=None)
+        cache.clear()
+
+    def make_catalog(self, categories, prefix='Categoría'):
+        for c in range(categories):
+            category = make_category(f'{prefix} {c}')
+            for i in range(c + 2):
+                make_product(category, name=f'Producto {c}-{i}', price=100 + 7 * i + c, stock=i)
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            analytics._from_database(bins=5)
+        return len(queries)
+
+    def test_database_queries_do_not_grow_with_categories(self):
+        self.make_catalog(2)
+        few = self.count_queries()
+        self.make_catalog(6, prefix='Otra')
+
+        self.assertEqual(self.count_queries(), few)
+
+    @skipIf(columnar.np is None, 'La instantánea en columnas requiere NumPy')
+    def test_database_matches_columns(self):
+        self.make_catalog(4)
+        columnar.refresh_columns(full=True)
+
+        from_database = analytics._from_database(bins=5)
+        from_columns = analytics._from_columns(columnar.load_columns(), bins=5)
+
+        self.assertEqual(from_database['categories'], from_columns['categories'])
+        self.assertEqual(from_database['price'], from_columns['price'])
+        self.assertEqual(from_database['stock']['percentiles'], from_columns['stock']['percentiles'])
+
+    @skipIf(columnar.np is None, 'La instantánea en columnas requiere NumPy')
+    @override_settings(DELTA_SYNC_SAFETY_WINDOW=0)
+    def test_changes_after_the_snapshot_are_included(self):
+        self.make_catalog(2)
+        columnar.refresh_columns(full=True)
+        self.assertEqual(analytics.product_analytics(bins=5)['source'], 'columns')
+
+        product = Product.objects.order_by('price').first()
+        product.price = Decimal('1')
+        product.save()
+        result = analytics.product_analytics(bins=5)
+
+        self.assertEqual(result['source'], 'database')
+        self.assertEqual(result['price']['min'], 1.0)
+
+        columnar.refresh_columns()
+        result = analytics.product_analytics(bins=5)
+        self.assertEqual((result['source'], result['price']['min']), ('columns', 1.0))
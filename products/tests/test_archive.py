@@ -0,0 +1,69 @@
+"""
+Pruebas del archivo de productos inactivos.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from products.archive import archive_products
+from products.ledger import fold_movements, ledger_mismatches
+from products.models import ArchivedProduct, DailyPrice, PriceChange, Product, StockMovement
+from products.shards import enable_sharding
+from .utils import make_category, make_product
+
+
+class ArchiveProductsTests(TestCase):
+    """
+    El archivo mueve el producto y conserva su libro de stock e historial de precios.
+    """
+
+    def setUp(self):
+        self.category = make_category()
+        self.product = make_product(self.category, stock=10)
+        self.product.price = Decimal('120')
+        self.product.save()
+        self.product.add_stock(5)
+
+    def archive(self, product):
+        product.soft_delete()
+        Product.objects.filter(pk=product.pk).update(updated_at=timezone.now() - timedelta(days=400))
+        return archive_products(timezone.now() - timedelta(days=365))
+
+    def test_archive_keeps_stock_ledger_and_price_history(self):
+        self.assertEqual(self.archive(self.product), (1, 0))
+
+        self.assertFalse(Product.objects.filter(pk=self.product.pk).exists())
+        archived = ArchivedProduct.objects.get(pk=self.product.pk)
+        self.assertEqual(archived.stock, 15)
+        balances = list(
+            StockMovement.objects.filter(product_id=self.product.pk)
+            .order_by('created_at', 'id').values_list('balance', 'pending')
+        )
+        self.assertEqual(balances, [(10, False), (15, False)])
+        self.assertEqual(PriceChange.objects.filter(product_id=self.product.pk).count(), 2)
+        self.assertTrue(DailyPrice.objects.filter(product_id=self.product.pk).exists())
+        self.assertEqual(fold_movements(), 0)
+        self.assertEqual(ledger_mismatches(), [])
+
+    def test_archived_history_is_still_served(self):
+        self.archive(self.product)
+
+        stock = self.client.get(reverse('products:product-stock-history', args=[self.product.pk]))
+        prices = self.client.get(reverse('products:product-price-history', args=[self.product.pk]))
+
+        self.assertEqual(stock.status_code, 200)
+        self.assertEqual(stock.json()['count'], 2)
+        self.assertEqual(prices.status_code, 200)
+        self.assertEqual(len(prices.json()['changes']), 2)
+
+    def test_archive_folds_sharded_stock(self):
+        enable_sharding(self.product.pk, shards=3)
+        self.product.refresh_from_db()
+        self.product.reduce_stock(4)
+
+        self.archive(self.product)
+
+        self.assertEqual(ArchivedProduct.objects.get(pk=self.product.pk).stock, 11)
@@ -0,0 +1,84 @@
+"""
+Pruebas del listado resuelto con la instantánea en columnas.
+"""
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import skipIf
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from products import columnar
+from products.models import Product
+from .utils import make_category, make_product
+
+
+@skipIf(columnar.np is None, 'La instantánea en columnas requiere NumPy')
+class ColumnarListingTests(TestCase):
+    """
+    La instantánea solo responde con filtros y refleja los cambios posteriores a ella.
+    """
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings = override_settings(CATALOG_COLUMNS_DIR=directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        columnar._current.update(version=None, columns=None)
+
+        self.category = make_category()
+        self.products = [
+            make_product(self.category, name=f'Producto {i}', price=100 + i) for i in range(25)
+        ]
+        columnar.refresh_columns(full=True)
+        self.url = reverse('products:product-list-create')
+
+    def listing(self, **params):
+        pages = []
+        page = 1
+        while True:
+            data = self.client.get(self.url, {**params, 'page': page}).json()
+            pages.append([item['id'] for item in data['results']])
+            if not data['next']:
+                return data['count'], pages
+            page += 1
+
+    def test_default_listing_is_served_by_sql(self):
+        new = make_product(self.category, name='Nuevo')
+
+        data = self.client.get(self.url).json()
+
+        self.assertEqual(data['count'], 26)
+        self.assertEqual(data['results'][0]['id'], new.id)
+
+    def test_filtered_listing_applies_changes_since_the_snapshot(self):
+        for product in self.products[:3]:
+            product.soft_delete()
+        cheapest = self.products[10]
+        cheapest.price = Decimal('1')
+        cheapest.save()
+        new = make_product(self.category, name='Nuevo', price=500)
+        self.assertIsNotNone(columnar.select_ids({'min_price': '0'}))
+
+        count, pages = self.listing(min_price='0', ordering='price')
+
+        self.assertEqual(count, 23)
+        self.assertEqual([len(page) for page in pages], [20, 3])
+        ids = [product_id for page in pages for product_id in page]
+        self.assertEqual(ids[0], cheapest.id)
+        self.assertEqual(ids[-1], new.id)
+        self.assertEqual(ids, list(
+            Product.objects.filter(is_active=True).order_by('price', 'id').values_list('id', flat=True)
+        ))
+
+    def test_descending_order_by_name_places_changed_rows(self):
+        renamed = self.products[0]
+        renamed.name = 'Zeta'
+        renamed.save()
+
+        count, pages = self.listing(in_stock='true', ordering='-name')
+
+        self.assertEqual(count, 25)
+        self.assertEqual(pages[0][0], renamed.id)
@@ -0,0 +1,56 @@
+"""
+Pruebas de la interpretación de la cabecera Range en las descargas.
+"""
+from django.test import SimpleTestCase
+
+from products.exports import RangeNotSatisfiable, parse_range
+
+
+class ParseRangeTests(SimpleTestCase):
+    """
+    Rangos válidos, cabeceras que se ignoran y rangos fuera del archivo.
+    """
+
+    def test_ignored_headers_return_none(self):
+        for header in [
+            None,
+            '',
+            'items=0-10',
+            'bytes=',
+            'bytes=abc',
+            'bytes=-',
+            'bytes=5',
+            'bytes=a-10',
+            'bytes=5-b',
+            'bytes=10-5',
+            'bytes=0-10,20-30',
+        ]:
+            with self.subTest(header=header):
+                self.assertIsNone(parse_range(header, 1000))
+
+    def test_closed_range(self):
+        self.assertEqual(parse_range('bytes=0-499', 1000), (0, 499))
+        self.assertEqual(parse_range('bytes= 500-999', 1000), (500, 999))
+
+    def test_open_ended_range_runs_to_the_end(self):
+        self.assertEqual(parse_range('bytes=500-', 1000), (500, 999))
+
+    def test_end_is_clamped_to_the_file_size(self):
+        self.assertEqual(parse_range('bytes=900-5000', 1000), (900, 999))
+
+    def test_suffix_range(self):
+        self.assertEqual(parse_range('bytes=-200', 1000), (800, 999))
+        # Un sufijo más largo que el archivo devuelve el archivo completo
+        self.assertEqual(parse_range('bytes=-5000', 1000), (0, 999))
+
+    def test_unsatisfiable_ranges(self):
+        for header, size in [
+            ('bytes=1000-', 1000),
+            ('bytes=1500-2000', 1000),
+            ('bytes=-0', 1000),
+            ('bytes=-10', 0),
+            ('bytes=0-', 0),
+        ]:
+            with self.subTest(header=header, size=size):
+                with self.assertRaises(RangeNotSatisfiable):
+                    parse_range(header, size)
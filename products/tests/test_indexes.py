@@ -0,0 +1,81 @@
+"""
+Pruebas de los índices parciales de productos con EXPLAIN.
+"""
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from products.shards import enable_sharding
+from .utils import endpoint_plans, make_category, make_product
+
+
+class ProductIndexTests(TestCase):
+    """
+    Verifica que las consultas que ejecutan los endpoints usan sus índices.
+
+    Los planes se obtienen del SQL que generan las vistas (con su
+    get_queryset(), sus filtros y la anotación del stock total), no de
+    querysets escritos a mano.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = make_category()
+        other = make_category('Ropa')
+        for i in range(40):
+            make_product(
+                cls.category if i % 2 else other, name=f'Producto {i}', price=100 + i,
+                stock=i % 5, is_active=i % 4 != 0, reorder_threshold=3
+            )
+        # Un producto fraccionado hace que el filtro de stock consulte sus fracciones
+        enable_sharding(make_product(cls.category, name='Fraccionado', stock=8).pk, shards=2)
+
+    def setUp(self):
+        # /products/stats/ solo consulta la base de datos con la caché vacía
+        cache.clear()
+
+    def assertEndpointUses(self, index, url, params=None):
+        plans = endpoint_plans(self.client, url, params)
+        self.assertTrue(plans, 'El endpoint no consultó la tabla de productos')
+        self.assertTrue(
+            any(index in plan for plan in plans),
+            f'{index} no aparece en los planes:\n' + '\n\n'.join(plans)
+        )
+
+    def test_default_listing_uses_active_created_index(self):
+        self.assertEndpointUses('products_active_created_idx', reverse('products:product-list-create'))
+
+    def test_price_range_listing_uses_price_index(self):
+        self.assertEndpointUses(
+            'products_active_price_idx', reverse('products:product-list-create'),
+            {'min_price': '110', 'max_price': '120'}
+        )
+
+    def test_category_price_listing_uses_category_price_index(self):
+        self.assertEndpointUses(
+            'products_active_cat_price_idx', reverse('products:product-list-create'),
+            {'category': self.category.pk, 'min_price': '110', 'ordering': 'price'}
+        )
+
+    def test_in_stock_filters_use_in_stock_index(self):
+        for name, params in [
+            ('products:product-list-create', {'in_stock': 'true'}),
+            ('products:product-search', {'in_stock': 'true'}),
+            ('products:product-stats', None),
+        ]:
+            with self.subTest(endpoint=name):
+                self.assertEndpointUses('products_in_stock_idx', reverse(name), params)
+
+    def test_low_stock_uses_low_stock_index(self):
+        url = reverse('products:product-low-stock')
+        for params in [None, {'category': self.category.pk}]:
+            with self.subTest(params=params):
+                self.assertEndpointUses('products_low_stock_idx', url, params)
+
+    def test_category_products_use_category_date_index(self):
+        self.assertEndpointUses(
+            'products_active_cat_date_idx', reverse('categories:category-products', args=[self.category.pk])
+        )
+
+    def test_changes_feed_uses_updated_index(self):
+        self.assertEndpointUses('products_updated_idx', reverse('products:product-changes'))
@@ -0,0 +1,132 @@
+"""
+Pruebas del libro de movimientos de stock.
+"""
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from products import ledger
+from products.ledger import compact_ledger, fold_movements, ledger_mismatches
+from products.models import Product, StockMovement, Task
+from products.queue import work
+from products.stock import (
+    StockAdjustment,
+    StockAdjustmentError,
+    apply_stock_adjustments,
+    reserve_stock,
+)
+from products.sync import changes_queryset
+from .utils import make_category, make_product
+
+
+class StockLedgerTests(TestCase):
+    """
+    Escrituras como movimientos pendientes, su pliegue y la compactación.
+    """
+
+    def setUp(self):
+        self.category = make_category()
+        self.product = make_product(self.category, stock=10)
+        ledger._fold_scheduled_until = None
+        self.addCleanup(setattr, ledger, '_fold_scheduled_until', None)
+
+    def movements(self):
+        return list(
+            StockMovement.objects.filter(product=self.product)
+            .order_by('created_at', 'id').values_list('quantity', 'balance', 'reason', 'pending')
+        )
+
+    def test_writes_append_pending_movements_without_rewriting_the_product(self):
+        updated_at = self.product.updated_at
+
+        self.product.add_stock(5)
+        self.assertTrue(self.product.reduce_stock(3))
+        self.assertFalse(self.product.reduce_stock(50))
+
+        self.assertEqual(self.product.get_total_stock(), 12)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.product.updated_at), (10, updated_at))
+        self.assertEqual(self.movements(), [
+            (10, 10, 'create', False), (5, 15, 'add', True), (-3, 12, 'reduce', True),
+        ])
+        self.assertEqual(Product.objects.get(pk=self.product.pk).get_total_stock(), 12)
+
+    def test_fold_applies_pending_movements_and_publishes_the_change(self):
+        self.product.add_stock(5)
+        reserve_stock({self.product.id: 4})
+        since = (self.product.updated_at, self.product.id)
+
+        self.assertEqual(fold_movements(), 1)
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 11)
+        self.assertFalse(StockMovement.objects.filter(pending=True).exists())
+        changed = changes_queryset(Product.objects.all(), since, timezone.now())
+        self.assertEqual(list(changed.values_list('id', flat=True)), [self.product.id])
+        self.assertEqual(ledger_mismatches(), [])
+        # Sin movimientos nuevos no hay nada que plegar
+        self.assertEqual(fold_movements(), 0)
+
+    def test_writes_schedule_one_fold_per_interval(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.add_stock(5)
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve_stock({self.product.id: 2})
+
+        task = Task.objects.get(name='products.fold_stock_ledger')
+        self.assertGreater(task.run_at, timezone.now())
+
+        Task.objects.filter(pk=task.pk).update(run_at=timezone.now())
+        self.assertEqual(work(burst=True), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 13)
+        self.assertGreater(self.product.updated_at, task.created_at)
+        self.assertFalse(StockMovement.objects.filter(pending=True).exists())
+
+    def test_save_does_not_overwrite_stock(self):
+        product = Product.objects.get(pk=self.product.pk)
+        self.product.add_stock(5)
+        fold_movements()
+
+        product.name = 'Renombrado'
+        product.save()
+        product.set_stock(7)
+
+        self.assertEqual(Product.objects.get(pk=product.pk).get_total_stock(), 7)
+        self.assertEqual(self.movements()[-1], (-8, 7, 'set', True))
+
+    def test_bulk_adjustments_are_validated_against_pending_movements(self):
+        self.product.reduce_stock(8)
+
+        apply_stock_adjustments([StockAdjustment(self.product.sku, 2, 'reduce')])
+        with self.assertRaises(StockAdjustmentError):
+            apply_stock_adjustments([StockAdjustment(self.product.sku, 1, 'reduce')])
+
+        fold_movements()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 0)
+        self.assertEqual(ledger_mismatches(), [])
+
+    def test_compaction_keeps_the_latest_balance_across_runs(self):
+        self.product.add_stock(5)
+        self.product.add_stock(10)
+        fold_movements()
+        now = timezone.now()
+        for days, movement in zip((30, 20, 10), StockMovement.objects.order_by('id')):
+            StockMovement.objects.filter(pk=movement.pk).update(created_at=now - timedelta(days=days))
+
+        self.assertEqual(compact_ledger(now - timedelta(days=15)), (1, 2))
+        # La snapshot tiene un id mayor que el movimiento posterior que se conserva
+        self.assertEqual(compact_ledger(now - timedelta(days=5)), (1, 2))
+
+        self.assertEqual(self.movements(), [(25, 25, 'snapshot', False)])
+        self.assertEqual(ledger_mismatches(), [])
+
+    def test_compaction_skips_pending_movements(self):
+        self.product.add_stock(5)
+        self.product.add_stock(1)
+        StockMovement.objects.update(created_at=timezone.now() - timedelta(days=30))
+
+        self.assertEqual(compact_ledger(timezone.now()), (0, 0))
+        self.assertEqual(len(self.movements()), 3)
@@ -0,0 +1,118 @@
+"""
+Pruebas de la cola de tareas en base de datos.
+"""
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from products.models import Task, TaskLock
+from products.queue import claim_task, enqueue, requeue_expired, run_task, task, work
+
+
+@task(name='tests.echo', max_attempts=2, retry_delay=10)
+def echo(value):
+    return {'value': value}
+
+
+@task(name='tests.broken', max_attempts=2, retry_delay=10)
+def broken():
+    raise ValueError('falla')
+
+
+def expire_leases():
+    past = timezone.now() - timedelta(seconds=1)
+    Task.objects.filter(status=Task.RUNNING).update(locked_until=past)
+    TaskLock.objects.update(locked_until=past)
+
+
+class ClaimTaskTests(TestCase):
+    """
+    Reclamo de tareas: orden, exclusión entre workers y plazos vencidos.
+    """
+
+    def test_claims_the_oldest_ready_task(self):
+        now = timezone.now()
+        later = enqueue('tests.echo', {'value': 2}, run_at=now - timedelta(seconds=10))
+        first = enqueue('tests.echo', {'value': 1}, run_at=now - timedelta(seconds=20))
+        enqueue('tests.echo', {'value': 3}, run_at=now + timedelta(hours=1))
+
+        claimed = claim_task('worker-a')
+
+        self.assertEqual(claimed.id, first.id)
+        self.assertEqual((claimed.status, claimed.attempts, claimed.locked_by), (Task.RUNNING, 1, 'worker-a'))
+        self.assertIsNotNone(claimed.locked_until)
+        self.assertEqual(claim_task('worker-b').id, later.id)
+        # La tarea programada para después todavía no se reclama
+        self.assertIsNone(claim_task('worker-c'))
+
+    def test_skips_a_task_locked_by_another_worker(self):
+        locked = enqueue('tests.echo', {'value': 1}, run_at=timezone.now() - timedelta(seconds=5))
+        free = enqueue('tests.echo', {'value': 2})
+        # Otro worker insertó el bloqueo pero todavía no marcó la tarea
+        TaskLock.objects.create(task=locked, locked_by='worker-a', locked_until=timezone.now() + timedelta(minutes=5))
+
+        claimed = claim_task('worker-b')
+
+        self.assertEqual(claimed.id, free.id)
+        self.assertEqual(Task.objects.get(id=locked.id).status, Task.PENDING)
+
+    def test_requeue_expired_returns_the_task_or_fails_it(self):
+        retried = enqueue('tests.echo', {'value': 1}, run_at=timezone.now() - timedelta(seconds=5))
+        exhausted = enqueue('tests.echo', {'value': 2})
+        claim_task('worker-a')
+        claim_task('worker-a')
+        Task.objects.filter(id=exhausted.id).update(attempts=2)
+        expire_leases()
+
+        self.assertEqual(requeue_expired(), 1)
+
+        retried.refresh_from_db()
+        exhausted.refresh_from_db()
+        self.assertEqual((retried.status, retried.locked_by), (Task.PENDING, ''))
+        self.assertEqual(exhausted.status, Task.FAILED)
+        self.assertFalse(TaskLock.objects.exists())
+        self.assertEqual(claim_task('worker-b').id, retried.id)
+
+
+class RunTaskTests(TestCase):
+    """
+    Resultado, reintentos y tareas que vencieron mientras se ejecutaban.
+    """
+
+    def test_work_runs_ready_tasks(self):
+        enqueue('tests.echo', {'value': 1})
+        enqueue('tests.echo', {'value': 2})
+
+        self.assertEqual(work(burst=True), 2)
+
+        self.assertEqual(
+            list(Task.objects.order_by('id').values_list('status', 'result')),
+            [(Task.DONE, {'value': 1}), (Task.DONE, {'value': 2})],
+        )
+        self.assertFalse(TaskLock.objects.exists())
+
+    def test_errors_are_retried_until_the_last_attempt(self):
+        queued = enqueue('tests.broken')
+
+        self.assertEqual(run_task(claim_task('worker-a')), 'retry')
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.PENDING)
+        self.assertGreater(queued.run_at, timezone.now())
+        self.assertIn('ValueError', queued.last_error)
+
+        Task.objects.filter(id=queued.id).update(run_at=timezone.now())
+        self.assertEqual(run_task(claim_task('worker-a')), 'failed')
+        self.assertEqual(Task.objects.get(id=queued.id).status, Task.FAILED)
+
+    def test_expired_task_keeps_the_new_worker_claim(self):
+        enqueue('tests.echo', {'value': 1})
+        stale = claim_task('worker-a')
+        expire_leases()
+        requeue_expired()
+        current = claim_task('worker-b')
+
+        run_task(stale)
+
+        current.refresh_from_db()
+        self.assertEqual((current.status, current.locked_by), (Task.RUNNING, 'worker-b'))
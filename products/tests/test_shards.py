@@ -0,0 +1,112 @@
+"""
+Pruebas del stock fraccionado.
+"""
+import tempfile
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from products.models import Product, StockShard
+from products.shards import enable_sharding, sync_sharded_products
+from products.stock import (
+    StockAdjustment,
+    StockReservationError,
+    apply_stock_adjustments,
+    reserve_stock,
+)
+from products.sync import changes_queryset
+from .utils import make_category, make_product
+
+
+class ShardedStockTests(TestCase):
+    """
+    Escrituras sobre fracciones, su publicación en segundo plano y las lecturas.
+    """
+
+    def setUp(self):
+        self.category = make_category()
+        self.product = make_product(self.category, stock=40)
+        enable_sharding(self.product.id, shards=4)
+        self.product.refresh_from_db()
+
+    def shards(self):
+        return list(
+            StockShard.objects.filter(product=self.product).order_by('shard').values_list('stock', flat=True)
+        )
+
+    def test_reduce_writes_a_shard_without_touching_the_product_row(self):
+        updated_at = self.product.updated_at
+
+        self.assertTrue(self.product.reduce_stock(3))
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.updated_at, updated_at)
+        self.assertEqual(self.product.stock, 0)
+        self.assertEqual(sum(self.shards()), 37)
+        self.assertTrue(StockShard.objects.filter(product=self.product, dirty=True).exists())
+
+    def test_sync_publishes_the_change_and_rebalances(self):
+        self.product.reduce_stock(10)
+        since = (self.product.updated_at, self.product.id)
+
+        self.assertEqual(sync_sharded_products(), 1)
+
+        self.assertEqual(self.shards(), [8, 8, 7, 7])
+        self.assertFalse(StockShard.objects.filter(product=self.product, dirty=True).exists())
+        changed = changes_queryset(Product.objects.all(), since, timezone.now())
+        self.assertEqual(list(changed.values_list('id', flat=True)), [self.product.id])
+        # Sin escrituras nuevas no hay nada que sincronizar
+        self.assertEqual(sync_sharded_products(), 0)
+
+    def test_reserve_takes_from_shards_without_folding(self):
+        other = make_product(self.category, name='Otro', stock=5)
+
+        remaining = reserve_stock({self.product.id: 6, other.id: 2})
+
+        self.assertEqual(remaining, {self.product.id: 34, other.id: 3})
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 0)
+        self.assertEqual(sum(self.shards()), 34)
+        self.assertEqual(sorted(self.shards()), [4, 10, 10, 10])
+
+    def test_reserve_rolls_back_every_line_on_shortage(self):
+        other = make_product(self.category, name='Otro', stock=1)
+
+        with self.assertRaises(StockReservationError):
+            reserve_stock({self.product.id: 6, other.id: 2})
+
+        self.assertEqual(sum(self.shards()), 40)
+        other.refresh_from_db()
+        self.assertEqual(other.stock, 1)
+
+    def test_bulk_adjustments_apply_to_shards(self):
+        apply_stock_adjustments([StockAdjustment(self.product.sku, 5, 'add')])
+        self.assertEqual(sum(self.shards()), 45)
+
+        apply_stock_adjustments([StockAdjustment(self.product.sku, 44, 'reduce')])
+        self.assertEqual(sum(self.shards()), 1)
+
+        apply_stock_adjustments([StockAdjustment(self.product.sku, 12, 'set')])
+        self.assertEqual(self.shards(), [3, 3, 3, 3])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 0)
+
+    @override_settings(CATALOG_COLUMNS_DIR=tempfile.gettempdir() + '/missing-catalog-columns')
+    def test_listing_sums_shards_in_the_same_query(self):
+        url = reverse('products:product-list-create')
+
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(url)
+        for i in range(5):
+            product = make_product(self.category, name=f'Fraccionado {i}', stock=8)
+            enable_sharding(product.id, shards=2)
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(url)
+
+        self.assertEqual(len(many), len(few))
+        stocks = {item['id']: item['stock'] for item in response.json()['results']}
+        self.assertEqual(stocks[self.product.id], 40)
+        self.assertEqual(sorted(stocks.values()), [8, 8, 8, 8, 8, 40])
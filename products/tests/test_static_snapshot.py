@@ -0,0 +1,49 @@
+"""
+Pruebas de las instantáneas estáticas del catálogo.
+"""
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase
+
+from products.static_snapshot import SnapshotBuilder, _write
+from .utils import make_category, make_product
+
+
+class SnapshotBuilderTests(TestCase):
+    """
+    Generación completa de páginas y limpieza de las que sobran.
+    """
+
+    def setUp(self):
+        category = make_category()
+        # Tres páginas de 20 productos
+        for i in range(45):
+            make_product(category, name=f'Producto {i}')
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def pages(self, folder='products'):
+        return sorted(
+            name for name in os.listdir(os.path.join(self.directory, folder))
+            if name.endswith('.json')
+        )
+
+    def stale_pages(self, *numbers):
+        for number in numbers:
+            _write(os.path.join(self.directory, 'products', f'page-{number}.json'), b'{}')
+
+    def test_pages_beyond_max_pages_are_removed(self):
+        self.stale_pages(1, 2, 3, 4)
+
+        SnapshotBuilder(self.directory, 2, 'http://testserver').build(full=True)
+
+        self.assertEqual(self.pages(), ['page-1.json', 'page-2.json'])
+
+    def test_pages_after_the_last_one_are_removed(self):
+        self.stale_pages(4, 5)
+
+        SnapshotBuilder(self.directory, 10, 'http://testserver').build(full=True)
+
+        self.assertEqual(self.pages(), ['page-1.json', 'page-2.json', 'page-3.json'])
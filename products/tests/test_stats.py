@@ -0,0 +1,60 @@
+"""
+Pruebas de las estadísticas de productos servidas desde caché.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from products import stats
+from products.models import Task
+from products.queue import work
+from .utils import make_category, make_product
+
+
+@override_settings(PRODUCT_STATS_REFRESH=30)
+class ProductStatsTests(TestCase):
+    """
+    Las peticiones responden desde caché y el recálculo corre en la cola.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.category = make_category()
+        make_product(self.category, stock=5)
+        make_product(self.category, name='Agotado', stock=0)
+
+    def get_stats(self):
+        response = self.client.get(reverse('products:product-stats'))
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def age_cached_stats(self, seconds):
+        cached = cache.get(stats.CACHE_KEY)
+        cached['computed_at'] -= timedelta(seconds=seconds)
+        cache.set(stats.CACHE_KEY, cached)
+
+    def test_empty_cache_is_computed_in_the_request(self):
+        data = self.get_stats()
+
+        self.assertEqual((data['total_products'], data['products_in_stock']), (2, 1))
+        self.assertFalse(Task.objects.exists())
+
+    def test_stale_stats_are_refreshed_by_the_worker(self):
+        self.get_stats()
+        make_product(self.category, name='Nuevo', stock=3)
+
+        # Dentro del intervalo se responde desde caché sin encolar nada
+        self.assertEqual(self.get_stats()['total_products'], 2)
+        self.assertFalse(Task.objects.exists())
+
+        self.age_cached_stats(60)
+        self.assertEqual(self.get_stats()['total_products'], 2)
+        self.assertEqual(self.get_stats()['total_products'], 2)
+        self.assertEqual(Task.objects.filter(name='products.refresh_product_stats').count(), 1)
+
+        self.assertEqual(work(burst=True), 1)
+        data = self.get_stats()
+        self.assertEqual((data['total_products'], data['products_in_stock']), (3, 2))
@@ -0,0 +1,36 @@
+"""
+Pruebas del stream SSE de cambios de productos.
+"""
+import json
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .utils import make_category, make_product
+
+
+@override_settings(PRODUCT_EVENTS_SOCKET_DIR='')
+class ProductStreamTests(TestCase):
+    """
+    El snapshot inicial informa el mismo stock que los endpoints REST.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = make_product(make_category(), stock=10)
+        cls.product.add_stock(5)
+
+    async def test_snapshot_reports_total_stock(self):
+        response = await self.async_client.get(
+            reverse('products:product-stream'), {'products': str(self.product.pk)}
+        )
+        chunks = aiter(response.streaming_content)
+        try:
+            await anext(chunks)
+            snapshot = await anext(chunks)
+        finally:
+            await chunks.aclose()
+
+        event, data = snapshot.decode().strip().split('\n')
+        self.assertEqual(event, 'event: snapshot')
+        self.assertEqual(json.loads(data.removeprefix('data: '))['stock'], 15)
@@ -0,0 +1,51 @@
+"""
+Utilidades compartidas por las pruebas de productos.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from categories.models import Category
+from products.models import Product
+
+
+def make_category(name='Electrónicos', **fields):
+    """
+    Crea una categoría de prueba.
+    """
+    return Category.objects.create(name=name, **fields)
+
+
+def make_product(category, name='Producto', price=100, stock=10, **fields):
+    """
+    Crea un producto de prueba.
+    """
+    return Product.objects.create(
+        name=name, description='Descripción', price=price, category=category, stock=stock, **fields
+    )
+
+
+def endpoint_plans(client, url, params=None, table='products'):
+    """
+    Hace un GET al endpoint y retorna el plan de ejecución de cada consulta
+    que ejecutó sobre ``table``, con el SQL tal como lo generó la vista.
+
+    En PostgreSQL desactiva el recorrido secuencial dentro de la transacción
+    de la prueba: con tablas de pocas filas el planificador lo prefiere
+    aunque exista un índice aplicable.
+
+    Returns:
+        list: Planes en texto, en el orden de las consultas
+    """
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, params or {})
+    assert response.status_code == 200, response.content
+    plans = []
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if sql.startswith('SELECT') and f'FROM "{table}"' in sql:
+                cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}')
+                plans.append('\n'.join(str(row[-1]) for row in cursor.fetchall()))
+    return plans
@@ -16,12 +16,44 @@ urlpatterns = [
     # Búsqueda avanzada de productos
     path('products/search/', views.product_search, name='product-search'),
     
+    # Varios productos por IDs o SKUs en una sola petición
+    path('products/batch/', views.product_batch, name='product-batch'),
+    
+    # Disponibilidad de stock de las líneas de un carrito
+    path('products/availability/', views.product_availability, name='product-availability'),
+    
+    # Reserva atómica del stock de varios productos
+    path('products/reserve/', views.reserve_products, name='product-reserve'),
+    
     # Actualización de stock
     path('products/<int:product_id>/stock/', views.update_product_stock, name='product-stock-update'),
     
+    # Historial de movimientos de stock
+    path('products/<int:product_id>/stock-history/', views.product_stock_history, name='product-stock-history'),
+    
+    # Evolución del precio en un rango de fechas
+    path('products/<int:product_id>/price-history/', views.product_price_history, name='product-price-history'),
+    
+    # Sincronización incremental
+    path('products/changes/', views.product_changes, name='product-changes'),
+    
+    # Stream de cambios de stock y precio (Server-Sent Events, requiere ASGI)
+    path('products/stream/', views.product_stream, name='product-stream'),
+    
+    # Productos por debajo de su umbral de reposición
+    path('products/low-stock/', views.low_stock, name='product-low-stock'),
+    
     # Estadísticas de productos
     path('products/stats/', views.product_stats, name='product-stats'),
     
+    # Percentiles, histogramas y valor del inventario
+    path('products/analytics/', views.product_analytics, name='product-analytics'),
+    
+    # Exportaciones masivas a CSV/XLSX generadas por un worker
+    path('products/exports/', views.ProductExportListCreateView.as_view(), name='product-export-list-create'),
+    path('products/exports/<int:pk>/', views.ProductExportDetailView.as_view(), name='product-export-detail'),
+    path('products/exports/<int:pk>/download/', views.product_export_download, name='product-export-download'),
+    
     # Gestión de imágenes de productos
     path('products/<int:product_id>/images/', views.ProductImageView.as_view(), name='product-images'),
     
@@ -2,19 +2,58 @@
 Vistas para la API de productos.
 Proporciona endpoints REST para gestionar productos del catálogo.
 """
+import asyncio
+import json
+import os
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_safe
 from rest_framework import generics, status, filters
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from django.db.models import Q, F
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Product, ProductImage
+from catalogo_backend.metrics import record_stock_operation
+from catalogo_backend.sparse_fields import prune_queryset
+from . import availability, columnar, events
+from .availability import total_stock
+from categories.models import Category
+from categories.serializers import CategorySerializer
+from .archive import get_archived_product, product_exists
+from .exports import CONTENT_TYPES, EXPORT_FILTER_PARAMS, RangeNotSatisfiable, parse_range, read_file
+from .ledger import product_history
+from .low_stock import alert_changes, low_stock_products
+from .models import Product, ProductExport, ProductImage
+from .prices import price_history
 from .serializers import (
     ProductSerializer,
     ProductCreateSerializer,
     ProductUpdateSerializer,
     ProductListSerializer,
     ProductStockUpdateSerializer,
-    ProductImageSerializer
+    ProductImageSerializer,
+    AvailabilityRequestSerializer,
+    StockReservationSerializer,
+    StockMovementSerializer,
+    PriceChangeSerializer,
+    LowStockAlertSerializer,
+    ArchivedProductSerializer,
+    ProductExportSerializer,
+    ProductExportCreateSerializer
+)
+from .shards import in_stock_filter
+from .stock import StockReservationError, place_hold, release_hold, reserve_stock
+from .sync import (
+    InvalidSyncToken,
+    changes_since,
+    decode_sync_token,
+    encode_sync_token,
+    sync_upper_bound,
 )
 
 
@@ -31,7 +70,7 @@ class ProductListCreateView(generics.ListCreateAPIView):
     filterset_fields = ['category', 'is_active']
     search_fields = ['name', 'description', 'sku']
     ordering_fields = ['name', 'price', 'created_at', 'stock']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
 
     def get_serializer_class(self):
         """
@@ -45,7 +84,10 @@ class ProductListCreateView(generics.ListCreateAPIView):
         """
         Filtra los productos según parámetros de búsqueda.
         """
-        queryset = Product.objects.filter(is_active=True).select_related('category')
+        queryset = (
+            Product.objects.filter(is_active=True).select_related('category')
+            .annotate(total_stock=total_stock())
+        )
         
         # Filtro por rango de precios
         min_price = self.request.query_params.get('min_price')
@@ -59,21 +101,42 @@ class ProductListCreateView(generics.ListCreateAPIView):
         # Filtro por stock disponible
         in_stock = self.request.query_params.get('in_stock')
         if in_stock and in_stock.lower() == 'true':
-            queryset = queryset.filter(stock__gt=0)
+            queryset = queryset.filter(in_stock_filter())
         
         # Filtro por categoría
         category = self.request.query_params.get('category')
         if category:
             queryset = queryset.filter(category__name__icontains=category)
+        
+        # Cargar solo las columnas de los campos pedidos con ?fields=
+        if self.request.method == 'GET':
+            queryset = prune_queryset(queryset, self.get_serializer())
     
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        """
+        Con filtros, los resuelve junto con el orden en la instantánea en
+        columnas si está disponible (ver columnar.select_ids()) y solo lee
+        de la base de datos la página pedida.
+        """
+        ids = columnar.select_ids(request.query_params)
+        if ids is None:
+            return super().list(request, *args, **kwargs)
+        
+        queryset = prune_queryset(
+            self.queryset.annotate(total_stock=total_stock()), self.get_serializer()
+        )
+        page = self.paginate_queryset(columnar.HydratedProducts(ids, queryset))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
 
 class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
     """
     Vista para obtener, actualizar o eliminar un producto específico.
     
-    GET: Obtiene un producto por ID
+    GET: Obtiene un producto por ID (?archived=true incluye los archivados)
     PUT/PATCH: Actualiza un producto
     DELETE: Elimina un producto (soft delete)
     """
@@ -89,6 +152,32 @@ class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
             return ProductUpdateSerializer
         return ProductSerializer
 
+    def get_queryset(self):
+        """
+        En lectura, carga solo las columnas de los campos pedidos con ?fields=.
+        """
+        queryset = super().get_queryset()
+        if self.request.method == 'GET':
+            queryset = prune_queryset(
+                queryset.annotate(total_stock=total_stock()), self.get_serializer()
+            )
+        return queryset
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Con ?archived=true, si el producto ya no está en la tabla principal
+        se busca en el archivo.
+        """
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            if request.query_params.get('archived', '').lower() not in ('1', 'true'):
+                raise
+            archived = get_archived_product(kwargs['pk'])
+            if archived is None:
+                raise
+            return Response(ArchivedProductSerializer(archived, context={'request': request}).data)
+
     def perform_destroy(self, instance):
         """
         Realiza eliminación lógica en lugar de física.
@@ -109,34 +198,50 @@ def product_search(request):
     max_price = request.query_params.get('max_price')
     in_stock = request.query_params.get('in_stock', 'false').lower() == 'true'
     
-    queryset = Product.objects.filter(is_active=True).select_related('category')
-    
-    # Aplicar filtros
-    if query:
-        queryset = queryset.filter(
-            Q(name__icontains=query) |
-            Q(description__icontains=query) |
-            Q(sku__icontains=query)
-        )
-    
-    if category:
-        queryset = queryset.filter(category__name__icontains=category)
-    
-    if min_price:
-        queryset = queryset.filter(price__gte=min_price)
-    
-    if max_price:
-        queryset = queryset.filter(price__lte=max_price)
+    queryset = (
+        Product.objects.filter(is_active=True).select_related('category')
+        .annotate(total_stock=total_stock())
+    )
+    context = {'request': request}
     
-    if in_stock:
-        queryset = queryset.filter(stock__gt=0)
-    
-    # Serializar resultados
-    serializer = ProductListSerializer(queryset, many=True)
+    # Sin texto, los filtros se resuelven con la instantánea en columnas
+    ids = None if query else columnar.select_ids(
+        request.query_params, allowed=columnar.SEARCH_PARAMS, category_names=category
+    )
+    if ids is not None:
+        queryset = prune_queryset(queryset, ProductListSerializer(context=context))
+        products = columnar.HydratedProducts(ids, queryset)[:]
+        serializer = ProductListSerializer(products, many=True, context=context)
+        count = len(products)
+    else:
+        # Aplicar filtros
+        if query:
+            queryset = queryset.filter(
+                Q(name__icontains=query) |
+                Q(description__icontains=query) |
+                Q(sku__icontains=query)
+            )
+        
+        if category:
+            queryset = queryset.filter(category__name__icontains=category)
+        
+        if min_price:
+            queryset = queryset.filter(price__gte=min_price)
+        
+        if max_price:
+            queryset = queryset.filter(price__lte=max_price)
+        
+        if in_stock:
+            queryset = queryset.filter(in_stock_filter())
+        
+        # Serializar resultados con los campos pedidos en ?fields=
+        queryset = prune_queryset(queryset, ProductListSerializer(context=context))
+        serializer = ProductListSerializer(queryset, many=True, context=context)
+        count = queryset.count()
     
     return Response({
         'results': serializer.data,
-        'count': queryset.count(),
+        'count': count,
         'filters': {
             'query': query,
             'category': category,
@@ -147,6 +252,169 @@ def product_search(request):
     })
 
 
+# Máximo de productos por petición a /products/batch/
+BATCH_MAX_ITEMS = 100
+
+
+def _parse_ordered_list(value):
+    """
+    Convierte "a,b,a" en una lista sin repetidos que conserva el orden.
+    """
+    return list(dict.fromkeys(item.strip() for item in value.split(',') if item.strip()))
+
+
+@api_view(['GET'])
+def product_batch(request):
+    """
+    Endpoint para obtener varios productos en una sola petición.
+    
+    GET /api/products/batch/?ids=3,1,2
+    GET /api/products/batch/?skus=ELE-0001,ROP-0002
+    
+    Retorna los productos en el orden pedido, resueltos con una consulta
+    más una para las imágenes adicionales, y lista en "missing" los IDs o
+    SKUs que no existen o están inactivos. Acepta ?fields= y ?exclude=.
+    """
+    ids = request.query_params.get('ids', '')
+    skus = request.query_params.get('skus', '')
+    if bool(ids) == bool(skus):
+        return Response(
+            {'error': 'Indica exactamente uno de los parámetros ids o skus.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    if ids:
+        lookup = 'id'
+        try:
+            keys = list(dict.fromkeys(int(item) for item in _parse_ordered_list(ids)))
+        except ValueError:
+            return Response(
+                {'error': 'El parámetro ids debe ser una lista de enteros.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    else:
+        lookup = 'sku'
+        keys = _parse_ordered_list(skus)
+    
+    if len(keys) > BATCH_MAX_ITEMS:
+        return Response(
+            {'error': f'Máximo {BATCH_MAX_ITEMS} productos por petición.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    context = {'request': request}
+    queryset = Product.objects.filter(
+        is_active=True, **{f'{lookup}__in': keys}
+    ).select_related('category').prefetch_related('additional_images').annotate(
+        total_stock=total_stock()
+    )
+    # Con ?fields= se omiten las columnas, el join y el prefetch no pedidos
+    queryset = prune_queryset(queryset, ProductSerializer(context=context), extra_fields=[lookup])
+    found = {getattr(product, lookup): product for product in queryset}
+    
+    return Response({
+        'results': ProductSerializer(
+            [found[key] for key in keys if key in found], many=True, context=context
+        ).data,
+        'missing': [key for key in keys if key not in found]
+    })
+
+
+@api_view(['POST', 'DELETE'])
+def product_availability(request):
+    """
+    Endpoint para verificar la disponibilidad de las líneas de un carrito.
+    
+    POST /api/products/availability/
+    Body: {"items": [{"id": 1, "quantity": 2}, ...], "hold": false}
+    
+    DELETE /api/products/availability/?hold=<token>
+    Libera una reserva temporal creada con "hold": true.
+    
+    El stock disponible (stock menos reservas vigentes) se lee de una caché
+    de pocos segundos o, para los productos que no estén en ella, de una
+    sola consulta. Con "hold": true y todas las líneas disponibles, reserva
+    las cantidades durante AVAILABILITY_HOLD_TIMEOUT segundos; el token se
+    confirma con POST /api/products/reserve/.
+    """
+    if request.method == 'DELETE':
+        if not release_hold(request.query_params.get('hold', '')):
+            return Response(
+                {'error': 'Reserva no encontrada o expirada'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    serializer = AvailabilityRequestSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Las líneas repetidas de un mismo producto se suman
+    lines = {}
+    for item in serializer.validated_data['items']:
+        lines[item['id']] = lines.get(item['id'], 0) + item['quantity']
+    
+    results, missing = availability.check_availability(lines)
+    all_available = not missing and all(line['available'] for line in results)
+    hold = None
+    if serializer.validated_data['hold'] and all_available:
+        try:
+            hold = place_hold(lines)
+        except StockReservationError as e:
+            # Otro carrito tomó el stock después de leer la caché
+            shortages = {line['id']: line['available'] for line in e.shortages}
+            for line in results:
+                if line['id'] in shortages:
+                    line.update(stock=shortages[line['id']], available=False)
+            all_available = False
+    
+    return Response({
+        'available': all_available,
+        'items': results,
+        'missing': missing,
+        'hold': hold
+    })
+
+
+@api_view(['POST'])
+def reserve_products(request):
+    """
+    Endpoint para reservar el stock de varios productos de forma atómica.
+    
+    POST /api/products/reserve/
+    Body: {"items": [{"id": 1, "quantity": 2}, ...], "hold": "<token opcional>"}
+    
+    Descuenta todas las líneas en una sola transacción o ninguna. Si falta
+    stock responde 409 con las líneas afectadas en "shortages". Con el token
+    de una reserva temporal de /products/availability/, sus cantidades
+    cuentan como disponibles para este carrito y la reserva se consume.
+    """
+    serializer = StockReservationSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Las líneas repetidas de un mismo producto se suman
+    lines = {}
+    for item in serializer.validated_data['items']:
+        lines[item['id']] = lines.get(item['id'], 0) + item['quantity']
+    
+    try:
+        remaining = reserve_stock(lines, hold_token=serializer.validated_data.get('hold'))
+    except StockReservationError as e:
+        return Response(
+            {'error': 'Stock insuficiente', 'shortages': e.shortages},
+            status=status.HTTP_409_CONFLICT
+        )
+    
+    return Response({
+        'message': 'Stock reservado correctamente',
+        'items': [
+            {'id': product_id, 'quantity': lines[product_id], 'stock': stock}
+            for product_id, stock in remaining.items()
+        ]
+    })
+
+
 @api_view(['PATCH'])
 def update_product_stock(request, product_id):
     """
@@ -172,14 +440,15 @@ def update_product_stock(request, product_id):
             product.add_stock(quantity)
         elif operation == 'reduce':
             if not product.reduce_stock(quantity):
+                record_stock_operation(operation, 'insufficient')
                 return Response(
                     {'error': 'Stock insuficiente'}, 
                     status=status.HTTP_400_BAD_REQUEST
                 )
         elif operation == 'set':
-            product.stock = quantity
-            product.save(update_fields=['stock', 'updated_at'])
+            product.set_stock(quantity)
         
+        record_stock_operation(operation, 'ok')
         return Response({
             'message': 'Stock actualizado correctamente',
             'product': ProductSerializer(product).data
@@ -188,38 +457,352 @@ def update_product_stock(request, product_id):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+def _parse_date_range(request, params=('from', 'to')):
+    """
+    Lee los parámetros de fecha (por defecto from y to) como fechas ISO 8601.
+
+    Returns:
+        dict: Fechas con zona horaria de los parámetros presentes
+
+    Raises:
+        ValueError: Si alguno no es una fecha válida
+    """
+    bounds = {}
+    for param in params:
+        value = request.query_params.get(param)
+        if not value:
+            continue
+        try:
+            bounds[param] = parse_datetime(value)
+        except ValueError:
+            bounds[param] = None
+        if bounds[param] is None:
+            raise ValueError(f'El parámetro {param} debe ser una fecha ISO 8601.')
+        if timezone.is_naive(bounds[param]):
+            bounds[param] = timezone.make_aware(bounds[param])
+    return bounds
+
+
+# Máximo de movimientos por consulta del historial de stock
+STOCK_HISTORY_MAX_LIMIT = 500
+
+
+@api_view(['GET'])
+def product_stock_history(request, product_id):
+    """
+    Endpoint con el historial de movimientos de stock de un producto.
+    
+    GET /api/products/{id}/stock-history/?from=2024-01-01T00:00:00&to=...&limit=100
+    
+    Retorna los movimientos del más reciente al más antiguo. Los saldos
+    anteriores a la última compactación aparecen como una fila snapshot.
+    También responde para los productos archivados.
+    """
+    if not product_exists(product_id):
+        return Response(
+            {'error': 'Producto no encontrado'}, 
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    try:
+        bounds = _parse_date_range(request)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        limit = min(max(int(request.query_params.get('limit', 100)), 1), STOCK_HISTORY_MAX_LIMIT)
+    except ValueError:
+        return Response(
+            {'error': 'El parámetro limit debe ser un entero.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    movements = product_history(product_id, bounds.get('from'), bounds.get('to'), limit)
+    return Response({
+        'product': product_id,
+        'count': len(movements),
+        'results': StockMovementSerializer(movements, many=True).data
+    })
+
+
+@api_view(['GET'])
+def product_price_history(request, product_id):
+    """
+    Endpoint con la evolución del precio de un producto en un rango de fechas.
+    
+    GET /api/products/{id}/price-history/?from=2024-01-01T00:00:00&to=...
+    
+    Retorna el precio vigente al inicio del rango y los cambios dentro de él,
+    en orden cronológico. Solo se registran los cambios reales de precio.
+    También responde para los productos archivados.
+    """
+    if not product_exists(product_id):
+        return Response(
+            {'error': 'Producto no encontrado'}, 
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    try:
+        bounds = _parse_date_range(request)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    opening, changes = price_history(product_id, bounds.get('from'), bounds.get('to'))
+    return Response({
+        'product': product_id,
+        'opening_price': str(opening) if opening is not None else None,
+        'changes': PriceChangeSerializer(changes, many=True).data
+    })
+
+
+# Máximo de productos o alertas por consulta de stock bajo
+LOW_STOCK_MAX_LIMIT = 1000
+
+
+@api_view(['GET'])
+def low_stock(request):
+    """
+    Endpoint de productos por debajo de su umbral de reposición.
+    
+    GET /api/products/low-stock/?category=3&limit=100
+    GET /api/products/low-stock/?since=2024-01-01T00:00:00&after=0
+    
+    Sin since, retorna los productos que hoy tienen stock bajo, leídos del
+    índice parcial de stock bajo. Con since, retorna solo las alertas
+    abiertas o resueltas desde esa fecha por el comando scan_low_stock;
+    el campo next trae los since y after de la siguiente consulta.
+    """
+    try:
+        limit = min(max(int(request.query_params.get('limit', 100)), 1), LOW_STOCK_MAX_LIMIT)
+        category_id = request.query_params.get('category')
+        category_id = int(category_id) if category_id else None
+        after_id = int(request.query_params.get('after', 0))
+    except ValueError:
+        return Response(
+            {'error': 'Los parámetros limit, category y after deben ser enteros.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        since = _parse_date_range(request, ('since',)).get('since')
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    if since is None:
+        products = low_stock_products(category_id, limit)
+        return Response({
+            'count': len(products),
+            'results': products
+        })
+    
+    alerts = alert_changes(since, after_id, category_id, limit)
+    return Response({
+        'opened': LowStockAlertSerializer(
+            [alert for alert in alerts if alert.resolved_at is None], many=True
+        ).data,
+        'resolved': LowStockAlertSerializer(
+            [alert for alert in alerts if alert.resolved_at is not None], many=True
+        ).data,
+        'next': {
+            'since': alerts[-1].changed_at if alerts else since,
+            'after': alerts[-1].id if alerts else after_id
+        }
+    })
+
+
 @api_view(['GET'])
 def product_stats(request):
     """
     Endpoint para obtener estadísticas de productos.
     
     GET /api/products/stats/
+    
+    Las estadísticas se recalculan en la cola de tareas (ver stats.py), así
+    que pueden tener hasta PRODUCT_STATS_REFRESH segundos de antigüedad más
+    la espera del worker.
+    """
+    from .stats import product_stats as cached_stats
+    
+    return Response(cached_stats())
+
+
+# Máximo de intervalos de los histogramas de /products/analytics/
+ANALYTICS_MAX_BINS = 100
+
+
+@api_view(['GET'])
+def product_analytics(request):
+    """
+    Endpoint con la distribución de precios y stock y el valor del inventario.
+    
+    GET /api/products/analytics/?bins=20
+    
+    Retorna percentiles e histogramas de precio y stock, y por categoría el
+    precio mínimo, máximo y mediano y el valor del inventario (precio * stock).
+    """
+    try:
+        bins = int(request.query_params.get('bins', 20))
+    except ValueError:
+        bins = 0
+    if not 1 <= bins <= ANALYTICS_MAX_BINS:
+        return Response(
+            {'error': f'El parámetro bins debe ser un entero entre 1 y {ANALYTICS_MAX_BINS}.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    from .analytics import product_analytics as compute_analytics
+    
+    return Response(compute_analytics(bins))
+
+
+@api_view(['GET'])
+def product_changes(request):
     """
-    total_products = Product.objects.filter(is_active=True).count()
-    products_in_stock = Product.objects.filter(is_active=True, stock__gt=0).count()
-    out_of_stock = total_products - products_in_stock
+    Endpoint de sincronización incremental de productos y categorías.
     
-    # Productos por categoría
-    from django.db.models import Count
-    products_by_category = Product.objects.filter(is_active=True).values(
-        'category__name'
-    ).annotate(count=Count('id')).order_by('-count')
+    GET /api/products/changes/?since=<token>&limit=500
     
-    # Precio promedio
-    from django.db.models import Avg
-    avg_price = Product.objects.filter(is_active=True).aggregate(
-        avg_price=Avg('price')
-    )['avg_price'] or 0
+    Retorna los productos y categorías creados, actualizados o desactivados
+    desde el token. Sin token, empieza desde el inicio del catálogo. Si
+    has_more es true, el cliente debe repetir la petición con el nuevo token.
+    """
+    try:
+        positions = decode_sync_token(
+            request.query_params.get('since', ''), ['products', 'categories']
+        )
+    except InvalidSyncToken as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        limit = min(max(int(request.query_params.get('limit', 500)), 1), 1000)
+    except ValueError:
+        return Response(
+            {'error': 'El parámetro limit debe ser un entero.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    upper_bound = sync_upper_bound()
+    products, positions['products'], more_products = changes_since(
+        Product.objects.select_related('category').prefetch_related('additional_images')
+        .annotate(total_stock=total_stock()),
+        positions['products'],
+        limit,
+        upper_bound
+    )
+    categories, positions['categories'], more_categories = changes_since(
+        Category.objects.all(),
+        positions['categories'],
+        limit,
+        upper_bound
+    )
     
     return Response({
-        'total_products': total_products,
-        'products_in_stock': products_in_stock,
-        'out_of_stock': out_of_stock,
-        'average_price': round(float(avg_price), 2),
-        'products_by_category': list(products_by_category)
+        'products': ProductSerializer(
+            [product for product in products if product.is_active], many=True
+        ).data,
+        'deleted_products': [product.id for product in products if not product.is_active],
+        'categories': CategorySerializer(
+            [category for category in categories if category.is_active], many=True
+        ).data,
+        'deleted_categories': [category.id for category in categories if not category.is_active],
+        'next': encode_sync_token(positions),
+        'has_more': more_products or more_categories
     })
 
 
+# Segundos entre comentarios keepalive del stream SSE
+STREAM_HEARTBEAT_SECONDS = 15
+
+# Máximo de productos y categorías por suscripción
+STREAM_MAX_SUBSCRIPTIONS = 200
+
+
+def _parse_id_list(value):
+    """
+    Convierte "1,2,3" en un conjunto de enteros.
+    """
+    return {int(item) for item in value.split(',') if item.strip()}
+
+
+def _sse(event_type, data):
+    """
+    Formatea un evento Server-Sent Events.
+    """
+    return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+
+async def product_stream(request):
+    """
+    Stream Server-Sent Events con los cambios de stock, precio y estado.
+    
+    GET /api/products/stream/?products=1,2,3&categories=4
+    
+    Al conectar envía un evento "snapshot" con el estado actual de cada
+    producto suscrito y luego un evento "product" por cada cambio. Requiere
+    un servidor ASGI (uvicorn, daphne); con WSGI responde 501.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Método no permitido'}, status=405)
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'error': 'El stream requiere ejecutar el proyecto con un servidor ASGI.'},
+            status=501
+        )
+    
+    try:
+        product_ids = _parse_id_list(request.GET.get('products', ''))
+        category_ids = _parse_id_list(request.GET.get('categories', ''))
+    except ValueError:
+        return JsonResponse(
+            {'error': 'Los parámetros products y categories deben ser listas de IDs.'},
+            status=400
+        )
+    if not product_ids and not category_ids:
+        return JsonResponse(
+            {'error': 'Indica al menos un producto o una categoría.'},
+            status=400
+        )
+    if len(product_ids) + len(category_ids) > STREAM_MAX_SUBSCRIPTIONS:
+        return JsonResponse(
+            {'error': f'Máximo {STREAM_MAX_SUBSCRIPTIONS} productos y categorías por stream.'},
+            status=400
+        )
+    
+    await sync_to_async(events.ensure_listening)()
+    
+    async def stream():
+        subscription = events.bus.subscribe(product_ids, category_ids)
+        try:
+            yield 'retry: 5000\n\n'
+            # El mismo stock total que los eventos en vivo y los endpoints REST
+            snapshot = await sync_to_async(list)(
+                Product.objects.filter(id__in=product_ids).only(
+                    'id', 'category_id', 'stock', 'price', 'is_active', 'updated_at'
+                ).annotate(total_stock=total_stock())
+            )
+            for product in snapshot:
+                yield _sse('snapshot', events.product_event(
+                    product.id, product.category_id, product.get_total_stock(),
+                    product.price, product.is_active, product.updated_at
+                ))
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=STREAM_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                yield _sse('product', event)
+        finally:
+            events.bus.unsubscribe(subscription)
+    
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 class ProductImageView(generics.ListCreateAPIView):
     """
     Vista para gestionar imágenes adicionales de productos.
@@ -237,4 +820,104 @@ class ProductImageView(generics.ListCreateAPIView):
             product = Product.objects.get(id=product_id, is_active=True)
             serializer.save(product=product)
         except Product.DoesNotExist:
-            raise serializers.ValidationError("Producto no encontrado")
\ No newline at end of file
+            raise serializers.ValidationError("Producto no encontrado")
+
+
+class ProductExportListCreateView(generics.ListCreateAPIView):
+    """
+    Vista para pedir exportaciones del catálogo y listar las existentes.
+    
+    GET: Lista las exportaciones, de la más reciente a la más antigua
+    POST: Encola una exportación; responde 202 con su estado
+    """
+    
+    queryset = ProductExport.objects.all()
+    
+    def get_serializer_class(self):
+        """
+        Retorna el serializador apropiado según el método HTTP.
+        """
+        if self.request.method == 'POST':
+            return ProductExportCreateSerializer
+        return ProductExportSerializer
+    
+    def create(self, request, *args, **kwargs):
+        """
+        Sin ``filters`` en el cuerpo se usan los parámetros de la URL, así que
+        basta con copiar la query string de /products/.
+        """
+        data = dict(request.data.items())
+        if 'filters' not in data:
+            data['filters'] = {
+                key: request.query_params[key]
+                for key in EXPORT_FILTER_PARAMS if key in request.query_params
+            }
+        
+        serializer = self.get_serializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        export = serializer.save()
+        
+        detail = ProductExportSerializer(export, context=self.get_serializer_context()).data
+        return Response(
+            detail,
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': reverse('products:product-export-detail', kwargs={'pk': export.id})}
+        )
+
+
+class ProductExportDetailView(generics.RetrieveAPIView):
+    """
+    Vista con el estado y el avance de una exportación.
+    """
+    
+    queryset = ProductExport.objects.all()
+    serializer_class = ProductExportSerializer
+
+
+@require_safe
+def product_export_download(request, pk):
+    """
+    Descarga el archivo de una exportación terminada.
+    
+    GET /api/products/exports/{id}/download/
+    
+    Admite ``Range: bytes=inicio-fin`` (un solo rango) para retomar descargas
+    interrumpidas, con ``If-Range`` para no mezclar partes de archivos
+    distintos. Es una vista de Django, no de DRF, para que la negociación de
+    contenido no rechace cabeceras Accept como text/csv.
+    """
+    export = ProductExport.objects.filter(pk=pk, status='done').first()
+    if export is None or not export.file:
+        return JsonResponse({'error': 'Exportación no encontrada o sin terminar'}, status=404)
+    
+    path = export.file.path
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return JsonResponse({'error': 'El archivo de la exportación ya no existe'}, status=410)
+    etag = f'"{export.id}-{size}-{int(export.finished_at.timestamp())}"'
+    
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if not if_range or if_range == etag:
+        try:
+            byte_range = parse_range(request.headers.get('Range'), size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+    
+    start, end = byte_range or (0, size - 1)
+    length = end - start + 1
+    response = StreamingHttpResponse(
+        read_file(path, start, length),
+        status=206 if byte_range else 200,
+        content_type=CONTENT_TYPES[export.format]
+    )
+    if byte_range:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = str(length)
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Content-Disposition'] = f'attachment; filename="productos-{export.id}.{export.format}"'
+    return response
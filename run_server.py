@@ -93,6 +93,27 @@ def run_migrations():
         print(f"Error en migraciones: {e}")
         return False
 
+def prepare_metrics_dir():
+    """
+    Limpia el directorio de métricas multiproceso antes de arrancar.
+    
+    prometheus_client guarda un archivo por proceso en PROMETHEUS_MULTIPROC_DIR;
+    los archivos de ejecuciones anteriores deben borrarse para no sumar
+    valores de procesos que ya no existen.
+    """
+    from decouple import config
+    
+    metrics_dir = config('PROMETHEUS_MULTIPROC_DIR', default='')
+    if not metrics_dir:
+        return
+    
+    os.makedirs(metrics_dir, exist_ok=True)
+    for filename in os.listdir(metrics_dir):
+        if filename.endswith('.db'):
+            os.remove(os.path.join(metrics_dir, filename))
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = metrics_dir
+    print(f"Directorio de metricas preparado: {metrics_dir}")
+
 def main():
     """
     Función principal que ejecuta todas las verificaciones y inicia el servidor.
@@ -112,11 +133,15 @@ def main():
     if not run_migrations():
         sys.exit(1)
     
+    # Preparar métricas multiproceso
+    prepare_metrics_dir()
+    
     print("=" * 50)
     print("Todas las verificaciones completadas")
     print("Iniciando servidor en http://localhost:8000")
     print("Documentacion de API: http://localhost:8000/api/docs/")
     print("Panel de administracion: http://localhost:8000/admin/")
+    print("Metricas Prometheus: http://localhost:8000/metrics")
     print("=" * 50)
     
     # Iniciar servidor